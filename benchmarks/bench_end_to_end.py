@@ -0,0 +1,156 @@
+"""
+End-to-end benchmark of SmartDoorSystem on simulated hardware.
+
+A scripted door swings every --period seconds. The gesture stage is the real recognizer on a video
+file (--model and --video) or a scripted answer after --gesture-latency seconds. Reports door
+transition to publish and to broker latency, CPU per stage and throughput.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_end_to_end --events 20
+    python -m benchmarks.bench_end_to_end --events 10 --model gesture/hand_gesture_model.task --video hand.mp4
+"""
+import time
+import argparse
+import threading
+from collections import defaultdict
+import numpy as np
+from simulation.hardware import install
+from simulation.scenario import DoorScenario
+from simulation.mqtt_broker import LocalMQTTBroker
+
+class StageTimer:
+    def __init__(self):
+        self.wall = defaultdict(list)
+        self.cpu = defaultdict(list)
+        self.calls = defaultdict(int)
+
+    def wrap(self, obj, method_name, stage, cpu_clock=time.thread_time):
+        """Time every call of obj.method_name by shadowing it with an instance attribute."""
+        method = getattr(obj, method_name)
+
+        def timed(*args, **kwargs):
+            wall_start, cpu_start = time.perf_counter(), cpu_clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.cpu[stage].append(cpu_clock() - cpu_start)
+                self.wall[stage].append(time.perf_counter() - wall_start)
+                self.calls[stage] += 1
+        setattr(obj, method_name, timed)
+
+def percentiles(values):
+    if not values:
+        return [float('nan')] * 3
+    return np.percentile(np.array(values) * 1000, [50, 95, 99])
+
+def latencies(transitions, event_times):
+    """Match each (time, door state) event to the latest scripted transition to that state before it."""
+    result = []
+    for event_time, state in event_times:
+        earlier = [at for at, transition_state in transitions if at <= event_time and transition_state == state]
+        if earlier:
+            result.append(event_time - earlier[-1])
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', default=20, type=int, help='Door events to wait for')
+    parser.add_argument('--period', default=3.0, type=float, help='Seconds between door transitions')
+    parser.add_argument('--swing-time', default=0.8, type=float)
+    parser.add_argument('--model', help='Gesture model; the scripted gesture stage is used if omitted')
+    parser.add_argument('--video', help='Video file played as the camera, required with --model')
+    parser.add_argument('--gesture-latency', default=0.4, type=float, help='Seconds per scripted session')
+    parser.add_argument('--timeout', default=10, type=int, help='Gesture session timeout with --model')
+    parser.add_argument('--binary', action='store_true', help='Publish the binary payload format')
+    args = parser.parse_args()
+
+    scenario = install(DoorScenario(period=args.period, swing_time=args.swing_time))
+    broker = LocalMQTTBroker().start()
+
+    from main import SmartDoorSystem
+    from messaging import payload_codec
+    if args.model:
+        from gesture.gesture_service import GestureRecognitionService
+        from simulation.video_camera import VideoFileCamera
+        gesture_service = GestureRecognitionService(model=args.model, headless=True, timeout=args.timeout,
+                                                    camera_id=lambda: VideoFileCamera(args.video))
+    else:
+        from simulation.scripted_gesture import ScriptedGestureService
+        gesture_service = ScriptedGestureService(latency=args.gesture_latency)
+
+    content_type = payload_codec.CONTENT_TYPE_BINARY if args.binary else payload_codec.CONTENT_TYPE_JSON
+    system = SmartDoorSystem(mqtt_server='127.0.0.1', mqtt_port=broker.port, history_dir=None,
+                             gesture_service=gesture_service, content_type=content_type)
+
+    timer = StageTimer()
+    timer.wrap(system.door_state_sensor, 'get_door_state', 'door_sensing')
+    timer.wrap(system.door_motion_sensor, 'get_door_motion', 'motion_check')
+    timer.wrap(system.gesture_service, 'start_session', 'gesture_start', cpu_clock=time.process_time)
+    # The scheduler holds the bound method, so shadowing it on system would not be seen
+    gesture_task = next(task for task in system.scheduler.tasks if task.name == 'gesture_result')
+    timer.wrap(gesture_task, 'callback', 'gesture_poll')
+    timer.wrap(system, 'publish_hand_gesture', 'publish')
+
+    motion_samples = [0]
+    system.door_motion_sensor.on_motion_state = lambda state: motion_samples.__setitem__(0, motion_samples[0] + 1)
+
+    publish_times = []  # (monotonic time, door state) of each publish_hand_gesture call
+    publish = system.publish_hand_gesture
+
+    def record_publish(event_type, hand_gesture, score):
+        publish_times.append((time.monotonic(), event_type))
+        session = system.gesture_service.warm_timings  # Of the session that produced this result
+        timer.wall['gesture_session'].append(session['session'])
+        timer.cpu['gesture_session'].append(session['session_cpu'])
+        timer.calls['gesture_session'] += 1
+        publish(event_type, hand_gesture, score)
+    system.publish_hand_gesture = record_publish
+
+    arrivals = []  # (monotonic time, door state) of each gesture message reaching the broker
+    done = threading.Event()
+
+    def on_broker_message(topic, payload, arrival):
+        base_topic, topic_content_type = payload_codec.parse_topic(topic)
+        if base_topic == system.topic_hand_gesture:
+            arrivals.append((arrival, payload_codec.decode(payload, topic_content_type)['event_type']))
+            if len(arrivals) >= args.events:
+                done.set()
+    broker.listeners.append(on_broker_message)
+
+    scheduler_thread = threading.Thread(target=system.scheduler.run, daemon=True)
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    scenario.start()
+    scheduler_thread.start()
+    done.wait(timeout=args.events * args.period * 2 + scenario.start_delay + 30)
+    wall_time = time.perf_counter() - wall_start
+    cpu_time = time.process_time() - cpu_start
+    system.scheduler.stop()
+    scheduler_thread.join()
+
+    transitions = scenario.transitions()
+    publish_latency = latencies(transitions, publish_times)
+    arrival_latency = latencies(transitions, arrivals)
+    missed = len(transitions) - len(publish_times)
+
+    print(f"{len(arrivals)} events in {wall_time:.1f}s, {len(transitions)} scripted transitions, {missed} not published")
+    print(f"{'latency':<22}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for name, values in (('transition->publish', publish_latency), ('transition->broker', arrival_latency)):
+        p50, p95, p99 = percentiles(values)
+        print(f"{name:<22}{p50:>9.1f}{p95:>9.1f}{p99:>9.1f}")
+
+    print(f"{'stage':<14}{'calls':>7}{'wall ms':>10}{'CPU ms':>9}{'CPU total s':>13}")
+    for stage in timer.calls:
+        print(f"{stage:<14}{timer.calls[stage]:>7}{np.mean(timer.wall[stage]) * 1000:>10.2f}"
+              f"{np.mean(timer.cpu[stage]) * 1000:>9.2f}{sum(timer.cpu[stage]):>13.2f}")
+    print(f"process CPU: {100 * cpu_time / wall_time:.0f}%")
+
+    print(f"throughput: {len(arrivals) / wall_time:.2f} events/s, "
+          f"{timer.calls['door_sensing'] / wall_time:.1f} HC-SR04 reads/s, "
+          f"{motion_samples[0] / wall_time:.1f} MPU6050 samples/s, "
+          f"{broker.messages / wall_time:.2f} MQTT messages/s")
+
+    system.system_shutdown()
+    broker.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Compare CPU use and FPS of the debug-render and headless gesture recognition modes.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_headless --model gesture/hand_gesture_model.task --duration 20
+"""
+import time
+import argparse
+from gesture.gesture_recognition import HandGestureRecognition
+from benchmarks.session import stop_after
+
+def run_mode(model, camera_id, duration, headless):
+    """Run one gesture session for a fixed duration and return its CPU and FPS figures."""
+    recognizer = HandGestureRecognition(model=model, camera_id=camera_id,
+                                        stop_on_gesture=False, headless=headless)
+    recognizer.open_camera()
+    recognizer.warm_up()
+
+    stop_after(recognizer, duration)
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    recognizer.run(keep_alive=True)
+    cpu_time = time.process_time() - cpu_start
+    wall_time = time.perf_counter() - wall_start
+
+    stats = recognizer.frame_grabber.stats()
+    recognizer.close()
+    return {
+        'mode': 'headless' if headless else 'debug-render',
+        'loop_fps': stats['processed'] / wall_time,
+        'inference_fps': recognizer.counter / wall_time,
+        'cpu_percent': 100 * cpu_time / wall_time,
+        'dropped': stats['dropped'],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='hand_gesture_model.task')
+    parser.add_argument('--camera', default=0, type=int)
+    parser.add_argument('--duration', default=20.0, type=float, help='Seconds per mode')
+    args = parser.parse_args()
+
+    results = [run_mode(args.model, args.camera, args.duration, headless)
+               for headless in (False, True)]
+
+    print(f"{'mode':<14}{'loop FPS':>10}{'infer FPS':>11}{'CPU %':>8}{'dropped':>9}")
+    for result in results:
+        print(f"{result['mode']:<14}{result['loop_fps']:>10.1f}{result['inference_fps']:>11.1f}"
+              f"{result['cpu_percent']:>8.0f}{result['dropped']:>9}")
+
+    debug, headless = results
+    if debug['cpu_percent'] > 0:
+        saving = 100 * (debug['cpu_percent'] - headless['cpu_percent']) / debug['cpu_percent']
+        print(f"Headless CPU saving: {saving:.0f}%")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""
+Compare payload size and encode/decode time of the JSON and binary payload formats.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_payload --iterations 100000
+"""
+import time
+import argparse
+import timeit
+from messaging import payload_codec
+from messaging.payload_codec import CONTENT_TYPE_JSON, CONTENT_TYPE_BINARY
+
+def bench(name, encode, iterations):
+    rows = []
+    for content_type in (CONTENT_TYPE_JSON, CONTENT_TYPE_BINARY):
+        payload = encode(content_type)
+        size = len(payload.encode() if isinstance(payload, str) else payload)
+        encode_time = timeit.timeit(lambda: encode(content_type), number=iterations) / iterations
+        decode_time = timeit.timeit(lambda: payload_codec.decode(payload, content_type), number=iterations) / iterations
+        rows.append((name, 'json' if content_type == CONTENT_TYPE_JSON else 'binary',
+                     size, encode_time * 1e6, decode_time * 1e6))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', default=100000, type=int)
+    args = parser.parse_args()
+
+    timestamp = time.time()
+    rows = bench('gesture', lambda content_type: payload_codec.encode_gesture(
+        'open', 'thumbs_up', 0.87, timestamp, content_type), args.iterations)
+    rows += bench('reading', lambda content_type: payload_codec.encode_reading(21.0, content_type), args.iterations)
+
+    print(f"{'payload':<10}{'format':<8}{'bytes':>7}{'encode us':>11}{'decode us':>11}")
+    for name, fmt, size, encode_us, decode_us in rows:
+        print(f"{name:<10}{fmt:<8}{size:>7}{encode_us:>11.2f}{decode_us:>11.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Compare full-frame gesture recognition with adaptive ROI cropping (gesture.roi): results/s, CPU,
+hand rate, input pixels and agreement between the modes. --video gives both modes the same clip.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_roi --model gesture/hand_gesture_model.task --video hand_clip.mp4 --duration 20
+    python -m benchmarks.bench_roi --model gesture/hand_gesture_model.task --camera 0
+"""
+import time
+import argparse
+from collections import Counter
+from gesture.gesture_recognition import HandGestureRecognition
+from benchmarks.session import stop_after
+from simulation.video_camera import VideoFileCamera
+
+class CountingRecognition(HandGestureRecognition):
+    """HandGestureRecognition that also counts hands and top gestures of every result."""
+    def __init__(self, *args, **kwargs):
+        self.hand_results = 0
+        self.gestures = Counter()
+        super().__init__(*args, **kwargs)
+
+    def save_result(self, result, unused_output_image, timestamp_ms):
+        if result.hand_landmarks:
+            self.hand_results += 1
+        if result.gestures:
+            self.gestures[result.gestures[0][0].category_name] += 1
+        super().save_result(result, unused_output_image, timestamp_ms)
+
+def run_mode(model, camera_id, duration, adaptive_roi):
+    """Run one gesture session for a fixed duration and return its figures."""
+    recognizer = CountingRecognition(model=model, camera_id=camera_id, stop_on_gesture=False,
+                                     headless=True, adaptive_roi=adaptive_roi)
+    recognizer.open_camera()
+    recognizer.warm_up()
+    recognizer.hand_results = 0
+    recognizer.gestures.clear()
+
+    stop_after(recognizer, duration)
+    counter_start = recognizer.counter
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    recognizer.run(keep_alive=True)
+    cpu_time = time.process_time() - cpu_start
+    wall_time = time.perf_counter() - wall_start
+
+    results = recognizer.counter - counter_start
+    if adaptive_roi:
+        input_pixels = recognizer.roi.stats()['mean_input_pixels']
+    else:
+        input_pixels = recognizer.frame_size[0] * recognizer.frame_size[1]
+    recognizer.close()
+    return {
+        'mode': 'adaptive-roi' if adaptive_roi else 'full-frame',
+        'results_per_second': results / wall_time,
+        'cpu_percent': 100 * cpu_time / wall_time,
+        'hand_rate': recognizer.hand_results / results if results else 0.0,
+        'input_pixels': input_pixels or 0,
+        'gestures': recognizer.gestures,
+    }
+
+def agreement(first, second):
+    """Overlap of two gesture histograms: 1.0 when both modes saw the same gestures in the same shares."""
+    first_total, second_total = sum(first.values()), sum(second.values())
+    if not first_total or not second_total:
+        return None
+    return sum(min(first[name] / first_total, second[name] / second_total) for name in first)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='hand_gesture_model.task')
+    parser.add_argument('--camera', default=0, type=int)
+    parser.add_argument('--video', default=None, help='Video file played as the camera instead of --camera')
+    parser.add_argument('--duration', default=20.0, type=float, help='Seconds per mode')
+    args = parser.parse_args()
+
+    camera_id = (lambda: VideoFileCamera(args.video)) if args.video else args.camera
+    results = [run_mode(args.model, camera_id, args.duration, adaptive_roi)
+               for adaptive_roi in (False, True)]
+
+    print(f"{'mode':<14}{'results/s':>11}{'CPU %':>8}{'hand rate':>11}{'input px':>10}  top gestures")
+    for result in results:
+        top = ', '.join(f"{name} {count}" for name, count in result['gestures'].most_common(3))
+        print(f"{result['mode']:<14}{result['results_per_second']:>11.1f}{result['cpu_percent']:>8.0f}"
+              f"{result['hand_rate']:>11.2f}{result['input_pixels']:>10}  {top}")
+
+    full, roi = results
+    if full['cpu_percent'] > 0:
+        saving = 100 * (full['cpu_percent'] - roi['cpu_percent']) / full['cpu_percent']
+        print(f"Adaptive ROI CPU saving: {saving:.0f}%")
+    overlap = agreement(full['gestures'], roi['gestures'])
+    if overlap is not None:
+        print(f"Gesture agreement: {overlap:.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,8 @@
+import threading
+
+def stop_after(recognizer, duration):
+    """Set recognizer.stop_flag after duration seconds, to end a run() that has stop_on_gesture=False."""
+    timer = threading.Timer(duration, setattr, (recognizer, 'stop_flag', True))
+    timer.daemon = True
+    timer.start()
+    return timer
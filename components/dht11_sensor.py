@@ -0,0 +1,139 @@
+import time
+import statistics
+from collections import deque
+from dataclasses import dataclass
+import board
+import adafruit_dht
+
+class DHT11Sensor:
+    def __init__(self, pin=board.D14):
+        self.sensor = adafruit_dht.DHT11(pin, use_pulseio=True)
+
+    def read(self):
+        """
+        Read temperature (C) and humidity (%).
+
+        Raises RuntimeError on the checksum and timing errors the DHT11 reports regularly.
+        """
+        return self.sensor.temperature, self.sensor.humidity
+
+    def release(self):
+        self.sensor.exit()
+
+@dataclass(frozen=True)
+class DHT11Reading:
+    temperature: float  # Median-filtered, degrees C
+    humidity: float  # Median-filtered, %
+    timestamp: float  # time.monotonic() of the last successful read
+
+    def age(self):
+        return time.monotonic() - self.timestamp
+
+class DHT11Pipeline:
+    def __init__(self, sensor, window=5, temperature_deadband=0.5, humidity_deadband=2.0,
+                 interval=2.0, max_interval=60.0, max_backoff=30.0, retries=3):
+        """
+        Median-filter DHT11 readings and decide when they are worth publishing.
+
+        :param window: Number of raw readings in the rolling median.
+        :param temperature_deadband: Change in filtered temperature (C) that triggers a publish.
+        :param humidity_deadband: Change in filtered humidity (%) that triggers a publish.
+        :param interval: Seconds between reads while the sensor answers.
+        :param max_interval: Publish at least this often even without a change.
+        :param max_backoff: Longest wait between reads after repeated read errors.
+        :param retries: Consecutive read errors retried at interval before backing off. Occasional
+            checksum errors are normal for the DHT11; only a run of failures means it is not answering.
+        """
+        self.sensor = sensor
+        self.temperatures = deque(maxlen=window)
+        self.humidities = deque(maxlen=window)
+        self.temperature_deadband = temperature_deadband
+        self.humidity_deadband = humidity_deadband
+        self.interval = interval
+        self.max_interval = max_interval
+        self.max_backoff = max_backoff
+        self.retries = retries
+
+        self.last_good = None  # Latest DHT11Reading
+        self.last_published = None  # DHT11Reading last returned for publishing
+        self.last_publish_time = None
+        self.consecutive_errors = 0
+        self.next_delay = interval
+
+        # Counters
+        self.reads = 0
+        self.errors = 0
+        self.published = 0
+        self.suppressed = 0
+
+    def sample(self):
+        """
+        Read the sensor once and update the filter.
+
+        :return: The DHT11Reading to publish, or None when it stays within the deadband or the read failed.
+        """
+        self.reads += 1
+        try:
+            temperature, humidity = self.sensor.read()
+            if temperature is None or humidity is None:
+                raise RuntimeError("DHT11 returned no data")
+        except RuntimeError:
+            self.errors += 1
+            self.consecutive_errors += 1
+            if self.consecutive_errors > self.retries:
+                backoff_steps = self.consecutive_errors - self.retries
+                self.next_delay = min(self.interval * 2 ** backoff_steps, self.max_backoff)
+            else:
+                self.next_delay = self.interval
+            return None
+
+        self.consecutive_errors = 0
+        self.next_delay = self.interval
+        self.temperatures.append(temperature)
+        self.humidities.append(humidity)
+        self.last_good = DHT11Reading(statistics.median(self.temperatures),
+                                      statistics.median(self.humidities), time.monotonic())
+
+        if self.should_publish(self.last_good):
+            self.last_published = self.last_good
+            self.last_publish_time = self.last_good.timestamp
+            self.published += 1
+            return self.last_good
+        self.suppressed += 1
+        return None
+
+    def should_publish(self, reading):
+        if self.last_published is None:
+            return True
+        if reading.timestamp - self.last_publish_time >= self.max_interval:
+            return True
+        return (abs(reading.temperature - self.last_published.temperature) >= self.temperature_deadband
+                or abs(reading.humidity - self.last_published.humidity) >= self.humidity_deadband)
+
+    def latest(self):
+        """Return the cached last good reading and its age in seconds, or (None, None)."""
+        if self.last_good is None:
+            return None, None
+        return self.last_good, self.last_good.age()
+
+    def stats(self):
+        return {
+            'reads': self.reads,
+            'errors': self.errors,
+            'published': self.published,
+            'suppressed': self.suppressed,
+        }
+
+if __name__ == "__main__":
+    sensor = DHT11Sensor()
+    try:
+        while True:
+            try:
+                print(sensor.read())
+            except RuntimeError as error:
+                print(f"DHT11: {error}")
+            time.sleep(2.0)
+    except KeyboardInterrupt:
+        print("Stopped by User")
+    finally:
+        sensor.release()
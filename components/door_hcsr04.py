@@ -1,21 +1,88 @@
 import gpiod
 import time
+from runtime import metrics
+
+SPEED_OF_SOUND_HALF = 17150  # cm/s, halved for the round trip
+ECHO_TIMEOUT = 0.04  # Longest echo (about 4 m) plus margin, in seconds
 
 class DoorStateHCSR04:
-    def __init__(self, trig_pin, echo_pin, gpio_chip='gpiochip4', threshold_distance=4):
+    def __init__(self, trig_pin, echo_pin, gpio_chip='gpiochip4', threshold_distance=4, mode='edge'):
+        """
+        :param mode: 'edge' measures the echo pulse from kernel edge-event timestamps,
+            'poll' busy-waits on the echo line. 'edge' falls back to 'poll' if edge events are unavailable.
+        """
         self.chip = gpiod.Chip(gpio_chip)
         self.trig_line = self.chip.get_line(trig_pin)
         self.echo_line = self.chip.get_line(echo_pin)
         self.trig_line.request(consumer='hc-sr04-trig', type=gpiod.LINE_REQ_DIR_OUT, default_val=0)
-        self.echo_line.request(consumer='hc-sr04-echo', type=gpiod.LINE_REQ_DIR_IN)
+        self.mode = self.request_echo_line(mode)
 
         # Global variables
         self.threshold_distance = threshold_distance
         self.previous_door_state = None
+        self.last_distance = None  # Most recent measurement in cm, None after a failed read
         self.last_change_time = None
         self.time_since_last_change = None
 
+    def request_echo_line(self, mode):
+        """Request the echo line for edge events, or as a plain input for polling. Returns the mode in use."""
+        if mode == 'edge':
+            try:
+                self.echo_line.request(consumer='hc-sr04-echo', type=gpiod.LINE_REQ_EV_BOTH_EDGES)
+                return 'edge'
+            except (OSError, AttributeError) as error:
+                print(f"HC-SR04: Edge events unavailable, falling back to polling. {error}")
+        self.echo_line.request(consumer='hc-sr04-echo', type=gpiod.LINE_REQ_DIR_IN)
+        return 'poll'
+
     def get_distance(self):
+        with metrics.span('hcsr04_read'):
+            distance = self.get_distance_edge() if self.mode == 'edge' else self.get_distance_poll()
+        if distance is None:
+            metrics.inc('sensor_errors_total', stage='hcsr04')
+        return distance
+
+    def trigger(self):
+        # Send 10us pulse to TRIG
+        self.trig_line.set_value(1)
+        time.sleep(0.00001)
+        self.trig_line.set_value(0)
+
+    def get_distance_edge(self):
+        """Measure the echo pulse width from the rising and falling edge event timestamps."""
+        try:
+            # Discard edges left over from a previous, timed out measurement
+            while self.echo_line.event_wait(sec=0, nsec=0):
+                self.echo_line.event_read()
+
+            self.trigger()
+
+            rising = None
+            deadline = time.monotonic() + ECHO_TIMEOUT
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.echo_line.event_wait(sec=0, nsec=int(remaining * 1e9)):
+                    raise TimeoutError("No echo received. Check connections.")
+
+                event = self.echo_line.event_read()
+                event_time = event.sec + event.nsec / 1e9
+                if event.type == gpiod.LineEvent.RISING_EDGE:
+                    rising = event_time
+                elif rising is not None:
+                    pulse_duration = event_time - rising
+                    break
+
+            if pulse_duration <= 0:
+                raise ValueError("Invalid pulse duration. Check connections.")
+
+            distance = pulse_duration * SPEED_OF_SOUND_HALF
+            return round(distance, 2)
+
+        except (OSError, ValueError) as error:
+            #print(f"HC-SR04: Error measuring distance. {error}")
+            return None
+
+    def get_distance_poll(self):
         # Set TRIG LOW
         self.trig_line.set_value(0)
         time.sleep(0.002)
@@ -28,20 +95,21 @@ class DoorStateHCSR04:
         # Start recording time
         pulse_start = time.time()
         pulse_end = pulse_start
-        timeout = time.time() + 0.04
+        timeout = time.time() + ECHO_TIMEOUT
 
         try:
             while self.echo_line.get_value() == 0 and time.time() < timeout:
                 pulse_start = time.time()
 
-            while self.echo_line.get_value() == 1:
+            timeout = pulse_start + ECHO_TIMEOUT
+            while self.echo_line.get_value() == 1 and time.time() < timeout:
                 pulse_end = time.time()
 
             pulse_duration = pulse_end - pulse_start
             if pulse_duration <= 0:
                 raise ValueError("Invalid pulse duration. Check connections.")
 
-            distance = pulse_duration * 17150
+            distance = pulse_duration * SPEED_OF_SOUND_HALF
             return round(distance, 2)
 
         except (OSError, ValueError) as error:
@@ -50,6 +118,7 @@ class DoorStateHCSR04:
         
     def get_door_state(self):
         current_distance = self.get_distance()
+        self.last_distance = current_distance
 
         # Handle error
         if current_distance is None:
@@ -1,21 +1,77 @@
 import mpu6050
 import time
-import math
+import struct
+import threading
+import numpy as np
+from dataclasses import dataclass
+from runtime import metrics
+
+# MPU6050 registers
+SMPLRT_DIV = 0x19
+CONFIG = 0x1A
+FIFO_EN = 0x23
+INT_STATUS = 0x3A
+ACCEL_XOUT_H = 0x3B  # Start of the 14-byte accel/temp/gyro block
+USER_CTRL = 0x6A
+FIFO_COUNT_H = 0x72
+FIFO_R_W = 0x74
+
+FIFO_SIZE = 1024
+FIFO_OFLOW_INT = 0x10
+USER_CTRL_FIFO_EN = 0x40
+USER_CTRL_FIFO_RESET = 0x04
+SMBUS_BLOCK_MAX = 32  # Largest SMBus block transfer
+
+# FIFO_EN bits and the big-endian int16 channels each layout writes per sample, in FIFO order
+FIFO_LAYOUTS = {
+    'gyro_x': (0x40, ('gyro_x',)),
+    'accel_gyro_x': (0x08 | 0x40, ('accel_x', 'accel_y', 'accel_z', 'gyro_x')),
+}
+
+ACCEL_SCALES = {2: 16384.0, 4: 8192.0, 8: 4096.0, 16: 2048.0}  # LSB per g
+GYRO_SCALES = {250: 131.0, 500: 65.5, 1000: 32.8, 2000: 16.4}  # LSB per degree/s
+
+@dataclass(frozen=True)
+class MotionState:
+    timestamp: float  # time.monotonic() of the sample
+    angle: float  # High-pass filtered hinge rotation (degrees)
+    angular_velocity: float  # Offset-corrected gyro x (degrees per second)
+    door_state: str  # 'moving' or 'stationary'
 
 class DoorMotionMPU6050:
-    def __init__(self, i2c_address=0x68, angular_velocity_threshold=4, dt=0.2, timeout=20):
+    def __init__(self, i2c_address=0x68, angular_velocity_threshold=4, dt=0.2, drift_time_constant=10.0, timeout=20,
+                 sample_rate_hz=100, motion_hold=0.3, use_fifo=False, fifo_layout='gyro_x'):
         """
-        Initialise the DoorMotionSensor with given parameters.
+        Initialise the DoorMotionSensor with given parameters. The sensor's x axis must be parallel to the hinge.
         
         :param i2c_address: I2C address of the MPU6050 sensor.
         :param movement_threshold: Threshold for detecting door movement (degrees per second).
         :param dt: Time interval for reading sensor data (seconds).
+        :param drift_time_constant: Seconds over which the integrated angle decays back to 0, which
+            keeps gyro drift from accumulating (high-pass filter).
         :param timeout: Timeout for motion state tracking (seconds).
+        :param sample_rate_hz: Rate of the background sampling thread.
+        :param motion_hold: Seconds the background state stays 'moving' after the last fast sample.
+        :param use_fifo: Let the background sampler drain the on-chip FIFO instead of polling registers.
+        :param fifo_layout: Channels written to the FIFO, a key of FIFO_LAYOUTS. The default 'gyro_x' is
+            all the motion state uses, 2 bytes per sample; 'accel_gyro_x' also logs the accelerometer,
+            8 bytes per sample.
         """
         self.mpu6050 = mpu6050.mpu6050(i2c_address)  # I2C Interface: Address 0x68
+        self.i2c_address = i2c_address
+        self.bus = self.mpu6050.bus
         self.angular_velocity_threshold = angular_velocity_threshold  # Degrees per second
         self.dt = dt  # Time interval for reading sensor data
+        self.drift_time_constant = drift_time_constant
         self.timeout = timeout  # Timeout for motion state tracking
+        self.sample_rate_hz = sample_rate_hz
+        self.motion_hold = motion_hold
+        self.use_fifo = use_fifo
+        self.fifo_layout = fifo_layout
+
+        # Full-scale ranges are read once so samples can be converted without extra transactions
+        self.accel_scale = ACCEL_SCALES[self.mpu6050.read_accel_range()] / mpu6050.mpu6050.GRAVITIY_MS2
+        self.gyro_scale = GYRO_SCALES[self.mpu6050.read_gyro_range()]
         
         # Variables to track door state, angle, and angular velocity
         self.door_state = "stationary"
@@ -23,24 +79,195 @@ class DoorMotionMPU6050:
         self.gyro_offset = 0.0  # Store the initial gyro offset
         
         # Initial calibration
-        _, gyro_data, _ = self.read_sensor_data()  # Read initial gyro data
-        self.initial_gyro_x = gyro_data['x']  # Store the initial gyro reading for offset
+        self.initial_gyro_x = self.calibrate()  # Gyro offset, read with the door at rest
         
         # Global Variables
         self.previous_door_motion = None  
 
+        # Background sampling. motion_state is replaced, never mutated, so readers need no lock.
+        self.motion_state = MotionState(time.monotonic(), self.angle, 0.0, self.door_state)
+        self.on_motion_state = None  # Optional callback(MotionState) for every sampled state, e.g. a history store
+        self.sampling = False
+        self.sampler_thread = None
+        self.last_motion_time = None
+
+    def calibrate(self, attempts=5, retry_delay=0.1):
+        """Return the gyro x reading at rest, retrying failed reads; 0.0 if every read fails."""
+        for _ in range(attempts):
+            _, gyro_data, _ = self.read_sensor_data()
+            if gyro_data is not None:
+                return gyro_data['x']
+            time.sleep(retry_delay)
+        print("MPU6050: calibration failed, using a gyro offset of 0")
+        return 0.0
+
     def read_sensor_data(self):
+        """Read accel (m/s^2), gyro (degrees/s) and temperature (C) in one 14-byte burst."""
         try:
-            accelerometer_data = self.mpu6050.get_accel_data()
-            gyroscope_data = self.mpu6050.get_gyro_data()
-            temperature = self.mpu6050.get_temp()
+            with metrics.span('mpu6050_read'):
+                block = self.bus.read_i2c_block_data(self.i2c_address, ACCEL_XOUT_H, 14)
+            accel_x, accel_y, accel_z, temp_raw, gyro_x, gyro_y, gyro_z = struct.unpack('>7h', bytes(block))
+
+            accelerometer_data = {'x': accel_x / self.accel_scale, 'y': accel_y / self.accel_scale,
+                                  'z': accel_z / self.accel_scale}
+            gyroscope_data = {'x': gyro_x / self.gyro_scale, 'y': gyro_y / self.gyro_scale,
+                              'z': gyro_z / self.gyro_scale}
+            temperature = temp_raw / 340.0 + 36.53
             return accelerometer_data, gyroscope_data, temperature
 
         except OSError as e:
             print(f"Error reading sensor data: {e}")
+            metrics.inc('sensor_errors_total', stage='mpu6050')
             return None, None, None 
+
+    def setup_fifo(self):
+        """Configure the sample rate and start writing the fifo_layout channels to the on-chip FIFO."""
+        fifo_enable_bits, _ = FIFO_LAYOUTS[self.fifo_layout]
+        self.bus.write_byte_data(self.i2c_address, CONFIG, 0x01)  # DLPF on: 1 kHz gyro output rate
+        self.bus.write_byte_data(self.i2c_address, SMPLRT_DIV, max(0, round(1000 / self.sample_rate_hz) - 1))
+        self.bus.write_byte_data(self.i2c_address, FIFO_EN, fifo_enable_bits)
+        self.reset_fifo()
+
+    def reset_fifo(self):
+        self.bus.write_byte_data(self.i2c_address, USER_CTRL, USER_CTRL_FIFO_RESET)
+        self.bus.write_byte_data(self.i2c_address, USER_CTRL, USER_CTRL_FIFO_EN)
+
+    def disable_fifo(self):
+        self.bus.write_byte_data(self.i2c_address, FIFO_EN, 0x00)
+        self.bus.write_byte_data(self.i2c_address, USER_CTRL, 0x00)
+
+    def read_fifo(self):
+        """
+        Drain whole samples from the FIFO and convert them in bulk.
+
+        :return: float32 array of shape (num_samples, num_channels) with accel in m/s^2 and gyro in
+            degrees/s, in the channel order of the FIFO layout. Empty after an overflow, which resets the FIFO.
+        """
+        _, channels = FIFO_LAYOUTS[self.fifo_layout]
+        sample_size = 2 * len(channels)
+
+        if self.bus.read_byte_data(self.i2c_address, INT_STATUS) & FIFO_OFLOW_INT:
+            print("MPU6050: FIFO overflow, resetting")
+            self.reset_fifo()
+            return np.empty((0, len(channels)), dtype=np.float32)
+
+        count_high, count_low = self.bus.read_i2c_block_data(self.i2c_address, FIFO_COUNT_H, 2)
+        available = ((count_high << 8) | count_low) // sample_size * sample_size
+
+        # Each transaction carries as many whole samples as fit in one SMBus block
+        chunk = SMBUS_BLOCK_MAX // sample_size * sample_size
+        data = bytearray()
+        while len(data) < available:
+            data += bytes(self.bus.read_i2c_block_data(self.i2c_address, FIFO_R_W, min(chunk, available - len(data))))
+
+        samples = np.frombuffer(data, dtype='>i2').reshape(-1, len(channels)).astype(np.float32)
+        scales = np.array([self.gyro_scale if name.startswith('gyro') else self.accel_scale
+                           for name in channels], dtype=np.float32)
+        return samples / scales
         
+    def start_sampling(self):
+        """Start the background sampling thread."""
+        if self.sampling:
+            return
+        self.sampling = True
+        self.sampler_thread = threading.Thread(target=self._sampling_loop, daemon=True)
+        self.sampler_thread.start()
+
+    def stop_sampling(self):
+        """Stop the background sampling thread."""
+        self.sampling = False
+        if self.sampler_thread is not None:
+            self.sampler_thread.join()
+            self.sampler_thread = None
+
+    def _sampling_loop(self):
+        if self.use_fifo:
+            self._fifo_sampling_loop()
+            return
+
+        interval = 1.0 / self.sample_rate_hz
+        previous_time = time.monotonic()
+        next_sample = previous_time
+        angle = self.motion_state.angle
+
+        while self.sampling:
+            accel_data, gyro_data, _ = self.read_sensor_data()
+            now = time.monotonic()
+            if accel_data is not None and gyro_data is not None:
+                self.set_motion_state(self.update_motion_state(gyro_data, now, now - previous_time, angle))
+                angle = self.motion_state.angle
+            previous_time = now
+
+            next_sample += interval
+            delay = next_sample - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_sample = time.monotonic()  # Fell behind; do not burst to catch up
+
+    def _fifo_sampling_loop(self):
+        """Drain the FIFO every few samples and fuse the batch, using the chip's sample clock for dt."""
+        _, channels = FIFO_LAYOUTS[self.fifo_layout]
+        gyro_column = channels.index('gyro_x')
+        sample_dt = 1.0 / self.sample_rate_hz
+        batch_interval = max(sample_dt, 0.02)
+        angle = self.motion_state.angle
+
+        self.setup_fifo()
+        try:
+            while self.sampling:
+                time.sleep(batch_interval)
+                try:
+                    samples = self.read_fifo()
+                except OSError as e:
+                    print(f"Error reading FIFO: {e}")
+                    continue
+                if not len(samples):
+                    continue
+
+                now = time.monotonic()
+                angular_velocity = samples[:, gyro_column] - self.initial_gyro_x
+
+                # The filter is recursive, so only the cheap per-sample update runs in Python
+                for velocity in angular_velocity.tolist():
+                    angle = self.integrate(angle, velocity, sample_dt)
+
+                peak = int(np.argmax(np.abs(angular_velocity)))
+                self.set_motion_state(self.fuse_motion(angular_velocity[peak], angle, now))
+        finally:
+            self.disable_fifo()
+
+    def set_motion_state(self, motion_state):
+        self.motion_state = motion_state
+        if self.on_motion_state is not None:
+            self.on_motion_state(motion_state)
+
+    def update_motion_state(self, gyro_data, now, dt, angle):
+        """Fuse one sample into a new MotionState."""
+        angular_velocity = gyro_data['x'] - self.initial_gyro_x
+        return self.fuse_motion(angular_velocity, self.integrate(angle, angular_velocity, dt), now)
+
+    def integrate(self, angle, angular_velocity, dt):
+        """Add one gyro sample to the hinge angle, leaking it towards 0 with drift_time_constant."""
+        decay = self.drift_time_constant / (self.drift_time_constant + dt)
+        return decay * (angle + angular_velocity * dt)
+
+    def fuse_motion(self, angular_velocity, angle, now):
+        """Build a MotionState, holding 'moving' for motion_hold seconds after the last fast sample."""
+        if abs(angular_velocity) > self.angular_velocity_threshold:
+            self.last_motion_time = now
+        moving = self.last_motion_time is not None and now - self.last_motion_time <= self.motion_hold
+        return MotionState(now, float(angle), float(angular_velocity), "moving" if moving else "stationary")
+
+    def get_motion_state(self):
+        """Return the latest MotionState from the background sampler."""
+        return self.motion_state
+
     def get_door_motion(self):
+        if self.sampling:
+            self.door_state = self.motion_state.door_state
+            return self.door_state
+
         try:
             accel_data, gyro_data, _ = self.read_sensor_data()
 
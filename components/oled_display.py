@@ -1,8 +1,9 @@
-import time
+import threading
 import busio
 from board import SCL, SDA
 from PIL import Image, ImageDraw, ImageFont
 import adafruit_ssd1306
+from runtime import metrics
 
 class OLEDDisplay:
     def __init__(self):
@@ -23,54 +24,107 @@ class OLEDDisplay:
         self.font_size = 13 
         self.font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", self.font_size)
 
+        # Render cache
+        self.text_heights = {}  # Text measured with textbbox, by string
+        self.last_lines = None  # Lines currently on the panel
+        self.last_frame = None  # Bytes of the image last pushed over I2C
+
+        # Display worker: update_display only stores the newest lines while the worker runs
+        self.pending_lines = None
+        self.condition = threading.Condition()
+        self.worker_thread = None
+        self.worker_running = False
+        self.skipped_writes = 0
+
     def clear_display(self):
         self.draw.rectangle((0, 0, self.width, self.height), outline=0, fill=0)
         self.disp.image(self.image)
         self.disp.show()
+        self.last_lines = None
+        self.last_frame = None
+
+    def start_worker(self):
+        """Render on a background thread so update_display never blocks on the I2C bus."""
+        if self.worker_running:
+            return
+        self.worker_running = True
+        self.worker_thread = threading.Thread(target=self._worker_loop, daemon=True)
+        self.worker_thread.start()
+
+    def stop_worker(self):
+        """Stop the worker after it has shown the newest requested lines."""
+        with self.condition:
+            self.worker_running = False
+            self.condition.notify()
+        if self.worker_thread is not None:
+            self.worker_thread.join()
+            self.worker_thread = None
+
+    def _worker_loop(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending_lines is not None or not self.worker_running)
+                lines, self.pending_lines = self.pending_lines, None
+                if lines is None:
+                    return  # Stopped with nothing left to show
+            try:
+                self.render(*lines)
+            except OSError as error:
+                print(f"OLED: Error updating display. {error}")
 
     def update_display(self, line1, line2, line3):
-        # Draw a black filled box to clear the image.
-        self.draw.rectangle((0, 0, self.width, self.height), outline=0, fill=0)
+        """Show three lines. With the worker running, only the newest request is kept and rendered."""
+        if self.worker_running:
+            with self.condition:
+                self.pending_lines = (line1, line2, line3)
+                self.condition.notify()
+            return
+        self.render(line1, line2, line3)
 
-        # Calculate text sizes
-        line1_bbox = self.draw.textbbox((0, 0), line1, font=self.font)
-        line2_bbox = self.draw.textbbox((0, 0), line2, font=self.font)
-        line3_bbox = self.draw.textbbox((0, 0), line3, font=self.font)
+    def text_height(self, text):
+        height = self.text_heights.get(text)
+        if height is None:
+            bbox = self.draw.textbbox((0, 0), text, font=self.font)
+            height = bbox[3] - bbox[1]
+            if len(self.text_heights) >= 256:
+                self.text_heights.clear()  # Keep the cache bounded when lines carry changing values
+            self.text_heights[text] = height
+        return height
 
-        line1_height = line1_bbox[3] - line1_bbox[1]
-        line2_height = line2_bbox[3] - line2_bbox[1]
-        line3_height = line3_bbox[3] - line3_bbox[1]
+    def render(self, line1, line2, line3):
+        """Draw the lines and push the frame, skipping the I2C write when nothing changed."""
+        lines = (line1, line2, line3)
+        if lines == self.last_lines:
+            self.skipped_writes += 1
+            return
+
+        # Draw a black filled box to clear the image.
+        self.draw.rectangle((0, 0, self.width, self.height), outline=0, fill=0)
 
         # y-coordinate to move lines 4 pixels up
         offset = -4
 
-        # Draw the first line
-        self.draw.text(
-            (0, (self.height // 6 - line1_height // 2) + offset),
-            line1,
-            font=self.font,
-            fill=255,
-        )
-
-        # Draw the second line
-        self.draw.text(
-            (0, (self.height // 2 - line2_height // 2) + offset),
-            line2,
-            font=self.font,
-            fill=255,
-        )
-
-        # Draw the third line
-        self.draw.text(
-            (0, (5 * self.height // 6 - line3_height // 2) + offset),
-            line3,
-            font=self.font,
-            fill=255,
-        )
-
-        # Display image
-        self.disp.image(self.image)
-        self.disp.show()
+        # Draw the lines centred on 1/6, 1/2 and 5/6 of the height
+        for line, centre in zip(lines, (self.height // 6, self.height // 2, 5 * self.height // 6)):
+            self.draw.text(
+                (0, (centre - self.text_height(line) // 2) + offset),
+                line,
+                font=self.font,
+                fill=255,
+            )
+
+        frame = self.image.tobytes()
+        if frame == self.last_frame:
+            self.last_lines = lines
+            self.skipped_writes += 1
+            return
+
+        # Display image; cache what was drawn only once the write has succeeded, so a failed one is retried
+        with metrics.span('oled_write'):
+            self.disp.image(self.image)
+            self.disp.show()
+        self.last_lines = lines
+        self.last_frame = frame
 
 if __name__ == "__main__":
     display = OLEDDisplay()
@@ -1,57 +1,95 @@
 import sys
-import time
-import board
-import adafruit_dht
-import paho.mqtt.client as mqtt
-
-# MQTT Broker Configuration
-mqtt_server = "192.168.1.39"
-mqtt_username = "hieu"
-mqtt_password = "hieu"
-mqtt_port = 1883
+import threading
+from components.dht11_sensor import DHT11Sensor, DHT11Pipeline
+from messaging.mqtt_hub import get_hub
+from messaging import payload_codec
+
 topic_temperature = "rpi/dht11/temperature"
 topic_humidity = "rpi/dht11/humidity"
 
-# DHT11 Sensor Setup
-sensor = adafruit_dht.DHT11(board.D14, use_pulseio=True)
-
-# MQTT Functions
-def on_connect(client, userdata, flags, rc):
-    if rc == 0:
-        print("Connected to MQTT Broker!")
-    else:
-        print("Failed to connect, return code %d\n", rc)
-
-# MQTT client setup
-client = mqtt.Client()
-client.username_pw_set(mqtt_username, mqtt_password)
-client.on_connect = on_connect 
-client.connect(mqtt_server, mqtt_port)  
-
-# Start client loop
-client.loop_start() 
-
 def dynamic_print(input):
     output_text = f"{input}    "
     sys.stdout.write("\r" + output_text) 
     sys.stdout.flush()
 
-def publish_sensor_data(temp, humidity):
-    client.publish(topic_temperature, temp)
-    client.publish(topic_humidity, humidity)
+class DHT11Sampler:
+    def __init__(self, hub=None, interval=2.0, content_type=payload_codec.CONTENT_TYPE_JSON, verbose=True,
+                 history=None, **pipeline_options):
+        """
+        Read the DHT11 and publish temperature and humidity through the shared MQTT hub when they
+        change (see DHT11Pipeline for the options).
+
+        :param hub: MQTTHub to publish on; the process-wide default hub if None.
+        :param content_type: CONTENT_TYPE_BINARY publishes on <topic>/bin.
+        :param history: Optional SensorHistory recording every good reading.
+        """
+        self.sensor = DHT11Sensor()
+        self.pipeline = DHT11Pipeline(self.sensor, interval=interval, **pipeline_options)
+        self.owns_hub = hub is None
+        self.hub = hub or get_hub()
+        self.content_type = content_type
+        self.verbose = verbose
+        self.history = history
+        self.last_recorded = None
+        self.publish_temperature = self.hub.publisher(payload_codec.topic_for(topic_temperature, content_type))
+        self.publish_humidity = self.hub.publisher(payload_codec.topic_for(topic_humidity, content_type))
+        self.running = False
+        self.thread = None
+        self.wake = threading.Event()  # Cuts the sleep between samples short on stop()
+
+    def publish_sensor_data(self, temp, humidity):
+        self.publish_temperature(payload_codec.encode_reading(temp, self.content_type))
+        self.publish_humidity(payload_codec.encode_reading(humidity, self.content_type))
+
+    def run(self):
+        self.running = True
+        self.wake.clear()
+        while self.running:
+            try:
+                self.step()
+            except Exception as error:
+                self.stop()
+                raise error
+
+            self.wake.wait(self.pipeline.next_delay)  # Backs off after read errors
+
+    def step(self):
+        """Take one sample and publish it if it changed enough."""
+        reading = self.pipeline.sample()
+        if reading is not None:
+            self.publish_sensor_data(reading.temperature, reading.humidity)
+        if self.history is not None:
+            cached, _ = self.pipeline.latest()
+            if cached is not None and cached is not self.last_recorded:
+                self.history.dht11.append(temperature=cached.temperature, humidity=cached.humidity)
+                self.last_recorded = cached
+        if self.verbose:
+            cached, age = self.pipeline.latest()
+            if cached is not None:
+                dynamic_print(f"\rTemp: {cached.temperature} C, Humidity: {cached.humidity} % ({age:.0f}s old) ")
+
+    def start(self):
+        """Run the sampler on a background thread, e.g. next to the door system in one process."""
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.wake.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()  # Its last reading reaches the history before the caller flushes it
+        self.sensor.release()
+        if self.owns_hub:
+            self.hub.release()
+            self.owns_hub = False
 
-while True:
+if __name__ == "__main__":
+    hub = get_hub()
+    sampler = DHT11Sampler(hub)
     try:
-        temperature_c = sensor.temperature
-        humidity = sensor.humidity
-        dynamic_print(f"\rTemp: {temperature_c} C, Humidity: {humidity} % ")
-        publish_sensor_data(temperature_c, humidity)
-    except RuntimeError:
-        continue  # Ignore errors
-    except Exception as error:
-        sensor.exit()  
-        client.loop_stop() 
-        client.disconnect()
-        raise error
-
-    time.sleep(2.0) 
+        sampler.run()
+    except KeyboardInterrupt:
+        print("Stopped by User")
+        sampler.stop()
+    finally:
+        hub.release()
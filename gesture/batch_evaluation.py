@@ -0,0 +1,225 @@
+"""
+Offline evaluation of a gesture .task model over labelled images and clips.
+
+The dataset has one subdirectory per expected gesture ('none' for no gesture), e.g.
+dataset/thumbs_up/001.jpg, dataset/thumbs_up/door_test.mp4 or dataset/none/empty_hall.rec.
+Images are scored in IMAGE mode, clips in VIDEO mode through the live GestureVoter.
+
+Usage (from the repository root):
+    python -m gesture.batch_evaluation dataset --model gesture/hand_gesture_model.task --workers 4 --sweep
+"""
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import cv2
+import numpy as np
+import mediapipe as mp
+from mediapipe.tasks import python
+from mediapipe.tasks.python import vision
+from gesture.gesture_recognition import HAND_GESTURE_LIST
+from gesture.gesture_voting import GestureVoter, frame_scores
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp'}
+CLIP_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv', '.rec'}
+NO_GESTURE = 'none'
+IMAGE_BATCH_SIZE = 32  # Images per pool task, so small files do not pay a round trip each
+
+# Per-worker state, set by init_worker
+image_recognizer = None
+video_recognizer = None
+video_timestamp_ms = 0  # VIDEO mode needs increasing timestamps across all clips of a worker
+
+def create_recognizer(model, running_mode, options):
+    base_options = python.BaseOptions(model_asset_path=os.path.abspath(model))
+    recognizer_options = vision.GestureRecognizerOptions(base_options=base_options, running_mode=running_mode,
+                                                         **options)
+    return vision.GestureRecognizer.create_from_options(recognizer_options)
+
+def init_worker(model, options):
+    global image_recognizer, video_recognizer
+    image_recognizer = create_recognizer(model, vision.RunningMode.IMAGE, options)
+    video_recognizer = create_recognizer(model, vision.RunningMode.VIDEO, options)
+
+def to_mp_image(frame):
+    return mp.Image(image_format=mp.ImageFormat.SRGB, data=cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+def read_clip(path, frame_step):
+    """Yield (frame, timestamp_ms relative to the clip start) for every frame_step-th frame."""
+    if path.endswith('.rec'):
+        from storage.recording import Recording, STREAM_FRAME
+        recording = Recording(path)
+        timestamps = recording.timestamps(STREAM_FRAME)
+        try:
+            for position in range(0, len(timestamps), frame_step):
+                yield recording.frame(position), int(timestamps[position] * 1000)
+        finally:
+            recording.close()
+        return
+
+    capture = cv2.VideoCapture(path)
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    index = 0
+    try:
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                return
+            if index % frame_step == 0:
+                yield frame, int(index * 1000 / fps)
+            index += 1
+    finally:
+        capture.release()
+
+def evaluate_images(items):
+    """Return (path, label, [frame scores], cpu seconds) for each labelled image."""
+    results = []
+    for path, label in items:
+        start = time.process_time()
+        frame = cv2.imread(path)
+        scores = [] if frame is None else [frame_scores(image_recognizer.recognize(to_mp_image(frame)))]
+        results.append((path, label, scores, time.process_time() - start))
+    return results
+
+def evaluate_clip(item, frame_step):
+    """Return [(path, label, [frame scores per frame], cpu seconds)] for one labelled clip."""
+    global video_timestamp_ms
+    path, label = item
+    start = time.process_time()
+    clip_start_ms = video_timestamp_ms + 1
+    scores = []
+    for frame, timestamp_ms in read_clip(path, frame_step):
+        video_timestamp_ms = max(clip_start_ms + timestamp_ms, video_timestamp_ms + 1)
+        scores.append(frame_scores(video_recognizer.recognize_for_video(to_mp_image(frame), video_timestamp_ms)))
+    return [(path, label, scores, time.process_time() - start)]
+
+def evaluate_task(task, frame_step):
+    kind, items = task
+    return evaluate_images(items) if kind == 'images' else evaluate_clip(items, frame_step)
+
+def is_image(path):
+    return os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS
+
+def find_samples(dataset):
+    """Return ([(image path, label)], [(clip path, label)]) from the per-label subdirectories."""
+    images, clips = [], []
+    for label in sorted(os.listdir(dataset)):
+        label_dir = os.path.join(dataset, label)
+        if not os.path.isdir(label_dir):
+            continue
+        for name in sorted(os.listdir(label_dir)):
+            if is_image(name):
+                images.append((os.path.join(label_dir, name), label))
+            elif os.path.splitext(name)[1].lower() in CLIP_EXTENSIONS:
+                clips.append((os.path.join(label_dir, name), label))
+    return images, clips
+
+def predict_image(scores, min_score):
+    if not scores or not scores[0]:
+        return NO_GESTURE
+    name, score = max(scores[0].items(), key=lambda item: item[1])
+    return name if score >= min_score else NO_GESTURE
+
+def predict_clip(scores, gestures, vote_window, vote_threshold, min_score):
+    voter = GestureVoter(gestures, window_size=vote_window, threshold=vote_threshold, min_score=min_score)
+    for frame_index, frame in enumerate(scores):
+        decision = voter.update(frame, frame_index)
+        if decision is not None:
+            return decision.hand_gesture_name
+    return NO_GESTURE
+
+def predict(result, args, gestures, min_score=None, vote_threshold=None):
+    path, _, scores, _ = result
+    min_score = args.min_score if min_score is None else min_score
+    if is_image(path):
+        return predict_image(scores, min_score)
+    return predict_clip(scores, gestures, args.vote_window,
+                        args.vote_threshold if vote_threshold is None else vote_threshold, min_score)
+
+def confusion_matrix(labels, predictions):
+    names = sorted(set(labels) | set(predictions))
+    position = {name: index for index, name in enumerate(names)}
+    matrix = np.zeros((len(names), len(names)), dtype=int)
+    for label, prediction in zip(labels, predictions):
+        matrix[position[label], position[prediction]] += 1
+    return names, matrix
+
+def print_report(labels, predictions):
+    names, matrix = confusion_matrix(labels, predictions)
+    print(f"{'gesture':<14}{'samples':>8}{'correct':>9}{'accuracy':>10}{'precision':>11}")
+    for index, name in enumerate(names):
+        samples = matrix[index].sum()
+        predicted = matrix[:, index].sum()
+        correct = matrix[index, index]
+        accuracy = f"{correct / samples:.3f}" if samples else "n/a"
+        precision = f"{correct / predicted:.3f}" if predicted else "n/a"
+        print(f"{name:<14}{samples:>8}{correct:>9}{accuracy:>10}{precision:>11}")
+    print(f"overall accuracy: {np.trace(matrix) / max(matrix.sum(), 1):.3f}")
+
+    width = max(len(name) for name in names) + 2
+    print("\nconfusion matrix (rows = expected, columns = predicted)")
+    print(' ' * width + ''.join(f"{name[:width - 1]:>{width}}" for name in names))
+    for index, name in enumerate(names):
+        print(f"{name:<{width}}" + ''.join(f"{count:>{width}}" for count in matrix[index]))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('dataset')
+    parser.add_argument('--model', default='gesture/hand_gesture_model.task')
+    parser.add_argument('--workers', default=os.cpu_count(), type=int)
+    parser.add_argument('--num-hands', default=1, type=int)
+    parser.add_argument('--min-detection-confidence', default=0.5, type=float)
+    parser.add_argument('--min-score', default=0.5, type=float, help='Per-frame score needed to count a gesture')
+    parser.add_argument('--vote-window', default=8, type=int)
+    parser.add_argument('--vote-threshold', default=3.0, type=float)
+    parser.add_argument('--frame-step', default=1, type=int, help='Evaluate every n-th clip frame')
+    parser.add_argument('--sweep', action='store_true', help='Also report accuracy over a range of thresholds')
+    args = parser.parse_args()
+
+    images, clips = find_samples(args.dataset)
+    if not images and not clips:
+        raise SystemExit(f"No labelled images or clips found under {args.dataset}")
+    tasks = [('images', images[start:start + IMAGE_BATCH_SIZE]) for start in range(0, len(images), IMAGE_BATCH_SIZE)]
+    tasks += [('clip', clip) for clip in clips]
+    print(f"{len(images)} images, {len(clips)} clips, {args.workers} workers")
+
+    options = {
+        'num_hands': args.num_hands,
+        'min_hand_detection_confidence': args.min_detection_confidence,
+    }
+    results = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker,
+                             initargs=(args.model, options)) as executor:
+        for task_results in executor.map(evaluate_task, tasks, [args.frame_step] * len(tasks)):
+            results.extend(task_results)
+    wall_time = time.perf_counter() - start
+
+    gestures = set(HAND_GESTURE_LIST) | {label for _, label, _, _ in results if label != NO_GESTURE}
+    labels = [label for _, label, _, _ in results]
+    predictions = [predict(result, args, gestures) for result in results]
+    print_report(labels, predictions)
+
+    frames = sum(len(scores) for _, _, scores, _ in results)
+    cpu_time = sum(cpu for _, _, _, cpu in results)
+    print(f"\n{frames} frames in {wall_time:.1f}s: {frames / wall_time:.1f} frames/s total, "
+          f"{frames / cpu_time if cpu_time else 0.0:.1f} frames/s per core")
+
+    if args.sweep:
+        image_results = [result for result in results if is_image(result[0])]
+        clip_results = [result for result in results if not is_image(result[0])]
+        if image_results:
+            print(f"\n{'min score':>10}{'image accuracy':>16}")
+            for min_score in np.arange(0.3, 0.95, 0.1):
+                accuracy = np.mean([predict(result, args, gestures, min_score=min_score) == result[1]
+                                    for result in image_results])
+                print(f"{min_score:>10.1f}{accuracy:>16.3f}")
+        if clip_results:
+            print(f"\n{'vote threshold':>15}{'clip accuracy':>15}")
+            for vote_threshold in np.arange(1.0, args.vote_window + 0.5, 1.0):
+                accuracy = np.mean([predict(result, args, gestures, vote_threshold=vote_threshold) == result[1]
+                                    for result in clip_results])
+                print(f"{vote_threshold:>15.1f}{accuracy:>15.3f}")
+
+if __name__ == '__main__':
+    main()
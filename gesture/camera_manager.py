@@ -0,0 +1,325 @@
+"""
+Gesture recognition for several cameras served by one shared pool of IMAGE mode recognizer workers.
+
+Each worker takes the newest frame of the camera that needs one most: cameras with a door event
+first, then the fewest frames in flight, then the one served longest ago.
+
+Usage:
+    manager = CameraManager('gesture/hand_gesture_model.task', {'front': 0, 'back': 2}).start()
+    manager.start_session('front')
+    result = manager.get_result('front')  # GestureResult, as from GestureRecognitionService
+"""
+import os
+import time
+import threading
+from collections import deque
+import cv2
+import numpy as np
+import mediapipe as mp
+from mediapipe.tasks import python
+from mediapipe.tasks.python import vision
+from gesture.frame_grabber import FrameGrabber
+from gesture.gesture_recognition import GestureResult, HAND_GESTURE_LIST
+from gesture.gesture_voting import GestureVoter, frame_scores
+from gesture.landmarks import landmarks_to_array
+from runtime import metrics
+
+FRAME_POLL_INTERVAL = 0.005  # Frame grabbers do not notify the manager, so waiting workers poll while frames are due
+
+class CameraFeed:
+    def __init__(self, name, camera_id, width: int = 640, height: int = 480,
+                 vote_window: int = 8, vote_threshold: float = 3.0, latency_window: int = 256):
+        """Capture, session and statistics state of one camera."""
+        self.name = name
+        self.camera_id = camera_id
+        self.width = width
+        self.height = height
+        self.cap = None
+        self.frame_grabber = None
+        self.capture_lock = threading.Lock()  # Serialises starting and stopping the frame grabber
+        self.voter = GestureVoter(HAND_GESTURE_LIST, window_size=vote_window, threshold=vote_threshold)
+
+        # Session state, guarded by the manager's condition
+        self.active = False  # A door event is waiting for a gesture
+        self.deadline = None
+        self.session_result = None
+        self.session_done = threading.Event()
+        self.session_done.set()
+        self.in_flight = 0
+        self.last_served = 0.0
+        self.last_voted_ms = 0
+
+        # Statistics
+        self.results = 0
+        self.latencies = deque(maxlen=latency_window)  # Capture to result, in ms
+        self.result_times = deque(maxlen=30)  # monotonic time of the latest results, for the FPS
+
+    def open_camera(self):
+        if self.cap is not None and self.cap.isOpened():
+            return self.cap
+        if callable(self.camera_id):
+            self.cap = self.camera_id()  # Factory for a capture-like source, e.g. simulation.video_camera
+        else:
+            self.cap = cv2.VideoCapture(self.camera_id)
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Keep V4L2 from queueing stale frames
+        return self.cap
+
+    def start_capture(self):
+        if self.frame_grabber is None:
+            self.frame_grabber = FrameGrabber(self.open_camera(), buffer_size=1)
+        self.frame_grabber.start()
+
+    def stop_capture(self):
+        if self.frame_grabber is not None:
+            self.frame_grabber.stop()
+
+    def release(self):
+        self.stop_capture()
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+    def fps(self):
+        if len(self.result_times) < 2:
+            return 0.0
+        elapsed = self.result_times[-1] - self.result_times[0]
+        return (len(self.result_times) - 1) / elapsed if elapsed > 0 else 0.0
+
+    def stats(self):
+        latencies = np.array(list(self.latencies)) if self.latencies else None
+        return {
+            'active': self.active,
+            'results': self.results,
+            'fps': round(self.fps(), 1),
+            'latency_ms_p50': round(float(np.percentile(latencies, 50)), 1) if latencies is not None else None,
+            'latency_ms_p95': round(float(np.percentile(latencies, 95)), 1) if latencies is not None else None,
+            'frames': self.frame_grabber.stats() if self.frame_grabber is not None else None,
+        }
+
+class CameraManager:
+    def __init__(self, model: str, cameras: dict, workers: int = None, num_hands: int = 1,
+                 min_hand_detection_confidence: float = 0.5, min_hand_presence_confidence: float = 0.5,
+                 width: int = 640, height: int = 480, timeout: int = 20, idle_fps: float = 0.0,
+                 vote_window: int = 8, vote_threshold: float = 3.0):
+        """
+        :param cameras: Camera name (e.g. the door it watches) -> camera id or capture factory.
+        :param workers: Recognizer worker threads; one per core if None.
+        :param timeout: Seconds a session waits for a gesture before returning "timeout".
+        :param idle_fps: Frames per second still recognised from cameras without a session, with
+            whatever the active cameras leave over; 0 stops capture between sessions.
+        """
+        self.model = model
+        self.workers = workers or os.cpu_count()
+        self.num_hands = num_hands
+        self.min_hand_detection_confidence = min_hand_detection_confidence
+        self.min_hand_presence_confidence = min_hand_presence_confidence
+        self.timeout = timeout
+        self.idle_fps = idle_fps
+        self.feeds = {name: CameraFeed(name, camera_id, width, height, vote_window, vote_threshold)
+                      for name, camera_id in cameras.items()}
+
+        self.condition = threading.Condition()
+        self.threads = []
+        self.running = False
+        self.ready = threading.Barrier(self.workers + 1)  # Workers and start() wait for every model load
+
+    def create_recognizer(self):
+        base_options = python.BaseOptions(model_asset_path=os.path.abspath(self.model))
+        options = vision.GestureRecognizerOptions(
+            base_options=base_options,
+            running_mode=vision.RunningMode.IMAGE,
+            num_hands=self.num_hands,
+            min_hand_detection_confidence=self.min_hand_detection_confidence,
+            min_hand_presence_confidence=self.min_hand_presence_confidence,
+        )
+        return vision.GestureRecognizer.create_from_options(options)
+
+    def start(self):
+        """Open the cameras and load one model per worker; returns once every worker is warm."""
+        if self.running:
+            return self
+        if not os.path.exists(os.path.abspath(self.model)):
+            raise FileNotFoundError(f"Model file not found at {os.path.abspath(self.model)}")
+        t0 = time.perf_counter()
+        for feed in self.feeds.values():
+            feed.open_camera()
+            if self.idle_fps:
+                feed.start_capture()
+        self.running = True
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f'gesture-worker-{index}', daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        try:
+            self.ready.wait()
+        except threading.BrokenBarrierError:
+            self.stop()
+            raise RuntimeError("A gesture worker failed to load the model")
+        print(f"Camera manager ready: {len(self.feeds)} cameras, {self.workers} workers "
+              f"in {(time.perf_counter() - t0) * 1000:.0f}ms")
+        return self
+
+    def start_session(self, name):
+        """Start looking for a gesture on camera name. Does nothing if a session is already running."""
+        feed = self.feeds[name]
+        with self.condition:
+            if feed.active:
+                return
+            feed.voter.reset()
+            feed.session_result = None
+            feed.session_done.clear()
+            feed.deadline = time.monotonic() + self.timeout
+            feed.last_voted_ms = 0
+            feed.active = True
+        with feed.capture_lock:
+            feed.start_capture()
+        with self.condition:
+            self.condition.notify_all()
+
+    def get_result(self, name, timeout: float = None) -> GestureResult:
+        """Wait for the session of camera name and return its result (None if still running)."""
+        feed = self.feeds[name]
+        if not feed.session_done.wait(timeout):
+            return None
+        return feed.session_result
+
+    def recognize(self, name) -> GestureResult:
+        """Run one session on camera name and block until it returns a result."""
+        self.start_session(name)
+        return self.get_result(name)
+
+    def finish_session(self, feed, result):
+        """End the session of feed; the caller holds the condition and then calls stop_idle_captures."""
+        if not feed.active:
+            return
+        feed.active = False
+        print(f"Camera {feed.name}: {result}")
+        feed.session_result = result
+        feed.session_done.set()
+
+    def stop_idle_captures(self):
+        """Stop capturing on cameras without a session; joins grabber threads, so never call it holding the condition."""
+        if self.idle_fps:
+            return
+        for feed in self.feeds.values():
+            if feed.active or feed.frame_grabber is None or not feed.frame_grabber.running:
+                continue
+            with feed.capture_lock:
+                if not feed.active:  # A new session may have started since the check above
+                    feed.stop_capture()
+
+    def next_job(self):
+        """
+        Return ((feed, frame, capture_time_ns), 0) for the camera that deserves the next frame, or
+        (None, seconds to wait) when there is none; the wait is None while no camera needs serving.
+        """
+        now = time.monotonic()
+        candidates = []
+        waits = []
+        for feed in self.feeds.values():
+            if feed.active and now > feed.deadline:
+                self.finish_session(feed, GestureResult("timeout", None))
+            capturing = feed.frame_grabber is not None and feed.frame_grabber.is_running()
+            if feed.active:
+                waits.append(feed.deadline - now)  # So the deadline fires even without frames
+                if not capturing:
+                    continue
+                rank = 0
+            elif self.idle_fps and capturing:
+                due = feed.last_served + 1.0 / self.idle_fps - now
+                if due > 0:
+                    waits.append(due)
+                    continue
+                rank = 1
+            else:
+                continue
+            candidates.append((rank, feed.in_flight, feed.last_served, feed))
+
+        for _, _, _, feed in sorted(candidates, key=lambda candidate: candidate[:3]):
+            frame, capture_time_ns = feed.frame_grabber.read(timeout=0)
+            if frame is not None:
+                feed.in_flight += 1
+                feed.last_served = now
+                return (feed, frame, capture_time_ns), 0
+        if candidates:
+            waits.append(FRAME_POLL_INTERVAL)
+        return None, max(0.0, min(waits)) if waits else None
+
+    def _worker(self):
+        try:
+            recognizer = self.create_recognizer()
+            recognizer.recognize(mp.Image(image_format=mp.ImageFormat.SRGB,
+                                          data=np.zeros((64, 64, 3), dtype=np.uint8)))  # Warm up
+        except Exception:
+            self.ready.abort()  # Fails start() instead of leaving it waiting
+            raise
+        try:
+            self.ready.wait()
+            while self.running:
+                with self.condition:
+                    job, wait = self.next_job()
+                    if job is None:
+                        self.condition.wait(wait)  # start_session and stop notify
+                self.stop_idle_captures()
+                if job is not None:
+                    self.run_job(recognizer, *job)
+        except threading.BrokenBarrierError:
+            pass  # Another worker failed to load the model
+        finally:
+            recognizer.close()
+
+    def run_job(self, recognizer, feed, frame, capture_time_ns):
+        """Recognise one frame; a failure is reported and the worker carries on."""
+        try:
+            rgb_image = cv2.cvtColor(cv2.flip(frame, 1), cv2.COLOR_BGR2RGB)
+            result = recognizer.recognize(mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_image))
+            self.handle_result(feed, result, capture_time_ns)
+        except Exception as error:
+            print(f"Camera {feed.name}: recognition failed: {error}")
+        finally:
+            with self.condition:
+                feed.in_flight -= 1
+
+    def handle_result(self, feed, result, capture_time_ns):
+        latency_ms = (time.time_ns() - capture_time_ns) / 1e6
+        timestamp_ms = capture_time_ns // 1_000_000
+        metrics.observe('stage_seconds', latency_ms / 1000, f'inference_{feed.name}')
+        with self.condition:
+            feed.results += 1
+            feed.latencies.append(latency_ms)
+            feed.result_times.append(time.monotonic())
+            # Workers can finish a camera's frames out of order; older frames do not vote
+            if not feed.active or timestamp_ms <= feed.last_voted_ms:
+                return
+            feed.last_voted_ms = timestamp_ms
+            decision = feed.voter.update(frame_scores(result), timestamp_ms)
+            if decision is None:
+                return
+
+            hand_landmarks = None
+            landmarks = landmarks_to_array(result.hand_landmarks)
+            for hand_index, hand_gestures in enumerate(result.gestures):
+                if any(category.category_name == decision.hand_gesture_name for category in hand_gestures):
+                    hand_landmarks = landmarks[hand_index]
+                    break
+            self.finish_session(feed, GestureResult(decision.hand_gesture_name, decision.score, hand_landmarks,
+                                                    decision.decision_frames, decision.decision_latency_ms))
+
+    def stats(self):
+        """Per-camera FPS, capture-to-result latency and frame counters."""
+        return {name: feed.stats() for name, feed in self.feeds.items()}
+
+    def stop(self):
+        """Stop the workers, end any sessions and release the cameras."""
+        with self.condition:
+            for feed in self.feeds.values():
+                self.finish_session(feed, GestureResult("timeout", None))
+            self.running = False
+            self.condition.notify_all()
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+        for feed in self.feeds.values():
+            feed.release()
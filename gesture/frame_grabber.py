@@ -0,0 +1,102 @@
+import time
+import threading
+from collections import deque
+import cv2
+
+class FrameGrabber:
+    def __init__(self, cap, buffer_size: int = 2):
+        """
+        Capture frames on a background thread and keep only the newest ones.
+
+        :param cap: An opened cv2.VideoCapture (or any object with read()/isOpened()).
+        :param buffer_size: Number of newest frames kept in the ring buffer.
+        """
+        self.cap = cap
+        self.frames = deque(maxlen=buffer_size)  # (frame, capture_time_ns)
+        self.condition = threading.Condition()
+        self.thread = None
+        self.running = False
+        self.failed = False  # Set when the camera stops returning frames
+        self.requested_resolution = None  # (width, height) applied by the capture thread before its next read
+
+        # Counters
+        self.captured = 0
+        self.dropped = 0
+        self.processed = 0
+
+    def start(self):
+        """Start the capture thread."""
+        if self.running:
+            return self
+        self.running = True
+        self.failed = False
+        self.thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop the capture thread. The camera itself is left open."""
+        self.running = False
+        with self.condition:
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self.dropped += len(self.frames)
+        self.frames.clear()
+
+    def set_resolution(self, width: int, height: int):
+        """Change the capture resolution from the capture thread, so it never races a read."""
+        self.requested_resolution = (width, height)
+
+    def is_running(self):
+        return self.running and not self.failed
+
+    def _capture_loop(self):
+        while self.running:
+            if self.requested_resolution is not None:
+                width, height = self.requested_resolution
+                self.requested_resolution = None
+                self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+                self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+
+            success, frame = self.cap.read()
+            if not success:
+                self.failed = True
+                with self.condition:
+                    self.condition.notify_all()
+                break
+
+            capture_time_ns = time.time_ns()
+            with self.condition:
+                if len(self.frames) == self.frames.maxlen:
+                    self.dropped += 1  # Oldest frame is pushed out unread
+                self.frames.append((frame, capture_time_ns))
+                self.captured += 1
+                self.condition.notify()
+
+    def read(self, timeout: float = 1.0):
+        """
+        Return the newest frame and its capture time, discarding older buffered frames.
+
+        :param timeout: Seconds to wait for a new frame.
+        :return: (frame, capture_time_ns), or (None, None) on timeout or camera failure.
+        """
+        with self.condition:
+            if not self.frames:
+                self.condition.wait_for(lambda: self.frames or not self.is_running(), timeout)
+            if not self.frames:
+                return None, None
+
+            frame, capture_time_ns = self.frames.pop()
+            self.dropped += len(self.frames)
+            self.frames.clear()
+            self.processed += 1
+            return frame, capture_time_ns
+
+    def stats(self):
+        return {
+            'captured': self.captured,
+            'dropped': self.dropped,
+            'processed': self.processed,
+        }
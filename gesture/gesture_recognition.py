@@ -1,33 +1,54 @@
-import sys
 import time
 import os
 import cv2
+import numpy as np
 import mediapipe as mp
 from mediapipe.tasks import python
 from mediapipe.tasks.python import vision
-from mediapipe.framework.formats import landmark_pb2
-from dataclasses import dataclass
-
-mp_hands = mp.solutions.hands
-mp_drawing = mp.solutions.drawing_utils
-mp_drawing_styles = mp.solutions.drawing_styles
+from dataclasses import dataclass, field
+from gesture.frame_grabber import FrameGrabber
+from gesture.gesture_voting import GestureVoter, frame_scores
+from gesture.landmarks import landmarks_to_array, bounding_boxes, to_pixels, draw_landmarks
+from gesture.roi import AdaptiveROI
+from gesture.motion_gate import MotionGate
+from gesture.result_mailbox import ResultMailbox
+from runtime import metrics
 
 import warnings
 warnings.filterwarnings("ignore", category=UserWarning)
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 
+HAND_GESTURE_LIST = ['thumbs_up', 'one', 'two', 'three', 'four']
+
 @dataclass
 class GestureResult:
     hand_gesture_name: str 
     score: float 
+    landmarks: np.ndarray = field(default=None, repr=False)  # (21, 3) normalised x, y, z of the hand
+    decision_frames: int = None  # Frames from first supporting frame to decision
+    decision_latency_ms: float = None  # Milliseconds from first supporting frame to decision
 
 class HandGestureRecognition:
     def __init__(self, model: str = 'hand_gesture_model.task', num_hands: int = 1,
                  min_hand_detection_confidence: float = 0.5,
                  min_hand_presence_confidence: float = 0.5, min_tracking_confidence: float = 0.5,
                  camera_id: int = 0, width: int = 640, height: int = 480,
-                 stop_on_gesture: bool = True, timeout: int = 20):
-        """Initialize the gesture recognition with given parameters."""
+                 stop_on_gesture: bool = True, timeout: int = 20, frame_buffer_size: int = 2,
+                 headless: bool = False, vote_window: int = 8, vote_threshold: float = 3.0,
+                 adaptive_roi: bool = False, roi_input_size: int = 256, search_width: int = 320,
+                 low_res_capture: bool = True, low_res_width: int = 320, low_res_height: int = 240,
+                 motion_gate: bool = False, motion_keep_alive: float = 1.0, result_max_age_ms: float = 500.0):
+        """Initialize the gesture recognition with given parameters.
+
+        :param adaptive_roi: Send a downscaled crop around the last hand instead of the full frame,
+            and the downscaled full frame while no hand is known (see AdaptiveROI).
+        :param low_res_capture: With adaptive_roi, drop the camera to low_res_width x low_res_height
+            while no hand is present.
+        :param motion_gate: Only submit frames that differ from the running background, plus one
+            every motion_keep_alive seconds and all frames shortly after a hand (see MotionGate).
+        :param result_max_age_ms: Results for frames captured longer ago than this are not voted with
+            (see ResultMailbox); raise it on slow hardware.
+        """
         self.model = model
         self.num_hands = num_hands
         self.min_hand_detection_confidence = min_hand_detection_confidence
@@ -38,14 +59,29 @@ class HandGestureRecognition:
         self.height = height
         self.stop_on_gesture = stop_on_gesture
         self.timeout = timeout  # Timeout for the gesture recognition
+        self.frame_buffer_size = frame_buffer_size  # Newest frames kept by the capture thread
+        self.headless = headless  # Skip overlay rendering and the preview window
+        self.voter = GestureVoter(HAND_GESTURE_LIST, window_size=vote_window, threshold=vote_threshold)
+        self.roi = AdaptiveROI(input_size=roi_input_size, search_width=search_width) if adaptive_roi else None
+        self.low_res_capture = low_res_capture
+        self.low_res_size = (low_res_width, low_res_height)
+        self.low_res_active = False  # Low capture resolution requested from the frame grabber
+        self.frame_size = (width, height)  # Width and height of the latest frame
+        self.motion_gate = MotionGate(keep_alive=motion_keep_alive) if motion_gate else None
 
         self.gesture_result = None
-        self.recognition_result_list = []
+        self.mailbox = ResultMailbox(max_age_ms=result_max_age_ms)  # Newest result from the callback thread
         self.recognition_frame = None
+        self.hand_landmarks = None  # (num_hands, 21, 3) array of the latest result
         self.stop_flag = False  # Flag to stop the main loop
         self.counter = 0
         self.FPS = 0
         self.start_time = time.time()
+        self.cap = None
+        self.frame_grabber = None
+        self.last_timestamp_ms = 0  # recognize_async needs strictly increasing timestamps
+        self.session_start_time = None
+        self.first_result_time = None  # Time of the first callback in the current session
         self.setup_model()
 
     def setup_model(self):
@@ -70,115 +106,253 @@ class HandGestureRecognition:
     def save_result(self, result: vision.GestureRecognizerResult,
                     unused_output_image: mp.Image, timestamp_ms: int):
         """Callback to save the recognition result."""
+        now = time.time()
         if self.counter % 10 == 0:
-            self.fps = 10 / (time.time() - self.start_time)
-            self.start_time = time.time()
+            self.FPS = 10 / (now - self.start_time)
+            self.start_time = now
+            metrics.set_gauge('gesture_fps', self.FPS)
 
-        self.recognition_result_list.append(result)
+        # Capture to result; timestamp_ms is the capture time (see next_timestamp_ms)
+        metrics.observe('stage_seconds', max(0.0, now - timestamp_ms / 1000), 'inference')
+        if self.first_result_time is None:
+            self.first_result_time = now
+        self.mailbox.post(result, timestamp_ms, now)
         self.counter += 1
 
-    def run(self):
-        """Continuously run inference on images acquired from the camera."""
-        start_time = time.time()  # Start time for timeout
-        cap = cv2.VideoCapture(self.camera_id)
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
-
-        while cap.isOpened() and not self.stop_flag:
-            if self.stop_on_gesture and (time.time() - start_time) > self.timeout:
-                print("Timeout reached, no gesture detected.")
-                self.gesture_result = GestureResult("timeout", None)
-                break
-
-            success, image = cap.read()
-            if not success:
-                sys.exit(
-                    'ERROR: Unable to read from webcam. Please verify your webcam settings.'
-                )
-
-            image = cv2.flip(image, 1)
-            rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_image)
-            self.recognizer.recognize_async(mp_image, time.time_ns() // 1_000_000)
-
-            fps_text = f'FPS = {self.FPS:.1f}'
-            timeout_text = f'Timeout: {self.timeout}s'
-            elaped_text = f'Elapsed: {time.time() - start_time:.1f}s'
-            cv2.putText(image, fps_text, (15, 50), cv2.FONT_HERSHEY_DUPLEX,
-                        1, (0, 0, 0), 1, cv2.LINE_AA)
-            cv2.putText(image, timeout_text, (15, 80), cv2.FONT_HERSHEY_DUPLEX,
-                        1, (0, 0, 0), 1, cv2.LINE_AA)
-            cv2.putText(image, elaped_text, (15, 110), cv2.FONT_HERSHEY_DUPLEX,
-                        1, (0, 0, 0), 1, cv2.LINE_AA)
-            
-
-            if self.recognition_result_list:
-                self.process_results(image)
-
-            if self.recognition_frame is not None:
-                cv2.imshow('gesture_recognition', self.recognition_frame)
-
-            if cv2.waitKey(1) == 27:
-                break
+    def open_camera(self):
+        """Open the camera if it is not already open."""
+        if self.cap is not None and self.cap.isOpened():
+            return self.cap
+        if callable(self.camera_id):
+            self.cap = self.camera_id()  # Factory for a capture-like source, e.g. simulation.video_camera
+        else:
+            self.cap = cv2.VideoCapture(self.camera_id)
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Keep V4L2 from queueing stale frames
+        return self.cap
+
+    def release_camera(self):
+        """Release the camera if it is open."""
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+    def reset_session(self):
+        """Clear the per-session state so the recognizer can be reused."""
+        self.gesture_result = None
+        self.mailbox.reset()
+        self.recognition_frame = None
+        self.hand_landmarks = None
+        self.voter.reset()
+        if self.roi is not None:
+            self.roi.reset()
+        if self.motion_gate is not None:
+            self.motion_gate.reset()
+        self.stop_flag = False
+        self.session_start_time = None
+        self.first_result_time = None
+
+    def warm_up(self, timeout: float = 5.0):
+        """Push a blank frame through the recognizer so the first real frame does not pay graph start-up."""
+        blank = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=blank)
+        self.first_result_time = None
+        self.recognizer.recognize_async(mp_image, self.next_timestamp_ms(time.time_ns()))
+
+        deadline = time.time() + timeout
+        while self.first_result_time is None and time.time() < deadline:
+            time.sleep(0.01)
+        warmed_up = self.first_result_time is not None
+        self.reset_session()
+        return warmed_up
 
+    def next_timestamp_ms(self, time_ns: int) -> int:
+        """Convert a capture time to a strictly increasing millisecond timestamp."""
+        timestamp_ms = max(time_ns // 1_000_000, self.last_timestamp_ms + 1)
+        self.last_timestamp_ms = timestamp_ms
+        return timestamp_ms
+
+    def close(self):
+        """Close the recognizer and release the camera."""
         self.recognizer.close()
-        cap.release()
-        cv2.destroyAllWindows()
+        self.release_camera()
+        if not self.headless:
+            cv2.destroyAllWindows()
+
+    def run(self, keep_alive: bool = False):
+        """Continuously run inference on images acquired from the camera.
+
+        Returns the decided GestureResult, or one named "timeout", "camera_error" or "cancelled"
+        (ESC in the preview). None only if stop_flag was set from outside without a decision.
+
+        :param keep_alive: Keep the model and camera open after the session so
+            the next call to run() starts warm.
+        """
+        self.reset_session()
+        start_time = time.time()  # Start time for timeout
+        self.session_start_time = start_time
+        cpu_start = time.process_time()
+        cap = self.open_camera()
+        self.frame_grabber = FrameGrabber(cap, buffer_size=self.frame_buffer_size).start()
+
+        try:
+            while cap.isOpened() and not self.stop_flag:
+                if self.stop_on_gesture and (time.time() - start_time) > self.timeout:
+                    print("Timeout reached, no gesture detected.")
+                    self.gesture_result = GestureResult("timeout", None)
+                    break
+
+                image, capture_time_ns = self.frame_grabber.read()
+                if image is None:
+                    if self.frame_grabber.is_running():
+                        continue  # No new frame yet
+                    print('ERROR: Unable to read from webcam. Please verify your webcam settings.')
+                    self.gesture_result = GestureResult("camera_error", None)
+                    break
+
+                if self.frame_grabber.processed == 1:
+                    metrics.observe('stage_seconds', time.time() - start_time, 'first_frame')
+
+                image = cv2.flip(image, 1)
+                self.frame_size = image.shape[1], image.shape[0]
+                if self.motion_gate is None or self.motion_gate.should_process(image):
+                    timestamp_ms = self.next_timestamp_ms(capture_time_ns)
+                    input_image = self.roi.prepare(image, timestamp_ms) if self.roi is not None else image
+                    rgb_image = cv2.cvtColor(input_image, cv2.COLOR_BGR2RGB)
+                    mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_image)
+                    self.mailbox.submit(timestamp_ms, None if self.headless else image)  # Before the callback can post
+                    self.recognizer.recognize_async(mp_image, timestamp_ms)
+                else:
+                    metrics.inc('gesture_frames_skipped_total')
+                if self.roi is not None and self.low_res_capture:
+                    self.update_capture_resolution()
+
+                if self.headless:
+                    delivery = self.mailbox.take()
+                    if delivery is not None:
+                        self.process_results(delivery)
+                    continue
+
+                self.draw_status(image, start_time)
+
+                delivery = self.mailbox.take()
+                if delivery is not None:
+                    self.process_results(delivery, image)
+
+                if self.recognition_frame is not None:
+                    cv2.imshow('gesture_recognition', self.recognition_frame)
+
+                if cv2.waitKey(1) == 27:
+                    self.gesture_result = GestureResult("cancelled", None)
+                    break
+
+            if self.gesture_result is None and not cap.isOpened():
+                print('ERROR: Camera is not open.')
+                self.gesture_result = GestureResult("camera_error", None)
+        finally:
+            self.frame_grabber.stop()
+            print(f"Frames: {self.frame_grabber.stats()}")
+            print(f"Results: {self.mailbox.stats()}")
+            if self.roi is not None:
+                print(f"ROI: {self.roi.stats()}")
+            if self.motion_gate is not None:
+                print(f"Motion gate: {self.motion_gate.stats(time.process_time() - cpu_start)}")
+            if not keep_alive:
+                self.close()
+            elif not self.headless:
+                cv2.destroyAllWindows()
         return self.gesture_result
 
-    def process_results(self, current_frame):
-        """Process the recognition results and draw landmarks and text."""
-        hand_gesture_list = ['thumbs_up', 'one', 'two', 'three', 'four']
+    def update_capture_resolution(self):
+        """Drop to the low capture resolution while no hand is present, and back up once one is."""
+        low_resolution = self.roi.low_resolution()
+        if low_resolution != self.low_res_active:
+            self.low_res_active = low_resolution
+            width, height = self.low_res_size if low_resolution else (self.width, self.height)
+            self.frame_grabber.set_resolution(width, height)
 
-        for hand_index, hand_landmarks in enumerate(self.recognition_result_list[0].hand_landmarks):
-            x_min = min([landmark.x for landmark in hand_landmarks])
-            y_min = min([landmark.y for landmark in hand_landmarks])
-            y_max = max([landmark.y for landmark in hand_landmarks])
+    def roi_landmarks(self, result, timestamp_ms):
+        """Map a result's landmarks from its crop to the full frame and move the ROI to follow them."""
+        landmarks = self.roi.to_frame(landmarks_to_array(result.hand_landmarks), timestamp_ms)
+        self.roi.update(landmarks, *self.frame_size)
+        return landmarks
 
-            frame_height, frame_width = current_frame.shape[:2]
-            x_min_px = int(x_min * frame_width)
-            y_min_px = int(y_min * frame_height)
-            y_max_px = int(y_max * frame_height)    
+    def draw_status(self, image, start_time):
+        """Draw the FPS, timeout and elapsed time text on the frame."""
+        fps_text = f'FPS = {self.FPS:.1f}'
+        timeout_text = f'Timeout: {self.timeout}s'
+        elaped_text = f'Elapsed: {time.time() - start_time:.1f}s'
+        cv2.putText(image, fps_text, (15, 50), cv2.FONT_HERSHEY_DUPLEX,
+                    1, (0, 0, 0), 1, cv2.LINE_AA)
+        cv2.putText(image, timeout_text, (15, 80), cv2.FONT_HERSHEY_DUPLEX,
+                    1, (0, 0, 0), 1, cv2.LINE_AA)
+        cv2.putText(image, elaped_text, (15, 110), cv2.FONT_HERSHEY_DUPLEX,
+                    1, (0, 0, 0), 1, cv2.LINE_AA)
+
+    def process_results(self, delivery, current_frame=None):
+        """Vote with a (result, timestamp_ms, frame) delivery from the mailbox and, unless headless,
+        draw its landmarks and text on the frame it was computed from (current_frame if not kept)."""
+        result, timestamp_ms, result_frame = delivery
+        if self.motion_gate is not None and result.hand_landmarks:
+            self.motion_gate.hand_seen()
+        if self.roi is not None:
+            landmarks = self.roi_landmarks(result, timestamp_ms)
+        else:
+            landmarks = landmarks_to_array(result.hand_landmarks)
+        self.hand_landmarks = landmarks
 
-            if self.recognition_result_list[0].gestures:
-                gesture = self.recognition_result_list[0].gestures[hand_index]
+        decision = self.voter.update(frame_scores(result), timestamp_ms)
+        if decision is not None and self.stop_on_gesture:
+            hand_landmarks = None
+            for hand_index, hand_gestures in enumerate(result.gestures):
+                if any(category.category_name == decision.hand_gesture_name for category in hand_gestures):
+                    hand_landmarks = landmarks[hand_index]
+                    break
+            self.stop_flag = True  # Set the flag to stop the main loop
+            self.gesture_result = GestureResult(
+                decision.hand_gesture_name, decision.score, hand_landmarks,
+                decision.decision_frames, decision.decision_latency_ms)
+            print(f'Decision: {decision}')
+            return
+
+        if self.headless:
+            return
+        if result_frame is not None:
+            current_frame = result_frame
+
+        for hand_index in range(len(landmarks)):
+            result_text = None
+            if result.gestures:
+                gesture = result.gestures[hand_index]
                 hand_gesture_name = gesture[0].category_name
                 score = round(gesture[0].score, 2)
                 result_text = f'{hand_gesture_name} ({score})'
                 print(f'{hand_gesture_name}({score})')
+            self.draw_hand(current_frame, landmarks[hand_index:hand_index + 1], result_text)
 
-                if self.stop_on_gesture and hand_gesture_name in hand_gesture_list:
-                    self.stop_flag = True  # Set the flag to stop the main loop
-                    self.gesture_result = GestureResult(hand_gesture_name, score)
-                    break
+        self.recognition_frame = current_frame
 
-                text_size = cv2.getTextSize(result_text, cv2.FONT_HERSHEY_DUPLEX, 1, 2)[0]
-                text_width, text_height = text_size
-                text_x = x_min_px
-                text_y = y_min_px - 10
-
-                if text_y < 0:
-                    text_y = y_max_px + text_height
-
-                cv2.putText(current_frame, result_text, (text_x, text_y),
-                            cv2.FONT_HERSHEY_DUPLEX, 1,
-                            (255, 255, 255), 2, cv2.LINE_AA)
-
-            hand_landmarks_proto = landmark_pb2.NormalizedLandmarkList()
-            hand_landmarks_proto.landmark.extend([
-                landmark_pb2.NormalizedLandmark(x=landmark.x, y=landmark.y, z=landmark.z)
-                for landmark in hand_landmarks
-            ])
-            mp_drawing.draw_landmarks(
-                current_frame,
-                hand_landmarks_proto,
-                mp_hands.HAND_CONNECTIONS,
-                mp_drawing_styles.get_default_hand_landmarks_style(),
-                mp_drawing_styles.get_default_hand_connections_style()
-            )
+    def draw_hand(self, current_frame, landmarks, result_text):
+        """Draw the gesture text and landmarks of one hand, given as a (1, 21, 3) array."""
+        if result_text is not None:
+            frame_height, frame_width = current_frame.shape[:2]
+            box_px = to_pixels(bounding_boxes(landmarks)[0].reshape(2, 2), frame_width, frame_height)
+            (x_min_px, y_min_px), (_, y_max_px) = box_px
 
-        self.recognition_frame = current_frame
-        self.recognition_result_list.clear()
+            text_size = cv2.getTextSize(result_text, cv2.FONT_HERSHEY_DUPLEX, 1, 2)[0]
+            text_width, text_height = text_size
+            text_x = int(x_min_px)
+            text_y = int(y_min_px) - 10
+
+            if text_y < 0:
+                text_y = int(y_max_px) + text_height
+
+            cv2.putText(current_frame, result_text, (text_x, text_y),
+                        cv2.FONT_HERSHEY_DUPLEX, 1,
+                        (255, 255, 255), 2, cv2.LINE_AA)
+
+        draw_landmarks(current_frame, landmarks)
 
 if __name__ == '__main__':
     gesture_recognition = HandGestureRecognition(stop_on_gesture=False)
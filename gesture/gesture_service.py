@@ -0,0 +1,140 @@
+import time
+import threading
+from typing import TYPE_CHECKING
+from runtime import metrics
+
+if TYPE_CHECKING:
+    from gesture.gesture_recognition import GestureResult  # Imported lazily at runtime, see _load
+
+class GestureRecognitionService:
+    def __init__(self, model: str = 'hand_gesture_model.task', keep_camera_open: bool = True,
+                 **recognizer_options):
+        """
+        Long-lived gesture recognizer that loads the model once and serves sessions.
+
+        :param model: Path to the gesture recognizer .task model.
+        :param keep_camera_open: Keep the camera open between sessions to skip the camera open cost.
+        :param recognizer_options: Extra keyword arguments passed to HandGestureRecognition.
+            Sessions run on a worker thread, where cv2.imshow cannot, so headless is always set.
+        """
+        self.model = model
+        self.keep_camera_open = keep_camera_open
+        self.recognizer_options = dict(recognizer_options, headless=True)
+
+        self.recognizer = None
+        self.session_thread = None
+        self.session_result = None
+        self.lock = threading.Lock()
+        self.load_lock = threading.Lock()  # start() may run in a preload thread and a session at once
+
+        # Timings in seconds; cold path is filled by start(), warm path by each session
+        self.cold_timings = {}
+        self.warm_timings = {}
+
+    def start(self):
+        """Load the model, open the camera and warm the recognizer up (cold path)."""
+        with self.load_lock:
+            if self.recognizer is None:
+                self._load()
+
+    def _load(self):
+        t0 = time.perf_counter()
+        # Deferred so importing this module does not load cv2 and mediapipe
+        from gesture.gesture_recognition import HandGestureRecognition
+        recognizer = HandGestureRecognition(model=self.model, stop_on_gesture=True, **self.recognizer_options)
+        t1 = time.perf_counter()
+        if self.keep_camera_open:
+            recognizer.open_camera()
+        t2 = time.perf_counter()
+        warmed_up = recognizer.warm_up()
+        t3 = time.perf_counter()
+        self.recognizer = recognizer
+
+        self.cold_timings = {
+            'model_load': t1 - t0,
+            'camera_open': t2 - t1,
+            'warm_up': t3 - t2,
+            'total': t3 - t0,
+        }
+        for stage in ('model_load', 'camera_open', 'warm_up'):
+            metrics.observe('stage_seconds', self.cold_timings[stage], stage)
+        if not warmed_up:
+            print("Gesture service: warm-up inference timed out")
+        print(f"Gesture service ready: {self.format_timings(self.cold_timings)}")
+
+    def start_session(self):
+        """Start a gesture session in the background. Does nothing if one is already running."""
+        with self.lock:
+            if self.session_thread is not None and self.session_thread.is_alive():
+                return
+            if self.recognizer is None:
+                self.start()
+            self.session_result = None
+            self.session_thread = threading.Thread(target=self._run_session, daemon=True)
+            self.session_thread.start()
+
+    def get_result(self, timeout: float = None) -> 'GestureResult':
+        """Wait for the current session to finish and return its result (None if still running)."""
+        thread = self.session_thread
+        if thread is not None:
+            thread.join(timeout)
+            if thread.is_alive():
+                return None
+        return self.session_result
+
+    def recognize(self) -> 'GestureResult':
+        """Run one session and block until it returns a result."""
+        self.start_session()
+        return self.get_result()
+
+    def _run_session(self):
+        recognizer = self.recognizer
+        t0, cpu0 = time.perf_counter(), time.thread_time()
+        try:
+            result = recognizer.run(keep_alive=True)
+        except Exception as error:
+            from gesture.gesture_recognition import GestureResult  # Already loaded by start()
+            print(f"Gesture session failed: {error}")
+            result = GestureResult("error", None)
+        t1, cpu1 = time.perf_counter(), time.thread_time()
+        if not self.keep_camera_open:
+            recognizer.release_camera()
+
+        first_result = None
+        if recognizer.first_result_time is not None:
+            first_result = recognizer.first_result_time - recognizer.session_start_time
+        self.warm_timings = {
+            'first_result': first_result,
+            'session': t1 - t0,
+            'session_cpu': cpu1 - cpu0,  # This thread only; inference runs on mediapipe's threads
+        }
+        metrics.observe('stage_seconds', t1 - t0, 'gesture_session')
+        if first_result is not None:
+            metrics.observe('stage_seconds', first_result, 'first_result')
+        self.session_result = result
+        print(f"Gesture session: {self.format_timings(self.warm_timings)}")
+
+    def stop(self):
+        """Close the recognizer and release the camera."""
+        if self.session_thread is not None:
+            self.recognizer.stop_flag = True
+            self.session_thread.join()
+        if self.recognizer is not None:
+            self.recognizer.close()
+            self.recognizer = None
+
+    @staticmethod
+    def format_timings(timings):
+        return ", ".join(
+            f"{name}={value * 1000:.0f}ms" if value is not None else f"{name}=n/a"
+            for name, value in timings.items()
+        )
+
+if __name__ == '__main__':
+    service = GestureRecognitionService(timeout=10)
+    service.start()
+    try:
+        for _ in range(2):
+            print("Result:", service.recognize())
+    finally:
+        service.stop()
@@ -0,0 +1,77 @@
+from collections import deque
+from dataclasses import dataclass
+
+@dataclass
+class GestureDecision:
+    hand_gesture_name: str
+    score: float  # Mean score of the frames in the window that voted for the gesture
+    evidence: float  # Accumulated score in the window when the decision was made
+    decision_frames: int  # Frames from the first supporting frame to the decision
+    decision_latency_ms: float  # Milliseconds from the first supporting frame to the decision
+
+class GestureVoter:
+    def __init__(self, gestures, window_size: int = 8, threshold: float = 3.0, min_score: float = 0.5):
+        """
+        Accumulate per-frame gesture scores over a sliding window and decide once the evidence is strong enough.
+
+        :param gestures: Gesture names that can trigger a decision.
+        :param window_size: Number of most recent frames that vote.
+        :param threshold: Summed score within the window needed to decide on a gesture.
+        :param min_score: Per-frame scores below this do not count as a vote.
+        """
+        self.gestures = set(gestures)
+        self.window_size = window_size
+        self.threshold = threshold
+        self.min_score = min_score
+        self.window = deque(maxlen=window_size)  # (frame_index, timestamp_ms, {gesture: score})
+        self.evidence = {}  # Running per-gesture sum over the window
+        self.frame_index = 0
+
+    def reset(self):
+        self.window.clear()
+        self.evidence.clear()
+        self.frame_index = 0
+
+    def update(self, frame_scores, timestamp_ms):
+        """
+        Add one frame's scores and return a GestureDecision if a gesture passed the threshold, else None.
+
+        :param frame_scores: Mapping of gesture name to score for this frame (empty if no hand).
+        :param timestamp_ms: Timestamp the frame was submitted with.
+        """
+        votes = {name: score for name, score in frame_scores.items()
+                 if name in self.gestures and score >= self.min_score}
+
+        if len(self.window) == self.window.maxlen:
+            _, _, expired = self.window[0]
+            for name, score in expired.items():
+                self.evidence[name] -= score
+        self.window.append((self.frame_index, timestamp_ms, votes))
+        self.frame_index += 1
+        for name, score in votes.items():
+            self.evidence[name] = self.evidence.get(name, 0.0) + score
+
+        if not votes:
+            return None
+        name, evidence = max(self.evidence.items(), key=lambda item: item[1])
+        if evidence < self.threshold:
+            return None
+
+        supporting = [(index, ts, frame[name]) for index, ts, frame in self.window if name in frame]
+        first_index, first_timestamp_ms, _ = supporting[0]
+        return GestureDecision(
+            hand_gesture_name=name,
+            score=round(sum(score for _, _, score in supporting) / len(supporting), 2),
+            evidence=round(evidence, 2),
+            decision_frames=self.frame_index - first_index,
+            decision_latency_ms=timestamp_ms - first_timestamp_ms,
+        )
+
+def frame_scores(result):
+    """Return the best score per gesture name across all hands of a GestureRecognizerResult."""
+    scores = {}
+    for hand_gestures in result.gestures:
+        for category in hand_gestures:
+            if category.score > scores.get(category.category_name, 0.0):
+                scores[category.category_name] = category.score
+    return scores
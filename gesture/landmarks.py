@@ -0,0 +1,64 @@
+import cv2
+import numpy as np
+
+NUM_LANDMARKS = 21
+
+# Same topology as mp.solutions.hands.HAND_CONNECTIONS, as an (M, 2) index array
+HAND_CONNECTIONS = np.array([
+    (0, 1), (1, 2), (2, 3), (3, 4),          # Thumb
+    (0, 5), (5, 6), (6, 7), (7, 8),          # Index finger
+    (5, 9), (9, 10), (10, 11), (11, 12),     # Middle finger
+    (9, 13), (13, 14), (14, 15), (15, 16),   # Ring finger
+    (13, 17), (0, 17), (17, 18), (18, 19), (19, 20),  # Pinky and palm
+], dtype=np.intp)
+
+WRIST = 0
+MIDDLE_FINGER_MCP = 9
+
+def landmarks_to_array(hand_landmarks) -> np.ndarray:
+    """
+    Convert MediaPipe hand landmarks to a (num_hands, 21, 3) float32 array of normalised x, y, z.
+
+    :param hand_landmarks: GestureRecognizerResult.hand_landmarks (one landmark list per hand).
+    """
+    if not hand_landmarks:
+        return np.empty((0, NUM_LANDMARKS, 3), dtype=np.float32)
+    return np.array(
+        [[(landmark.x, landmark.y, landmark.z) for landmark in hand] for hand in hand_landmarks],
+        dtype=np.float32,
+    )
+
+def bounding_boxes(landmarks: np.ndarray) -> np.ndarray:
+    """Return (num_hands, 4) boxes as x_min, y_min, x_max, y_max."""
+    xy = landmarks[..., :2]
+    return np.concatenate((xy.min(axis=1), xy.max(axis=1)), axis=1)
+
+def centroids(landmarks: np.ndarray) -> np.ndarray:
+    """Return the (num_hands, 3) mean landmark position of each hand."""
+    return landmarks.mean(axis=1)
+
+def hand_scale(landmarks: np.ndarray) -> np.ndarray:
+    """Return the (num_hands,) wrist to middle finger MCP distance, a size measure independent of pose."""
+    palm = landmarks[:, MIDDLE_FINGER_MCP, :2] - landmarks[:, WRIST, :2]
+    return np.linalg.norm(palm, axis=1)
+
+def normalise(landmarks: np.ndarray) -> np.ndarray:
+    """Return landmarks centred on the wrist and divided by hand scale, for use as classifier features."""
+    centred = landmarks - landmarks[:, WRIST:WRIST + 1, :]
+    scale = hand_scale(landmarks)
+    scale[scale == 0] = 1.0
+    return centred / scale[:, None, None]
+
+def to_pixels(points: np.ndarray, frame_width: int, frame_height: int) -> np.ndarray:
+    """Scale normalised x, y (last axis) to integer pixel coordinates."""
+    return (points[..., :2] * (frame_width, frame_height)).astype(np.int32)
+
+def draw_landmarks(frame, landmarks: np.ndarray, point_color=(0, 0, 255), line_color=(255, 255, 255)):
+    """Draw the connections and joints of every hand on the frame."""
+    frame_height, frame_width = frame.shape[:2]
+    points_px = to_pixels(landmarks, frame_width, frame_height)
+    for hand_points in points_px:
+        segments = hand_points[HAND_CONNECTIONS]  # (M, 2, 2)
+        cv2.polylines(frame, list(segments), False, line_color, 2, cv2.LINE_AA)
+        for x, y in hand_points:
+            cv2.circle(frame, (int(x), int(y)), 4, point_color, -1, cv2.LINE_AA)
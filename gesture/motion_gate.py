@@ -0,0 +1,84 @@
+import time
+import cv2
+import numpy as np
+
+class MotionGate:
+    def __init__(self, width: int = 64, pixel_threshold: int = 12, min_changed: float = 0.01,
+                 learning_rate: float = 0.05, keep_alive: float = 1.0, hold: float = 1.5):
+        """
+        Skip recognizer frames whose grayscale thumbnail matches the running background, except one
+        every keep_alive seconds and all frames for hold seconds after a hand.
+
+        :param pixel_threshold: Grey level difference counted as a changed pixel.
+        :param min_changed: Fraction of changed pixels needed to submit a frame.
+        :param learning_rate: Weight of each new frame in the background average.
+        """
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.min_changed = min_changed
+        self.learning_rate = learning_rate
+        self.keep_alive = keep_alive
+        self.hold = hold
+
+        self.background = None  # float32 thumbnail, None until the first frame
+        self.last_submitted = 0.0
+        self.open_until = 0.0
+
+        # Counters
+        self.submitted = 0
+        self.skipped = 0
+        self.gate_seconds = 0.0  # CPU spent deciding
+
+    def reset(self):
+        """Forget the background, e.g. when the camera was closed between sessions."""
+        self.background = None
+        self.last_submitted = 0.0
+        self.open_until = 0.0
+
+    def hand_seen(self, now=None):
+        """Keep the gate open for hold seconds after a result with a hand."""
+        self.open_until = (time.monotonic() if now is None else now) + self.hold
+
+    def should_process(self, frame, now=None) -> bool:
+        """Update the background with frame and return True if it should go to the recognizer."""
+        cpu_start = time.thread_time()
+        now = time.monotonic() if now is None else now
+
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        height = max(1, round(gray.shape[0] * self.width / gray.shape[1]))
+        small = cv2.resize(gray, (self.width, height), interpolation=cv2.INTER_AREA)
+
+        if self.background is None or self.background.shape != small.shape:
+            self.background = small.astype(np.float32)  # First frame, or the capture resolution changed
+            changed = 1.0
+        else:
+            difference = cv2.absdiff(small, cv2.convertScaleAbs(self.background))
+            changed = np.count_nonzero(difference > self.pixel_threshold) / difference.size
+            cv2.accumulateWeighted(small, self.background, self.learning_rate)
+
+        submit = (changed >= self.min_changed or now < self.open_until
+                  or now - self.last_submitted >= self.keep_alive)
+        if submit:
+            self.submitted += 1
+            self.last_submitted = now
+        else:
+            self.skipped += 1
+        self.gate_seconds += time.thread_time() - cpu_start
+        return submit
+
+    def stats(self, session_cpu_seconds: float = None):
+        """
+        Counters, plus an estimate of the CPU saved when given the CPU time of the session:
+        skipped frames times the mean cost of a submitted one.
+        """
+        frames = self.submitted + self.skipped
+        stats = {
+            'submitted': self.submitted,
+            'skipped': self.skipped,
+            'skipped_percent': round(100 * self.skipped / frames, 1) if frames else 0.0,
+            'gate_ms_per_frame': round(1000 * self.gate_seconds / frames, 3) if frames else 0.0,
+        }
+        if session_cpu_seconds is not None and self.submitted:
+            per_inference = max(0.0, session_cpu_seconds - self.gate_seconds) / self.submitted
+            stats['cpu_saved_seconds'] = round(self.skipped * per_inference - self.gate_seconds, 2)
+        return stats
@@ -0,0 +1,92 @@
+import time
+import threading
+from collections import deque
+import numpy as np
+
+class ResultMailbox:
+    def __init__(self, max_age_ms: float = 500.0, keep_frames: int = 4, latency_window: int = 256):
+        """
+        Single-slot handoff of the newest LIVE_STREAM result from MediaPipe's callback thread to the main loop.
+
+        :param max_age_ms: Results whose frame is older than this when taken are late and dropped,
+            as are results older than one already taken.
+        :param keep_frames: Submitted frames kept so a result can be drawn on the frame it was
+            computed from (see submit).
+        :param latency_window: Inference latencies kept for the percentiles in stats().
+        """
+        self.max_age_ms = max_age_ms
+        self.slot = deque(maxlen=1)  # (result, timestamp_ms)
+        self.frames = deque(maxlen=keep_frames)  # (timestamp_ms, frame) of recent submissions
+        self.latencies = deque(maxlen=latency_window)  # Callback time minus timestamp_ms, in ms
+        self.lock = threading.Lock()
+
+        self.reset()
+
+    def reset(self):
+        """Forget pending results, frames and counters, e.g. at the start of a session."""
+        with self.lock:
+            self.slot.clear()
+            self.frames.clear()
+            self.latencies.clear()
+            self.last_taken_ms = 0
+
+            self.submitted = 0
+            self.posted = 0
+            self.taken = 0
+            self.late = 0
+
+    def submit(self, timestamp_ms: int, frame=None):
+        """Note a frame sent to the recognizer; pass the frame to get it back with its result."""
+        with self.lock:
+            self.submitted += 1
+            if frame is not None:
+                self.frames.append((timestamp_ms, frame))
+
+    def post(self, result, timestamp_ms: int, now: float = None):
+        """Callback side: store result as the newest, replacing one that was not taken yet."""
+        now = time.time() if now is None else now
+        with self.lock:
+            self.latencies.append(max(0.0, now * 1000 - timestamp_ms))
+            self.posted += 1
+            self.slot.append((result, timestamp_ms))
+
+    def pending(self) -> bool:
+        with self.lock:
+            return bool(self.slot)
+
+    def take(self, now: float = None):
+        """
+        Main loop side: return (result, timestamp_ms, frame) of the newest result, or None if
+        there is none or it is late. frame is the submitted frame, or None if it was not kept.
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            if not self.slot:
+                return None
+            result, timestamp_ms = self.slot.pop()
+            if timestamp_ms <= self.last_taken_ms or now * 1000 - timestamp_ms > self.max_age_ms:
+                self.late += 1
+                return None
+            self.taken += 1
+            self.last_taken_ms = timestamp_ms
+
+            frame = None
+            for frame_timestamp_ms, submitted_frame in self.frames:
+                if frame_timestamp_ms == timestamp_ms:
+                    frame = submitted_frame
+                    break
+        return result, timestamp_ms, frame
+
+    def stats(self):
+        with self.lock:
+            latencies = np.array(self.latencies) if self.latencies else None
+            return {
+                'submitted': self.submitted,
+                'results': self.posted,
+                'taken': self.taken,
+                'dropped': self.posted - self.taken - self.late - len(self.slot),  # Replaced before being taken
+                'late': self.late,
+                'unanswered': self.submitted - self.posted,  # Frames MediaPipe skipped or still running
+                'inference_ms_p50': round(float(np.percentile(latencies, 50)), 1) if latencies is not None else None,
+                'inference_ms_p95': round(float(np.percentile(latencies, 95)), 1) if latencies is not None else None,
+            }
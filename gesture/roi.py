@@ -0,0 +1,113 @@
+from collections import OrderedDict
+import cv2
+import numpy as np
+from gesture.landmarks import bounding_boxes
+
+class AdaptiveROI:
+    def __init__(self, input_size: int = 256, search_width: int = 320, margin: float = 0.6,
+                 min_size: float = 0.3, lost_after: int = 5, idle_after: int = 15):
+        """
+        Choose the part of each frame sent to the recognizer: the full frame downscaled to
+        search_width while searching, else a square crop around the last hand of at most input_size.
+
+        :param margin: Box size added on every side of the hand, as a fraction of the box size.
+        :param min_size: Smallest crop, as a fraction of the frame height.
+        :param lost_after: Results without a hand before going back to the full frame.
+        :param idle_after: Results without a hand before low_resolution() asks for a smaller capture.
+        """
+        self.input_size = input_size
+        self.search_width = search_width
+        self.margin = margin
+        self.min_size = min_size
+        self.lost_after = lost_after
+        self.idle_after = idle_after
+
+        self.rect = None  # Normalised x_min, y_min, x_max, y_max of the crop, None while searching
+        self.misses = 0  # Consecutive results without a hand
+        self.rects = OrderedDict()  # timestamp_ms -> rect used, until its result arrives
+
+        # Counters
+        self.cropped_frames = 0
+        self.search_frames = 0
+        self.input_pixels = 0
+
+    def reset(self):
+        self.rect = None
+        self.misses = 0
+        self.rects.clear()
+
+    def prepare(self, frame, timestamp_ms):
+        """Return the (cropped, downscaled) image to recognise and remember its rect for timestamp_ms."""
+        frame_height, frame_width = frame.shape[:2]
+        rect = self.rect
+        if rect is None:
+            self.search_frames += 1
+            scale = min(1.0, self.search_width / frame_width)
+            image = frame
+        else:
+            self.cropped_frames += 1
+            x0, y0, x1, y1 = (np.array(rect) * (frame_width, frame_height, frame_width, frame_height)).astype(int)
+            image = frame[y0:y1, x0:x1]
+            scale = min(1.0, self.input_size / max(x1 - x0, y1 - y0))
+
+        if scale < 1.0:
+            image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        self.input_pixels += image.shape[0] * image.shape[1]
+
+        self.rects[timestamp_ms] = rect
+        while len(self.rects) > 64:  # Results for dropped timestamps never arrive
+            self.rects.popitem(last=False)
+        return np.ascontiguousarray(image)
+
+    def to_frame(self, landmarks: np.ndarray, timestamp_ms: int) -> np.ndarray:
+        """Map (num_hands, 21, 3) landmarks of the image sent at timestamp_ms to full-frame coordinates."""
+        rect = self.rects.pop(timestamp_ms, None)
+        if rect is None or not len(landmarks):
+            return landmarks
+        x0, y0, x1, y1 = rect
+        mapped = landmarks.copy()
+        mapped[..., 0] = x0 + landmarks[..., 0] * (x1 - x0)
+        mapped[..., 1] = y0 + landmarks[..., 1] * (y1 - y0)
+        mapped[..., 2] = landmarks[..., 2] * (x1 - x0)  # z shares the scale of x
+        return mapped
+
+    def update(self, landmarks: np.ndarray, frame_width: int, frame_height: int):
+        """Move the crop to follow the first hand of a full-frame result, or give it up once lost."""
+        if not len(landmarks):
+            self.misses += 1
+            if self.misses >= self.lost_after:
+                self.rect = None
+            return
+        self.misses = 0
+
+        box = bounding_boxes(landmarks[:1])[0]
+        if self.rect is not None and self.contains(self.rect, box):
+            return
+
+        # Square in pixels around the hand, so rotating the hand does not push it out of the crop
+        centre_x, centre_y = (box[0] + box[2]) / 2 * frame_width, (box[1] + box[3]) / 2 * frame_height
+        size = max((box[2] - box[0]) * frame_width, (box[3] - box[1]) * frame_height) * (1 + 2 * self.margin)
+        size = min(max(size, self.min_size * frame_height), frame_width, frame_height)
+        x0 = min(max(centre_x - size / 2, 0), frame_width - size)
+        y0 = min(max(centre_y - size / 2, 0), frame_height - size)
+        self.rect = (x0 / frame_width, y0 / frame_height, (x0 + size) / frame_width, (y0 + size) / frame_height)
+
+    def contains(self, rect, box):
+        """True if box is inside rect with a quarter of the margin to spare."""
+        x0, y0, x1, y1 = rect
+        inset_x = (x1 - x0) * self.margin / (1 + 2 * self.margin) / 4
+        inset_y = (y1 - y0) * self.margin / (1 + 2 * self.margin) / 4
+        return (box[0] >= x0 + inset_x and box[1] >= y0 + inset_y and
+                box[2] <= x1 - inset_x and box[3] <= y1 - inset_y)
+
+    def low_resolution(self):
+        """True once no hand has been seen for idle_after results."""
+        return self.misses >= self.idle_after
+
+    def stats(self):
+        frames = self.cropped_frames + self.search_frames
+        return {
+            'cropped_frames': self.cropped_frames,
+            'search_frames': self.search_frames,
+            'mean_input_pixels': round(self.input_pixels / frames) if frames else None,
+        }
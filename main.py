@@ -1,13 +1,24 @@
+import sys
 import time
-import json
-import paho.mqtt.client as mqtt
+import threading
+from runtime import startup
+if __name__ == "__main__":
+    startup.track_imports()  # Before the other imports, so the startup report can time them
 from components.oled_display import OLEDDisplay
 from components.door_hcsr04 import DoorStateHCSR04
 from components.door_mpu6050 import DoorMotionMPU6050
-from gesture.gesture_recognition import HandGestureRecognition
+from gesture.gesture_service import GestureRecognitionService
+from runtime.scheduler import RateScheduler
+from messaging.mqtt_hub import get_hub
+from messaging import payload_codec
+from storage.ring_store import SensorHistory
+from runtime import metrics
 
 class SmartDoorSystem:
-    def __init__(self, mqtt_server, mqtt_port, mqtt_username, mqtt_password):
+    def __init__(self, mqtt_server=None, mqtt_port=None, mqtt_username=None, mqtt_password=None,
+                 door_rate_hz=20, door_idle_rate_hz=4, idle_after=60,
+                 content_type=payload_codec.CONTENT_TYPE_JSON, history_dir='history',
+                 gesture_service=None, recorder=None, preload_model=True):
         # MQTT Broker Configuration
         self.mqtt_server = mqtt_server
         self.mqtt_port = mqtt_port
@@ -15,38 +26,87 @@ class SmartDoorSystem:
         self.mqtt_password = mqtt_password
         self.topic_occupancy_status = "smart_door_system/occupancy_status"
         self.topic_hand_gesture = "rpi/door_hand_gesture"
+        self.content_type = content_type  # JSON, or the compact binary schema on <topic>/bin
         
         # Global Variables
         self.previous_door_state = None
         self.hand_gesture = None
         self.hand_score = None
+        self.door_motion = None  # Latest MPU6050 door motion, refreshed by the door_motion task
+        self.pending_event = None  # (door state, event start) of the event waiting for its gesture session
+        self.gesture_error = None  # Exception raised loading the gesture model; disables gesture sessions
+        self.model_ready = threading.Event()  # Set once the gesture model preload has finished, loaded or not
+        self.startup_reported = False
+        self.startup_report_lock = threading.Lock()
+
+        # On-device sensor history; None disables it
+        self.history = SensorHistory(history_dir) if history_dir is not None else None
+        self.recorder = recorder  # Optional storage.recording.Recorder for offline replay
+        self.samplers = []  # Other samplers writing to the history, e.g. DHT11Sampler; stopped before it is flushed
 
         # Initialise components
         self.display = OLEDDisplay()
+        self.display.start_worker()  # I2C writes happen off the main loop and the MQTT thread
         self.door_state_sensor = DoorStateHCSR04(trig_pin=23, echo_pin=24, threshold_distance=4)
-        self.door_motion_sensor = DoorMotionMPU6050(i2c_address=0x68, angular_velocity_threshold=3, dt=0.2, alpha=0.97, timeout=20)
+        self.door_motion_sensor = DoorMotionMPU6050(i2c_address=0x68, angular_velocity_threshold=3, dt=0.2, timeout=20,
+                                                    sample_rate_hz=100)
+        if self.history is not None:
+            self.door_motion_sensor.on_motion_state = self.record_motion
+        if self.recorder is not None:
+            self.door_motion_sensor.bus = self.recorder.wrap_bus(self.door_motion_sensor.bus)
+        self.door_motion_sensor.start_sampling()
         self.model_path = '/home/hieu/project/gesture/hand_gesture_model.task'
+        # Any object with the GestureRecognitionService interface, e.g. simulation.scripted_gesture
+        camera_id = self.recorder.camera(0) if self.recorder is not None else 0
+        self.gesture_service = gesture_service or GestureRecognitionService(model=self.model_path, headless=True,
+                                                                            camera_id=camera_id)
 
-        # Initialise MQTT client
-        self.client = mqtt.Client()
-        self.client.username_pw_set(mqtt_username, mqtt_password)
-        self.client.on_connect = self.on_connect 
-        self.client.on_message = self.on_message
-        self.client.connect(mqtt_server, mqtt_port)  
-        self.client.loop_start()
+        # Sensor sampling: fast right after a door event, backing off once the door has been idle.
+        # Gesture sessions run on the service's thread; gesture_result picks up their results.
+        self.scheduler = RateScheduler()
+        self.scheduler.add_task('door_motion', self.check_door_motion, active_rate_hz=door_rate_hz,
+                                idle_rate_hz=door_idle_rate_hz, idle_after=idle_after)
+        self.scheduler.add_task('door_state', self.check_door_state, active_rate_hz=door_rate_hz,
+                                idle_rate_hz=door_idle_rate_hz, idle_after=idle_after)
+        self.scheduler.add_task('gesture_result', self.check_gesture_result, active_rate_hz=door_rate_hz)
+
+        # Shared MQTT connection: publishes are spooled while offline, subscriptions renewed on reconnect
+        self.mqtt_hub = get_hub(mqtt_server, mqtt_port, mqtt_username, mqtt_password)
+        self.mqtt_hub.subscribe(self.topic_occupancy_status, self.on_message)
         self.display.update_display(f"Smart Door System", f"System Initialised", f"Running...")
+        startup.mark('system_initialised')
+
+        # Load the model and open the camera once; in the background so the sensors start straight away.
+        # Door events before then are skipped, so the model is never loaded on the scheduler thread.
+        if preload_model:
+            threading.Thread(target=self.preload_gesture_model, daemon=True).start()
+        else:
+            self.preload_gesture_model()
+
+    def preload_gesture_model(self):
+        try:
+            self.gesture_service.start()
+            startup.mark('model_ready')
+        except Exception as error:
+            self.gesture_error = error
+            print(f"Gesture model failed to load, gestures disabled: {error}")
+        finally:
+            self.model_ready.set()
+        if 'first_sensor_read' in startup.milestones:
+            self.report_startup()
 
-    def on_connect(self, client, userdata, flags, rc):
+    def report_startup(self):
         """
-        Callback function for MQTT connection.
+        Print the startup report once: when the model preload and the first sensor read are both done, or at shutdown.
         """
-        if rc == 0:
-            print("Connected to MQTT Broker!")
-            client.subscribe(self.topic_occupancy_status)
-        else:
-            print("Failed to connect, return code %d\n", rc)
+        with self.startup_report_lock:
+            if self.startup_reported:
+                return
+            self.startup_reported = True
+        startup.print_report()
+        startup.stop_tracking()
 
-    def on_message(self, client, userdata, msg):
+    def on_message(self, msg):
         """
         Callback function for receiving MQTT messages.
         """
@@ -58,13 +118,9 @@ class SmartDoorSystem:
         """
         Publish door event to the MQTT broker.
         """
-        payload = json.dumps({
-            "event_type": event_type,
-            "hand_gesture": hand_gesture,
-            "score": score,
-            "timestamp": time.time()  
-        })
-        self.client.publish(self.topic_hand_gesture, payload)
+        with metrics.span('mqtt_enqueue'):
+            payload = payload_codec.encode_gesture(event_type, hand_gesture, score, time.time(), self.content_type)
+            self.mqtt_hub.publish(payload_codec.topic_for(self.topic_hand_gesture, self.content_type), payload)
 
     def update_display(self):
         """
@@ -73,51 +129,140 @@ class SmartDoorSystem:
         str_score = str(self.hand_score)  # Ensure hand_score is converted to string
         self.display.update_display(f"Door: {self.previous_door_state}", f"Hand: {self.hand_gesture}", f"Score: {str_score}")
     
+    def check_door_motion(self):
+        """
+        Sample the door motion once.
+        """
+        with metrics.span('motion_check'):
+            self.door_motion = self.door_motion_sensor.get_door_motion()
+
     def handle_door_event(self, current_state):
         """
-        Handle door events including motion detection and face detection.
+        Start a gesture session for a door state change made while the door is moving.
         """
-        time.sleep(0.08)
-        door_motion = self.door_motion_sensor.get_door_motion()
-        if door_motion != 'moving':
+        if self.door_motion != 'moving':
             return # Return if door is not in motion
-        
-        hand_gesture = HandGestureRecognition(model=self.model_path, stop_on_gesture=True)
-        result = hand_gesture.run()
+        if self.pending_event is not None:
+            return # A session is still waiting for a gesture
+        if not self.model_ready.is_set():
+            print("Gesture model still loading, door event skipped")
+            return
+        if self.gesture_error is not None:
+            return # The model failed to load
+
+        metrics.inc('door_events_total')
+        self.gesture_service.start_session()
+        self.pending_event = (current_state, time.perf_counter())
+
+    def check_gesture_result(self):
+        """
+        Report the result of the running gesture session once it has finished.
+        """
+        if self.pending_event is None:
+            return
+        result = self.gesture_service.get_result(timeout=0)
+        if result is None:
+            return # Still running
+        current_state, event_start = self.pending_event
+        self.pending_event = None
+        self.report_gesture(current_state, result)
+        metrics.observe('stage_seconds', time.perf_counter() - event_start, 'door_event_to_publish')
+
+    def report_gesture(self, current_state, result):
+        """
+        Show and publish the gesture recognised for a door event.
+        """
         self.hand_gesture = result.hand_gesture_name
         self.hand_score = result.score
         self.previous_door_state = current_state
         print(f"Door: {current_state}")
         print(f'Result: {result.hand_gesture_name} ({result.score})')
+        if result.decision_frames is not None:
+            print(f'Decision latency: {result.decision_frames} frames, {result.decision_latency_ms} ms')
+        self.record_gesture(result)
         self.update_display()  # Update the display after handling the door event
         self.publish_hand_gesture(current_state,self.hand_gesture,self.hand_score)
         
-    def run(self):
+    def check_door_state(self):
         """
-        Main loop to continuously monitor door state and handle events.
+        Sample the door state once and handle a change.
         """
-        try:
-            while True:
-                door_state = self.door_state_sensor.get_door_state()
+        with metrics.span('door_sensing'):
+            door_state = self.door_state_sensor.get_door_state()
+        startup.mark('first_sensor_read')
+        if not self.startup_reported and self.model_ready.is_set():
+            self.report_startup()
+        self.record_distance()
+
+        if self.previous_door_state != door_state:
+            self.scheduler.notify_activity()
+            self.handle_door_event(door_state)
 
-                if self.previous_door_state != door_state:
-                    self.handle_door_event(door_state)
+        self.previous_door_state = door_state
 
-                self.previous_door_state = door_state
+    def record_distance(self):
+        if self.history is not None:
+            self.history.hcsr04.append(distance=self.door_state_sensor.last_distance)
+        if self.recorder is not None:
+            self.recorder.record_distance(self.door_state_sensor.last_distance)
 
+    def record_motion(self, motion_state):
+        self.history.mpu6050.append(angle=motion_state.angle, angular_velocity=motion_state.angular_velocity)
+
+    def record_gesture(self, result):
+        if self.history is not None:
+            names = payload_codec.GESTURE_NAMES
+            self.history.gesture.append(gesture=names.index(result.hand_gesture_name) if result.hand_gesture_name in names else 0,
+                                        score=result.score, decision_latency_ms=result.decision_latency_ms)
+
+    def run(self, paced=True):
+        """
+        Main loop to continuously monitor door state and handle events.
+
+        :param paced: False runs the scheduler tasks back to back instead of at their rates.
+        """
+        try:
+            self.scheduler.run(paced)
         except KeyboardInterrupt:
             print("Stopped by User")
         finally:
             self.system_shutdown()
 
     def system_shutdown(self):
+        self.report_startup()
+        print(f"Scheduler: {self.scheduler.stats()}")
+        print(f"MQTT: {self.mqtt_hub.stats()}")
+        self.mqtt_hub.release()
+        self.gesture_service.stop()
+        self.door_motion_sensor.stop_sampling()
+        for sampler in self.samplers:
+            sampler.stop()
+        if self.history is not None:
+            self.history.flush()
+        if self.recorder is not None:
+            self.recorder.close()
         self.door_state_sensor.release_gpio()
         self.display.update_display(f"Smart Door System",f"System Shutdown",f"GPIO Released")
+        self.display.stop_worker()
 
 if __name__ == "__main__":
-    smart_door_system = SmartDoorSystem(
-        mqtt_server="192.168.1.39", 
-        mqtt_port=1883, 
-        mqtt_username="hieu", 
-        mqtt_password="hieu")
-    smart_door_system.run()
\ No newline at end of file
+    # Broker settings come from MQTT_SERVER, MQTT_PORT, MQTT_USERNAME and MQTT_PASSWORD
+    if "--metrics" in sys.argv:
+        metrics.enable()
+        metrics.start_http_server()  # http://127.0.0.1:9108/metrics
+        metrics.start_textfile_writer()
+    recorder = None
+    if "--record" in sys.argv:
+        from storage.recording import Recorder  # Imports cv2
+        recorder = Recorder(time.strftime("recording_%Y%m%d_%H%M%S.rec"))  # Replay with python -m simulation.replay
+    smart_door_system = SmartDoorSystem(recorder=recorder)
+    dht11_hub = None
+    if "--with-dht11" in sys.argv:
+        from dht11 import DHT11Sampler
+        dht11_hub = get_hub()  # Same MQTT connection, counted so the door system's release() keeps it open
+        dht11_sampler = DHT11Sampler(dht11_hub, verbose=False, history=smart_door_system.history)
+        dht11_sampler.start()
+        smart_door_system.samplers.append(dht11_sampler)  # Stopped at shutdown, before the history flush
+    smart_door_system.run()
+    if dht11_hub is not None:
+        dht11_hub.release()
\ No newline at end of file
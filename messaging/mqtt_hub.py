@@ -0,0 +1,148 @@
+import os
+import sys
+import threading
+import paho.mqtt.client as mqtt
+from messaging.mqtt_outbox import MQTTOutbox
+
+# Broker settings; override with environment variables instead of editing the scripts
+MQTT_SERVER = os.environ.get('MQTT_SERVER', '192.168.1.39')
+MQTT_PORT = int(os.environ.get('MQTT_PORT', '1883'))
+MQTT_USERNAME = os.environ.get('MQTT_USERNAME', 'hieu')
+MQTT_PASSWORD = os.environ.get('MQTT_PASSWORD', 'hieu')
+
+hubs = {}  # (server, port, username) -> MQTTHub
+hubs_lock = threading.Lock()
+
+def default_client_id(server, port):
+    """Stable per-script client id, e.g. main_192.168.1.39_1883, so each process keeps its own spool."""
+    script = os.path.splitext(os.path.basename((sys.argv or [''])[0]))[0].lstrip('-') or 'python'
+    return f"{script}_{server}_{port}"
+
+def get_hub(server=None, port=None, username=None, password=None, qos=1, threaded=True, client_id=None):
+    """
+    Return the process-wide hub for a broker, connecting on first use. Call release() when done.
+
+    Every caller asking for the same broker and user shares one socket, network thread and outbox.
+    With threaded=False the first caller drives the network loop and outbox itself (see runtime.async_runtime).
+    """
+    server = server or MQTT_SERVER
+    port = port or MQTT_PORT
+    username = username or MQTT_USERNAME
+    password = password or MQTT_PASSWORD
+    key = (server, port, username)
+    with hubs_lock:
+        hub = hubs.get(key)
+        if hub is None:
+            hub = MQTTHub(server, port, username, password, qos=qos,
+                          client_id=client_id or default_client_id(server, port))
+            hub.key = key
+            hub.start(threaded)
+            hubs[key] = hub
+        hub.users += 1
+        return hub
+
+class MQTTHub:
+    def __init__(self, server, port, username, password, qos=1, spool_dir='.', client_id=''):
+        """
+        One MQTT connection shared by all publishers and subscribers in the process.
+
+        Publishes go through an MQTTOutbox so nothing is lost while the broker is down, and
+        subscriptions are remembered and renewed on every reconnect.
+        """
+        self.server = server
+        self.port = port
+        self.key = None  # Registry key when created by get_hub
+        self.threaded = True  # False when an event loop runs the network loop and outbox
+        self.users = 0
+
+        self.client = mqtt.Client(client_id=client_id)
+        self.client.username_pw_set(username, password)
+        self.client.on_connect = self.on_connect
+        self.client.on_disconnect = self.on_disconnect
+        self.client.reconnect_delay_set(min_delay=1, max_delay=30)
+
+        # One spool per client: processes must not append to and rewrite the same file
+        spool_path = os.path.join(spool_dir, f"mqtt_{client_id or f'{server}_{port}'}.spool")
+        self.outbox = MQTTOutbox(self.client, spool_path=spool_path, qos=qos)
+
+        self.subscriptions = {}  # topic -> (qos, [callbacks])
+        self.lock = threading.Lock()
+
+    def start(self, threaded=True):
+        self.client.connect_async(self.server, self.port)  # Start even if the broker is unreachable
+        self.threaded = threaded
+        if threaded:
+            self.client.loop_start()
+            self.outbox.start()
+
+    def on_connect(self, client, userdata, flags, rc):
+        if rc == 0:
+            print(f"Connected to MQTT Broker {self.server}:{self.port}!")
+            with self.lock:
+                topics = [(topic, qos) for topic, (qos, _) in self.subscriptions.items()]
+            if topics:
+                client.subscribe(topics)
+        else:
+            print(f"Failed to connect, return code {rc}")
+
+    def on_disconnect(self, client, userdata, rc):
+        if rc != 0:
+            print(f"Disconnected from MQTT Broker {self.server}:{self.port}, reconnecting")
+
+    def subscribe(self, topic, callback, qos=0):
+        """Call callback(msg) for every message on topic. Survives reconnects."""
+        with self.lock:
+            entry = self.subscriptions.get(topic)
+            if entry is None:
+                callbacks = []
+                self.subscriptions[topic] = (qos, callbacks)
+                self.client.message_callback_add(topic, self.dispatcher(topic))
+            else:
+                callbacks = entry[1]
+            callbacks.append(callback)
+        if entry is None and self.client.is_connected():
+            self.client.subscribe(topic, qos)
+
+    def dispatcher(self, topic):
+        def dispatch(client, userdata, msg):
+            with self.lock:
+                callbacks = list(self.subscriptions[topic][1])
+            for callback in callbacks:
+                try:
+                    callback(msg)
+                except Exception as error:
+                    print(f"MQTT: Error in callback for {msg.topic}: {error}")
+        return dispatch
+
+    def publish(self, topic, payload, qos=None, retain=False):
+        """Queue a message on the shared outbox."""
+        self.outbox.publish(topic, payload, qos, retain)
+
+    def publisher(self, topic, qos=None, retain=False):
+        """Return a function publishing its argument to topic."""
+        def publish(payload):
+            self.outbox.publish(topic, payload, qos, retain)
+        return publish
+
+    def release(self):
+        """Drop one user of the hub; the connection is closed when the last user releases it."""
+        with hubs_lock:
+            self.users -= 1
+            if self.users > 0:
+                return
+            hubs.pop(self.key, None)
+        self.stop()
+
+    def stop(self):
+        self.outbox.stop()
+        if self.threaded:
+            self.client.loop_stop()
+        self.client.disconnect()
+
+    def stats(self):
+        return {
+            'connected': self.client.is_connected(),
+            'users': self.users,
+            'subscriptions': len(self.subscriptions),
+            'outbox': self.outbox.stats(),
+        }
@@ -0,0 +1,258 @@
+import os
+import time
+import struct
+import threading
+from collections import deque
+import paho.mqtt.client as mqtt
+from runtime import metrics
+
+# Spool record: enqueue time, qos, retain, topic length, payload length, then topic and payload bytes
+RECORD_HEADER = struct.Struct('>dBBHI')
+
+class OutboxMessage:
+    __slots__ = ('topic', 'payload', 'qos', 'retain', 'enqueued')
+
+    def __init__(self, topic, payload, qos, retain, enqueued):
+        self.topic = topic
+        self.payload = payload
+        self.qos = qos
+        self.retain = retain
+        self.enqueued = enqueued
+
+    def encode(self):
+        topic = self.topic.encode()
+        return RECORD_HEADER.pack(self.enqueued, self.qos, self.retain, len(topic), len(self.payload)) + topic + self.payload
+
+def to_bytes(payload):
+    """Convert a payload the way paho does: str as UTF-8, numbers via str(), None as empty."""
+    if payload is None:
+        return b''
+    if isinstance(payload, (bytes, bytearray)):
+        return bytes(payload)
+    if isinstance(payload, str):
+        return payload.encode()
+    return str(payload).encode()
+
+def read_spool(path):
+    """Return the messages stored in a spool file, oldest first. A truncated last record is ignored."""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'rb') as spool_file:
+        data = spool_file.read()
+
+    messages = []
+    offset = 0
+    while offset + RECORD_HEADER.size <= len(data):
+        enqueued, qos, retain, topic_length, payload_length = RECORD_HEADER.unpack_from(data, offset)
+        offset += RECORD_HEADER.size
+        end = offset + topic_length + payload_length
+        if end > len(data):
+            break
+        topic = data[offset:offset + topic_length].decode()
+        payload = data[offset + topic_length:end]
+        messages.append(OutboxMessage(topic, payload, qos, bool(retain), enqueued))
+        offset = end
+    return messages
+
+class MQTTOutbox:
+    def __init__(self, client, spool_path='mqtt_outbox.spool', qos=1, batch_size=50, flush_interval=0.2,
+                 max_memory_messages=1000, max_spool_bytes=10 * 1024 * 1024, publish_timeout=5.0):
+        """
+        Queue MQTT messages, spill them to an append-only spool file while the broker is unreachable,
+        and publish them in order in batches once it is back.
+
+        :param client: A paho mqtt.Client; its network loop is run by the caller (loop_start()).
+        :param spool_path: Append log used while offline. Messages left in it are replayed at start.
+        :param qos: Default QoS for queued messages.
+        :param batch_size: Maximum messages published per flush.
+        :param flush_interval: Seconds between flushes when messages keep arriving.
+        :param max_memory_messages: Messages held in memory before they are spilled even when online.
+        :param max_spool_bytes: Spool size above which new offline messages are dropped.
+        :param publish_timeout: Seconds to wait for a QoS 1/2 batch to be acknowledged.
+        """
+        self.client = client
+        self.spool_path = spool_path
+        self.qos = qos
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_memory_messages = max_memory_messages
+        self.max_spool_bytes = max_spool_bytes
+        self.publish_timeout = publish_timeout
+
+        self.queue = deque()
+        self.condition = threading.Condition()
+        self.spool_count = len(read_spool(spool_path))  # Messages on disk from a previous run
+        self.thread = None
+        self.running = False
+
+        # Metrics
+        self.published = 0
+        self.spilled = 0
+        self.dropped = 0
+        self.unconfirmed = 0  # Accepted by paho without a broker ack within publish_timeout
+        self.last_flush_latency = None  # Seconds to publish (and, for QoS > 0, get acks for) a batch
+        self.max_flush_latency = 0.0
+        self.queue_delay_total = 0.0  # Sum of enqueue-to-publish delays
+
+    def publish(self, topic, payload, qos=None, retain=False):
+        """Queue a message. Never blocks on the network."""
+        message = OutboxMessage(topic, to_bytes(payload), self.qos if qos is None else qos, retain, time.time())
+        with self.condition:
+            self.queue.append(message)
+            self.condition.notify()
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the flush thread, flushing if online and spilling anything left so it survives a restart."""
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        if self.client.is_connected():
+            self.flush()
+        with self.condition:
+            remaining, self.queue = list(self.queue), deque()
+        self.spill(remaining)
+
+    def _flush_loop(self):
+        while self.running:
+            with self.condition:
+                self.condition.wait_for(lambda: self.queue or self.spool_count or not self.running,
+                                        timeout=self.flush_interval)
+            if not self.running:
+                break
+
+            self.flush_once()
+            time.sleep(self.flush_interval)  # Let further messages accumulate into the next batch
+
+    def flush_once(self):
+        """Publish what is pending if connected, otherwise spill it. For callers driving the outbox without its thread."""
+        if self.client.is_connected():
+            self.flush()
+        else:
+            self.spill_queue()
+
+    def spill_queue(self):
+        with self.condition:
+            messages, self.queue = list(self.queue), deque()
+        self.spill(messages)
+
+    def spill(self, messages):
+        """Append messages to the spool file."""
+        if not messages:
+            return
+        size = os.path.getsize(self.spool_path) if os.path.exists(self.spool_path) else 0
+        records = bytearray()
+        for message in messages:
+            record = message.encode()
+            if size + len(records) + len(record) > self.max_spool_bytes:
+                self.dropped += 1
+                continue
+            records += record
+            self.spool_count += 1
+            self.spilled += 1
+        with open(self.spool_path, 'ab') as spool_file:
+            spool_file.write(records)
+            spool_file.flush()
+            os.fsync(spool_file.fileno())
+
+    def flush(self):
+        """Publish the spool first, then queued messages, one batch at a time, keeping order."""
+        if self.spool_count:
+            messages = read_spool(self.spool_path)
+            sent = self.publish_batches(messages)
+            self.rewrite_spool(messages[sent:])
+            if sent < len(messages):
+                return  # Broker went away again; keep the in-memory queue behind the spool
+
+        while True:
+            with self.condition:
+                batch = [self.queue.popleft() for _ in range(min(self.batch_size, len(self.queue)))]
+            if not batch:
+                return
+            sent = self.publish_batches(batch)
+            if sent < len(batch):
+                with self.condition:
+                    self.queue.extendleft(reversed(batch[sent:]))
+                if len(self.queue) > self.max_memory_messages:
+                    self.spill_queue()
+                return
+
+    def publish_batches(self, messages):
+        """
+        Publish messages in batches and return how many paho accepted, in order.
+
+        A QoS > 0 message that paho takes while disconnected (MQTT_ERR_NO_CONN) is already stored
+        in its own outgoing queue and resent on reconnect, so it counts as accepted rather than
+        being kept here too. Only messages the broker confirmed count as published.
+        """
+        sent = 0
+        while sent < len(messages):
+            batch = messages[sent:sent + self.batch_size]
+            start = time.perf_counter()
+            infos = []
+            for message in batch:
+                info = self.client.publish(message.topic, message.payload, message.qos, message.retain)
+                if info.rc == mqtt.MQTT_ERR_SUCCESS or (message.qos and info.rc == mqtt.MQTT_ERR_NO_CONN):
+                    infos.append(info)
+                if info.rc != mqtt.MQTT_ERR_SUCCESS:
+                    break
+
+            if infos and infos[-1].rc == mqtt.MQTT_ERR_SUCCESS and any(message.qos for message in batch[:len(infos)]):
+                try:
+                    infos[-1].wait_for_publish(self.publish_timeout)
+                except (RuntimeError, ValueError):
+                    pass  # Disconnected while waiting; paho resends in-flight QoS > 0 messages
+
+            latency = time.perf_counter() - start
+            metrics.observe('stage_seconds', latency, 'mqtt_flush')
+            self.last_flush_latency = latency
+            self.max_flush_latency = max(self.max_flush_latency, latency)
+            now = time.time()
+            for message, info in zip(batch, infos):
+                if message.qos == 0 or (info.rc == mqtt.MQTT_ERR_SUCCESS and info.is_published()):  # QoS 0 has no ack
+                    self.published += 1
+                    self.queue_delay_total += now - message.enqueued
+                    metrics.observe('stage_seconds', now - message.enqueued, 'mqtt_delivery')
+                else:
+                    self.unconfirmed += 1  # Left to paho's resend; delivery is not seen here
+            sent += len(infos)
+            if len(infos) < len(batch) or infos[-1].rc != mqtt.MQTT_ERR_SUCCESS:
+                break
+        return sent
+
+    def rewrite_spool(self, messages):
+        """Replace the spool file with the messages that were not sent."""
+        if not messages:
+            if os.path.exists(self.spool_path):
+                os.remove(self.spool_path)
+            self.spool_count = 0
+            return
+        temp_path = self.spool_path + '.tmp'
+        with open(temp_path, 'wb') as spool_file:
+            spool_file.write(b''.join(message.encode() for message in messages))
+            spool_file.flush()
+            os.fsync(spool_file.fileno())
+        os.replace(temp_path, self.spool_path)
+        self.spool_count = len(messages)
+
+    def stats(self):
+        return {
+            'queue_depth': len(self.queue),
+            'spool_depth': self.spool_count,
+            'published': self.published,
+            'spilled': self.spilled,
+            'dropped': self.dropped,
+            'unconfirmed': self.unconfirmed,
+            'last_flush_latency_ms': round(1000 * self.last_flush_latency, 1) if self.last_flush_latency is not None else None,
+            'max_flush_latency_ms': round(1000 * self.max_flush_latency, 1),
+            'mean_queue_delay_ms': round(1000 * self.queue_delay_total / self.published, 1) if self.published else None,
+        }
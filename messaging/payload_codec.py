@@ -0,0 +1,126 @@
+"""
+Versioned payload encoding for the door and sensor topics.
+
+JSON stays the default so Node-RED flows keep working. Publishers that opt in to the compact
+binary format publish on the same topic plus BINARY_TOPIC_SUFFIX, and subscribers pick the decoder
+from the topic. A missing JSON reading is an empty payload, as published before the codec existed.
+
+Binary layout, all big-endian:
+    header  u8   high nibble schema version, low nibble message kind
+    gesture u8 event type, u8 gesture, u16 score * 10000 (0xFFFF = none), f64 timestamp
+            code 0xFF means the value is not in the table and follows as a u8 length-prefixed UTF-8 string
+    reading f32 value (NaN = none)
+"""
+import json
+import math
+import struct
+
+CONTENT_TYPE_JSON = 'application/json'
+CONTENT_TYPE_BINARY = 'application/x-smartdoor'
+BINARY_TOPIC_SUFFIX = '/bin'
+
+SCHEMA_VERSION = 1
+KIND_GESTURE = 1
+KIND_READING = 2
+
+# Append only: list positions are the codes on the wire
+EVENT_TYPES = [None, 'open', 'closed']
+GESTURE_NAMES = [None, 'none', 'thumbs_up', 'thumbs_down', 'one', 'two', 'three', 'four', 'five', 'timeout']
+NO_SCORE = 0xFFFF
+STRING_CODE = 0xFF
+
+GESTURE_STRUCT = struct.Struct('>BBBHd')
+READING_STRUCT = struct.Struct('>Bf')
+STRING_LENGTH = struct.Struct('>B')
+
+def topic_for(topic, content_type=CONTENT_TYPE_JSON):
+    """Return the topic a payload of this content type is published on."""
+    return topic + BINARY_TOPIC_SUFFIX if content_type == CONTENT_TYPE_BINARY else topic
+
+def parse_topic(topic):
+    """Split a received topic into (base topic, content type)."""
+    if topic.endswith(BINARY_TOPIC_SUFFIX):
+        return topic[:-len(BINARY_TOPIC_SUFFIX)], CONTENT_TYPE_BINARY
+    return topic, CONTENT_TYPE_JSON
+
+def header(kind):
+    return (SCHEMA_VERSION << 4) | kind
+
+def encode_gesture(event_type, hand_gesture, score, timestamp, content_type=CONTENT_TYPE_JSON):
+    """Encode a door hand gesture event."""
+    if content_type != CONTENT_TYPE_BINARY:
+        return json.dumps({
+            "event_type": event_type,
+            "hand_gesture": hand_gesture,
+            "score": score,
+            "timestamp": timestamp
+        })
+
+    event_code = EVENT_TYPES.index(event_type) if event_type in EVENT_TYPES else STRING_CODE
+    gesture_code = GESTURE_NAMES.index(hand_gesture) if hand_gesture in GESTURE_NAMES else STRING_CODE
+    score_code = NO_SCORE if score is None else min(int(round(score * 10000)), NO_SCORE - 1)
+    payload = GESTURE_STRUCT.pack(header(KIND_GESTURE), event_code, gesture_code, score_code, timestamp)
+
+    for code, value in ((event_code, event_type), (gesture_code, hand_gesture)):
+        if code == STRING_CODE:
+            text = str(value).encode()[:255]
+            payload += STRING_LENGTH.pack(len(text)) + text
+    return payload
+
+def encode_reading(value, content_type=CONTENT_TYPE_JSON):
+    """Encode a single sensor reading such as a DHT11 temperature."""
+    if content_type != CONTENT_TYPE_BINARY:
+        return '' if value is None else json.dumps(value)
+    return READING_STRUCT.pack(header(KIND_READING), math.nan if value is None else value)
+
+def decode(payload, content_type=CONTENT_TYPE_JSON):
+    """Decode a payload produced by encode_gesture or encode_reading. Raises ValueError if it is malformed."""
+    if content_type != CONTENT_TYPE_BINARY:
+        return json.loads(payload) if payload else None
+
+    if not payload:
+        raise ValueError("Empty binary payload")
+    try:
+        return decode_binary(payload)
+    except struct.error as error:
+        raise ValueError(f"Truncated binary payload: {error}") from error
+
+def check_consumed(payload, size):
+    if len(payload) != size:
+        raise ValueError(f"{len(payload) - size} unexpected bytes after the binary payload")
+
+def decode_binary(payload):
+    version, kind = payload[0] >> 4, payload[0] & 0x0F
+    if version != SCHEMA_VERSION:
+        raise ValueError(f"Unsupported payload schema version {version}")
+
+    if kind == KIND_READING:
+        _, value = READING_STRUCT.unpack_from(payload)
+        check_consumed(payload, READING_STRUCT.size)
+        return None if math.isnan(value) else round(value, 4)
+
+    if kind == KIND_GESTURE:
+        _, event_code, gesture_code, score_code, timestamp = GESTURE_STRUCT.unpack_from(payload)
+        offset = GESTURE_STRUCT.size
+        values = []
+        for code, table in ((event_code, EVENT_TYPES), (gesture_code, GESTURE_NAMES)):
+            if code == STRING_CODE:
+                (length,) = STRING_LENGTH.unpack_from(payload, offset)
+                offset += STRING_LENGTH.size
+                if offset + length > len(payload):
+                    raise ValueError(f"Truncated binary payload: string of {length} bytes at offset {offset}")
+                values.append(bytes(payload[offset:offset + length]).decode())
+                offset += length
+            elif code < len(table):
+                values.append(table[code])
+            else:
+                raise ValueError(f"Unknown code {code} in binary payload")
+        check_consumed(payload, offset)
+        return {
+            "event_type": values[0],
+            "hand_gesture": values[1],
+            "score": None if score_code == NO_SCORE else score_code / 10000,
+            "timestamp": timestamp
+        }
+
+    raise ValueError(f"Unknown payload kind {kind}")
@@ -0,0 +1,149 @@
+import sys
+import time
+from components.oled_display import OLEDDisplay
+from components.door_hcsr04 import DoorStateHCSR04
+from components.door_mpu6050 import DoorMotionMPU6050
+from runtime.scheduler import RateScheduler
+from messaging.mqtt_hub import get_hub
+from messaging import payload_codec
+from runtime import metrics
+
+# One HC-SR04, MPU6050 and camera per door. The second MPU6050 has AD0 pulled high (address 0x69).
+DOORS = [
+    {'name': 'front', 'trig_pin': 23, 'echo_pin': 24, 'mpu6050_address': 0x68, 'camera_id': 0},
+    {'name': 'back', 'trig_pin': 17, 'echo_pin': 27, 'mpu6050_address': 0x69, 'camera_id': 2},
+]
+
+class Door:
+    def __init__(self, name, trig_pin, echo_pin, mpu6050_address, camera_id):
+        """Sensors and state of one door."""
+        self.name = name
+        self.camera_id = camera_id
+        self.door_state_sensor = DoorStateHCSR04(trig_pin=trig_pin, echo_pin=echo_pin, threshold_distance=4)
+        self.door_motion_sensor = DoorMotionMPU6050(i2c_address=mpu6050_address, angular_velocity_threshold=3, dt=0.2,
+                                                    timeout=20, sample_rate_hz=100)
+        self.previous_door_state = None
+        self.event_state = None  # Door state of the event waiting for a gesture
+
+class MultiDoorSystem:
+    def __init__(self, doors=DOORS, model='/home/hieu/project/gesture/hand_gesture_model.task', workers=None,
+                 mqtt_server=None, mqtt_port=None, mqtt_username=None, mqtt_password=None,
+                 door_rate_hz=20, door_idle_rate_hz=4, idle_after=60,
+                 content_type=payload_codec.CONTENT_TYPE_JSON, camera_manager=None):
+        """
+        SmartDoorSystem for several doors sharing one display, MQTT connection and gesture worker pool.
+        Gestures are published on <topic_hand_gesture>/<door name>.
+
+        :param doors: Door configurations, as in DOORS.
+        :param workers: Gesture recognizer workers shared by all cameras; one per core if None.
+        :param camera_manager: Object with the gesture.camera_manager.CameraManager interface, e.g. for
+            simulation; built from the door cameras if None.
+        """
+        self.topic_occupancy_status = "smart_door_system/occupancy_status"
+        self.topic_hand_gesture = "rpi/door_hand_gesture"
+        self.content_type = content_type
+        self.occupancy_status = None
+
+        # Initialise components
+        self.display = OLEDDisplay()
+        self.display.start_worker()
+        self.doors = [Door(**config) for config in doors]
+        for door in self.doors:
+            door.door_motion_sensor.start_sampling()
+        if camera_manager is None:
+            from gesture.camera_manager import CameraManager  # Imports cv2 and mediapipe
+            camera_manager = CameraManager(model, {door.name: door.camera_id for door in self.doors}, workers=workers)
+        self.camera_manager = camera_manager
+        self.camera_manager.start()  # Load one model per worker and open the cameras
+
+        # One sampling task per door; any door event brings every door back to its active rate
+        self.scheduler = RateScheduler()
+        for door in self.doors:
+            self.scheduler.add_task(f'door_state_{door.name}', lambda door=door: self.check_door_state(door),
+                                    active_rate_hz=door_rate_hz, idle_rate_hz=door_idle_rate_hz, idle_after=idle_after)
+        self.scheduler.add_task('gesture_results', self.check_gesture_results, active_rate_hz=door_rate_hz)
+
+        self.mqtt_hub = get_hub(mqtt_server, mqtt_port, mqtt_username, mqtt_password)
+        self.mqtt_hub.subscribe(self.topic_occupancy_status, self.on_message)
+        self.display.update_display(f"Smart Door System", f"{len(self.doors)} doors", f"Running...")
+
+    def on_message(self, msg):
+        """
+        Callback function for receiving MQTT messages.
+        """
+        if msg.topic == self.topic_occupancy_status:
+            self.occupancy_status = msg.payload.decode()
+
+    def check_door_state(self, door):
+        """
+        Sample one door once and start a gesture session if it moved.
+        """
+        with metrics.span('door_sensing'):
+            door_state = door.door_state_sensor.get_door_state()
+
+        if door.previous_door_state != door_state:
+            self.scheduler.notify_activity()
+            with metrics.span('motion_check'):
+                door_motion = door.door_motion_sensor.get_door_motion()
+            if door_motion == 'moving' and door.event_state is None:
+                metrics.inc('door_events_total', stage=door.name)
+                door.event_state = door_state
+                self.camera_manager.start_session(door.name)
+
+        door.previous_door_state = door_state
+
+    def check_gesture_results(self):
+        """
+        Report the gesture of every door whose session has finished.
+        """
+        for door in self.doors:
+            if door.event_state is None:
+                continue
+            result = self.camera_manager.get_result(door.name, timeout=0)
+            if result is not None:
+                self.report_gesture(door, result)
+                door.event_state = None
+
+    def report_gesture(self, door, result):
+        """
+        Show and publish the gesture recognised for a door event.
+        """
+        print(f"Door {door.name}: {door.event_state}")
+        print(f'Result: {result.hand_gesture_name} ({result.score})')
+        self.display.update_display(f"{door.name}: {door.event_state}", f"Hand: {result.hand_gesture_name}",
+                                    f"Score: {result.score}")
+        with metrics.span('mqtt_enqueue'):
+            payload = payload_codec.encode_gesture(door.event_state, result.hand_gesture_name, result.score,
+                                                   time.time(), self.content_type)
+            topic = f"{self.topic_hand_gesture}/{door.name}"
+            self.mqtt_hub.publish(payload_codec.topic_for(topic, self.content_type), payload)
+
+    def run(self):
+        """
+        Main loop to continuously monitor every door and handle events.
+        """
+        try:
+            self.scheduler.run()
+        except KeyboardInterrupt:
+            print("Stopped by User")
+        finally:
+            self.system_shutdown()
+
+    def system_shutdown(self):
+        print(f"Scheduler: {self.scheduler.stats()}")
+        print(f"Cameras: {self.camera_manager.stats()}")
+        print(f"MQTT: {self.mqtt_hub.stats()}")
+        self.mqtt_hub.release()
+        self.camera_manager.stop()
+        for door in self.doors:
+            door.door_motion_sensor.stop_sampling()
+            door.door_state_sensor.release_gpio()
+        self.display.update_display(f"Smart Door System",f"System Shutdown",f"GPIO Released")
+        self.display.stop_worker()
+
+if __name__ == "__main__":
+    # Broker settings come from MQTT_SERVER, MQTT_PORT, MQTT_USERNAME and MQTT_PASSWORD
+    if "--metrics" in sys.argv:
+        metrics.enable()
+        metrics.start_http_server()  # http://127.0.0.1:9108/metrics
+    MultiDoorSystem().run()
@@ -0,0 +1,261 @@
+"""
+asyncio runtime for the smart door system: one event loop runs the sensors, display, MQTT and
+gesture sessions as tasks, with blocking calls in executors.
+
+Usage (from the repository root):
+    python -m runtime.async_runtime [--with-dht11]
+"""
+import sys
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import paho.mqtt.client as mqtt
+from messaging.mqtt_hub import get_hub
+
+class AsyncioMQTTHelper:
+    def __init__(self, loop, client):
+        """
+        Drive a paho client from an asyncio loop's reader/writer callbacks.
+
+        paho calls these hooks from whichever thread touches the client, so every loop call is
+        handed over with call_soon_threadsafe.
+        """
+        self.loop = loop
+        self.client = client
+        self.misc_task = None
+        client.on_socket_open = self.on_socket_open
+        client.on_socket_close = self.on_socket_close
+        client.on_socket_register_write = self.on_socket_register_write
+        client.on_socket_unregister_write = self.on_socket_unregister_write
+
+    def on_socket_open(self, client, userdata, sock):
+        def open_socket():
+            self.loop.add_reader(sock, client.loop_read)
+            self.misc_task = self.loop.create_task(self.misc_loop())
+        self.loop.call_soon_threadsafe(open_socket)
+
+    def on_socket_close(self, client, userdata, sock):
+        def close_socket():
+            self.loop.remove_reader(sock)
+            if self.misc_task is not None:
+                self.misc_task.cancel()
+        self.loop.call_soon_threadsafe(close_socket)
+
+    def on_socket_register_write(self, client, userdata, sock):
+        self.loop.call_soon_threadsafe(self.loop.add_writer, sock, client.loop_write)
+
+    def on_socket_unregister_write(self, client, userdata, sock):
+        self.loop.call_soon_threadsafe(self.loop.remove_writer, sock)
+
+    def detach(self):
+        """Stop driving the client from the loop. Call on the loop thread before the loop closes."""
+        self.client.on_socket_open = None
+        self.client.on_socket_close = None
+        self.client.on_socket_register_write = None
+        self.client.on_socket_unregister_write = None
+        sock = self.client.socket()
+        if sock is not None:
+            self.loop.remove_reader(sock)
+            self.loop.remove_writer(sock)
+        if self.misc_task is not None:
+            self.misc_task.cancel()
+
+    async def misc_loop(self):
+        """Keep-alive pings and retries, which paho's own network thread would otherwise do."""
+        while self.client.loop_misc() == mqtt.MQTT_ERR_SUCCESS:
+            await asyncio.sleep(1)
+
+class AsyncDisplay:
+    def __init__(self, loop, display):
+        """
+        Stand-in for OLEDDisplay whose update_display can be called from any thread.
+
+        Only the newest requested lines are kept; the display task renders them.
+        """
+        self.loop = loop
+        self.display = display
+        self.pending_lines = None
+        self.changed = asyncio.Event()
+
+    def update_display(self, line1, line2, line3):
+        self.loop.call_soon_threadsafe(self._request, (line1, line2, line3))
+
+    def _request(self, lines):
+        self.pending_lines = lines
+        self.changed.set()
+
+    def stop_worker(self):
+        pass  # The display task renders; there is no worker thread to stop
+
+class AsyncSmartDoorRuntime:
+    def __init__(self, door_system, dht11_sampler=None, door_rate_hz=20, motion_rate_hz=50,
+                 mqtt_flush_interval=0.2):
+        """
+        :param door_system: A SmartDoorSystem whose components and MQTT hub are reused.
+        :param dht11_sampler: Optional DHT11Sampler publishing on the same hub.
+        """
+        self.door_system = door_system
+        self.dht11_sampler = dht11_sampler
+        self.door_interval = 1.0 / door_rate_hz
+        self.motion_interval = 1.0 / motion_rate_hz
+        self.mqtt_flush_interval = mqtt_flush_interval
+
+        self.hardware_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='hardware')
+        self.gesture_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='gesture')
+        self.door_events = None  # asyncio.Queue holding the newest door state that needs a gesture session
+        self.display = None
+        self.mqtt_helper = None
+
+    async def in_hardware(self, function, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.hardware_executor, functools.partial(function, *args))
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        system = self.door_system
+        self.door_events = asyncio.Queue(maxsize=1)
+
+        # Take over the work the threaded components would otherwise do on their own threads
+        system.door_motion_sensor.stop_sampling()
+        system.display.stop_worker()
+        self.display = AsyncDisplay(loop, system.display)
+        system.display = self.display
+        system.update_display()
+
+        tasks = [
+            self.door_state_task(),
+            self.motion_task(),
+            self.display_task(),
+            self.mqtt_task(),
+            self.gesture_task(),
+        ]
+        if self.dht11_sampler is not None:
+            tasks.append(self.dht11_task())
+
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            system.display = self.display.display  # Shut down on the real display
+            await loop.run_in_executor(None, system.system_shutdown)
+            await self.stop_mqtt()
+            self.hardware_executor.shutdown(wait=False)
+            self.gesture_executor.shutdown(wait=False)
+
+    async def door_state_task(self):
+        """Sample the HC-SR04 and queue transitions that happen while the door is moving."""
+        system = self.door_system
+        previous_door_state = system.previous_door_state
+        while True:
+            door_state = await self.in_hardware(system.door_state_sensor.get_door_state)
+            system.record_distance()
+            if door_state != previous_door_state:
+                if system.door_motion_sensor.get_motion_state().door_state == 'moving':
+                    if self.door_events.full():
+                        self.door_events.get_nowait()  # Replace the transition still waiting with the newest
+                    self.door_events.put_nowait(door_state)
+                previous_door_state = door_state
+                system.previous_door_state = door_state
+            await asyncio.sleep(self.door_interval)
+
+    async def motion_task(self):
+        """Sample the MPU6050 and keep its filtered MotionState current."""
+        sensor = self.door_system.door_motion_sensor
+        loop = asyncio.get_running_loop()
+        previous_time = loop.time()
+        while True:
+            accel_data, gyro_data, _ = await self.in_hardware(sensor.read_sensor_data)
+            now = loop.time()
+            if accel_data is not None and gyro_data is not None:
+                sensor.set_motion_state(sensor.update_motion_state(
+                    gyro_data, now, now - previous_time, sensor.motion_state.angle))
+            previous_time = now
+            await asyncio.sleep(self.motion_interval)
+
+    async def gesture_task(self):
+        """Run one gesture session for each queued door transition."""
+        system = self.door_system
+        loop = asyncio.get_running_loop()
+        while True:
+            door_state = await self.door_events.get()
+            if system.gesture_error is not None:
+                continue  # The model failed to load
+            result = await loop.run_in_executor(self.gesture_executor, system.gesture_service.recognize)
+            if result is not None:
+                system.report_gesture(door_state, result)
+
+    async def display_task(self):
+        """Render the newest requested lines; requests made while rendering are coalesced."""
+        while True:
+            await self.display.changed.wait()
+            self.display.changed.clear()
+            lines = self.display.pending_lines
+            try:
+                await self.in_hardware(self.display.display.render, *lines)
+            except OSError as error:
+                print(f"OLED: Error updating display. {error}")
+
+    async def mqtt_task(self):
+        """Connect and reconnect the shared client, and flush its outbox from the loop."""
+        hub = self.door_system.mqtt_hub
+        if hub.threaded:
+            return  # The hub already runs its own network thread and outbox
+
+        client = hub.client
+        loop = asyncio.get_running_loop()
+
+        self.mqtt_helper = AsyncioMQTTHelper(loop, client)
+        reconnect_delay = 1
+        while True:
+            if client.socket() is None:
+                try:
+                    await loop.run_in_executor(None, client.reconnect)
+                    reconnect_delay = 1
+                except OSError as error:
+                    print(f"MQTT: Connection failed, retrying in {reconnect_delay}s. {error}")
+                    await asyncio.sleep(reconnect_delay)
+                    reconnect_delay = min(reconnect_delay * 2, 30)
+                    continue
+            await loop.run_in_executor(None, hub.outbox.flush_once)
+            await asyncio.sleep(self.mqtt_flush_interval)
+
+    async def stop_mqtt(self):
+        """
+        Flush and disconnect while the loop still serves the socket, then detach the client, so the
+        final release neither waits for acks nobody reads nor calls back into a closed loop.
+        """
+        if self.mqtt_helper is None:
+            return
+        hub = self.door_system.mqtt_hub
+        if hub.client.is_connected():
+            await asyncio.get_running_loop().run_in_executor(None, hub.outbox.flush)
+        self.mqtt_helper.detach()
+        hub.client.disconnect()  # Written straight away: the client has no network thread
+        self.mqtt_helper = None
+
+    async def dht11_task(self):
+        """Read the DHT11 through its filter pipeline and publish changes through the hub."""
+        sampler = self.dht11_sampler
+        while True:
+            await self.in_hardware(sampler.step)
+            await asyncio.sleep(sampler.pipeline.next_delay)
+
+def main():
+    from main import SmartDoorSystem
+    hub = get_hub(threaded=False)  # Create the shared hub first so the event loop, not a thread, drives it
+    door_system = SmartDoorSystem()
+
+    dht11_sampler = None
+    if "--with-dht11" in sys.argv:
+        from dht11 import DHT11Sampler
+        dht11_sampler = DHT11Sampler(hub, verbose=False, history=door_system.history)  # Held by main's reference
+
+    runtime = AsyncSmartDoorRuntime(door_system, dht11_sampler)
+    try:
+        asyncio.run(runtime.run())
+    except KeyboardInterrupt:
+        print("Stopped by User")
+    finally:
+        hub.release()
+
+if __name__ == "__main__":
+    main()
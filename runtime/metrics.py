@@ -0,0 +1,210 @@
+"""
+Named latency spans, histograms and counters with Prometheus text export.
+
+Everything is a no-op until enable() is called, so the instrumentation can stay in the sampling loops.
+
+    from runtime import metrics
+    metrics.enable()
+    metrics.start_http_server()  # http://127.0.0.1:9108/metrics
+    with metrics.span('gesture_session'):
+        ...
+"""
+import os
+import time
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_PORT = 9108
+METRICS_TEXTFILE = 'smartdoor.prom'  # For the node_exporter textfile collector
+PREFIX = 'smartdoor_'
+
+# Seconds; spans range from sub-millisecond sensor reads to multi-second gesture sessions
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+enabled = False
+lock = threading.Lock()
+histograms = {}  # (name, stage) -> Histogram
+counters = {}  # (name, stage) -> value
+gauges = {}  # (name, stage) -> value
+help_texts = {
+    'stage_seconds': 'Duration of a named stage of the door pipeline.',
+}
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class Span:
+    def __init__(self, stage):
+        self.stage = stage
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        observe('stage_seconds', time.perf_counter() - self.start, self.stage)
+        return False
+
+class NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+NULL_SPAN = NullSpan()
+
+def enable():
+    global enabled
+    enabled = True
+
+def disable():
+    global enabled
+    enabled = False
+
+def span(stage):
+    """Time a with-block into smartdoor_stage_seconds{stage=...}."""
+    if not enabled:
+        return NULL_SPAN
+    return Span(stage)
+
+def timed(stage):
+    """Decorator timing every call of a function as a span."""
+    def decorate(function):
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return function(*args, **kwargs)
+            with Span(stage):
+                return function(*args, **kwargs)
+        wrapper.__name__ = function.__name__
+        wrapper.__doc__ = function.__doc__
+        return wrapper
+    return decorate
+
+def observe(name, value, stage=None, buckets=DEFAULT_BUCKETS):
+    """Record a value in histogram name, e.g. a latency measured across threads."""
+    if not enabled:
+        return
+    with lock:
+        histogram = histograms.get((name, stage))
+        if histogram is None:
+            histogram = histograms[(name, stage)] = Histogram(buckets)
+        histogram.observe(value)
+
+def inc(name, amount=1, stage=None):
+    if not enabled:
+        return
+    with lock:
+        counters[(name, stage)] = counters.get((name, stage), 0) + amount
+
+def set_gauge(name, value, stage=None):
+    if not enabled:
+        return
+    gauges[(name, stage)] = value
+
+def describe(name, text):
+    """Set the # HELP line of a metric."""
+    help_texts[name] = text
+
+def reset():
+    with lock:
+        histograms.clear()
+        counters.clear()
+        gauges.clear()
+
+def labels(stage, extra=''):
+    parts = [f'stage="{stage}"'] if stage is not None else []
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+def format_value(value):
+    return repr(float(value)) if value != float('inf') else '+Inf'
+
+def render():
+    """Return every metric in the Prometheus text exposition format."""
+    with lock:
+        histogram_items = sorted(((key, (list(h.buckets), list(h.counts), h.sum, h.count))
+                                  for key, h in histograms.items()), key=lambda item: (item[0][0], str(item[0][1])))
+        counter_items = sorted(counters.items(), key=lambda item: (item[0][0], str(item[0][1])))
+        gauge_items = sorted(gauges.items(), key=lambda item: (item[0][0], str(item[0][1])))
+
+    lines = []
+    declared = set()
+
+    def declare(name, metric_type):
+        if name not in declared:
+            declared.add(name)
+            if name in help_texts:
+                lines.append(f'# HELP {PREFIX}{name} {help_texts[name]}')
+            lines.append(f'# TYPE {PREFIX}{name} {metric_type}')
+
+    for (name, stage), (buckets, counts, total, count) in histogram_items:
+        declare(name, 'histogram')
+        cumulative = 0
+        for bound, bucket_count in zip(list(buckets) + [float('inf')], counts):
+            cumulative += bucket_count
+            bucket_label = 'le="%s"' % format_value(bound)
+            lines.append(f'{PREFIX}{name}_bucket{labels(stage, bucket_label)} {cumulative}')
+        lines.append(f'{PREFIX}{name}_sum{labels(stage)} {format_value(total)}')
+        lines.append(f'{PREFIX}{name}_count{labels(stage)} {count}')
+    for (name, stage), value in counter_items:
+        declare(name, 'counter')
+        lines.append(f'{PREFIX}{name}{labels(stage)} {format_value(value)}')
+    for (name, stage), value in gauge_items:
+        declare(name, 'gauge')
+        lines.append(f'{PREFIX}{name}{labels(stage)} {format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+def write_textfile(path=METRICS_TEXTFILE):
+    """Write render() atomically so a collector never reads a half-written file."""
+    temporary_path = f'{path}.tmp'
+    with open(temporary_path, 'w') as metrics_file:
+        metrics_file.write(render())
+    os.replace(temporary_path, path)
+
+def start_textfile_writer(path=METRICS_TEXTFILE, interval=15.0):
+    """Rewrite the text file every interval seconds from a daemon thread."""
+    def write_loop():
+        while True:
+            try:
+                write_textfile(path)
+            except OSError as error:
+                print(f"Metrics: Error writing {path}. {error}")
+            time.sleep(interval)
+    thread = threading.Thread(target=write_loop, daemon=True)
+    thread.start()
+    return thread
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes every few seconds would flood the console
+
+def start_http_server(port=METRICS_PORT, host='127.0.0.1'):
+    """Serve /metrics from a daemon thread and return the server."""
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
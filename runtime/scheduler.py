@@ -0,0 +1,117 @@
+import time
+from runtime import metrics
+
+class ScheduledTask:
+    def __init__(self, name, callback, active_rate_hz, idle_rate_hz, idle_after):
+        """
+        A callback run by RateScheduler at a rate that depends on recent activity.
+
+        :param active_rate_hz: Rate used right after activity.
+        :param idle_rate_hz: Slowest rate, reached once the system has been idle for a while.
+        :param idle_after: Seconds without activity before the task starts backing off.
+        """
+        self.name = name
+        self.callback = callback
+        self.active_interval = 1.0 / active_rate_hz
+        self.idle_interval = 1.0 / idle_rate_hz
+        self.idle_after = idle_after
+        self.interval = self.active_interval
+        self.next_run = time.monotonic()
+
+        # Statistics
+        self.runs = 0
+        self.busy_time = 0.0
+        self.jitter_total = 0.0
+        self.jitter_max = 0.0
+
+    def update_interval(self, idle_time):
+        """Use the active interval after activity, then double it every run up to the idle interval."""
+        if idle_time < self.idle_after:
+            self.interval = self.active_interval
+        else:
+            self.interval = min(self.interval * 2, self.idle_interval)
+
+    def stats(self, elapsed):
+        return {
+            'runs': self.runs,
+            'rate_hz': round(1.0 / self.interval, 2),
+            'jitter_mean_ms': round(1000 * self.jitter_total / self.runs, 3) if self.runs else None,
+            'jitter_max_ms': round(1000 * self.jitter_max, 3),
+            'duty_cycle': round(self.busy_time / elapsed, 4) if elapsed > 0 else None,
+        }
+
+class RateScheduler:
+    def __init__(self):
+        """Run each registered task at its own rate from a single loop, sleeping between runs."""
+        self.tasks = []
+        self.running = False
+        self.paced = True
+        self.start_time = None
+        self.last_activity = time.monotonic()
+
+    def add_task(self, name, callback, active_rate_hz, idle_rate_hz=None, idle_after=30.0):
+        """Register a callback. Without idle_rate_hz the task always runs at active_rate_hz."""
+        task = ScheduledTask(name, callback, active_rate_hz, idle_rate_hz or active_rate_hz, idle_after)
+        self.tasks.append(task)
+        return task
+
+    def notify_activity(self):
+        """Switch every task back to its active rate."""
+        self.last_activity = time.monotonic()
+        for task in self.tasks:
+            task.interval = task.active_interval
+            task.next_run = min(task.next_run, self.last_activity + task.interval)
+
+    def run_pending(self):
+        """Run every task that is due and return the time until the next one is."""
+        now = time.monotonic()
+        for task in self.tasks:
+            if self.paced and now < task.next_run:
+                continue
+
+            jitter = max(0.0, now - task.next_run)
+            task.jitter_total += jitter
+            task.jitter_max = max(task.jitter_max, jitter)
+            metrics.observe('scheduler_jitter_seconds', jitter, task.name)
+
+            task.callback()
+            finished = time.monotonic()
+            task.busy_time += finished - now
+            task.runs += 1
+
+            task.update_interval(finished - self.last_activity)
+            task.next_run += task.interval
+            if task.next_run < finished:
+                task.next_run = finished  # Overran; do not try to catch up with a burst of runs
+            now = finished
+
+        return max(0.0, min(task.next_run for task in self.tasks) - time.monotonic())
+
+    def run(self, paced=True):
+        """
+        Run tasks until stop() is called. With paced=False every task runs back to back, ignoring
+        its rate, e.g. to replay a recording as fast as possible.
+        """
+        self.running = True
+        self.paced = paced
+        self.start_time = time.monotonic()
+        for task in self.tasks:
+            task.next_run = self.start_time
+        while self.running:
+            delay = self.run_pending()
+            if paced:
+                time.sleep(delay)
+
+    def stop(self):
+        self.running = False
+
+    def stats(self):
+        """Per-task and total jitter and duty-cycle statistics."""
+        elapsed = time.monotonic() - self.start_time if self.start_time else 0.0
+        tasks = {task.name: task.stats(elapsed) for task in self.tasks}
+        busy = sum(task.busy_time for task in self.tasks)
+        return {
+            'elapsed_s': round(elapsed, 1),
+            'duty_cycle': round(busy / elapsed, 4) if elapsed > 0 else None,
+            'tasks': tasks,
+        }
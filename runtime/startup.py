@@ -0,0 +1,64 @@
+"""
+Startup timing: interpreter start, each outermost import made while tracking, and milestones such
+as the first sensor read and model ready, measured from process start.
+"""
+import os
+import sys
+import time
+import builtins
+import threading
+
+start_time = time.perf_counter()  # When this module was imported
+imports = {}  # module name -> seconds, in import order
+milestones = {}  # name -> seconds since process start
+original_import = builtins.__import__
+local = threading.local()  # depth of tracked imports in the current thread
+
+def process_age():
+    """Seconds since the process was created (Linux), or 0.0 where /proc is not available."""
+    try:
+        with open('/proc/self/stat') as stat_file:
+            start_ticks = int(stat_file.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as uptime_file:
+            uptime = float(uptime_file.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf('SC_CLK_TCK'))
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+interpreter_time = process_age()  # Interpreter start-up before this module was imported
+
+def since_start():
+    return interpreter_time + time.perf_counter() - start_time
+
+def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level or name in sys.modules or getattr(local, 'depth', 0):
+        return original_import(name, globals, locals, fromlist, level)
+    local.depth = 1
+    t0 = time.perf_counter()
+    try:
+        return original_import(name, globals, locals, fromlist, level)
+    finally:
+        imports[name] = imports.get(name, 0.0) + time.perf_counter() - t0
+        local.depth = 0
+
+def track_imports():
+    builtins.__import__ = timed_import
+
+def stop_tracking():
+    builtins.__import__ = original_import
+
+def mark(name):
+    """Record the first time a milestone is reached."""
+    if name not in milestones:
+        milestones[name] = since_start()
+
+def report():
+    lines = [f"{'interpreter':<36}{interpreter_time * 1000:>9.0f} ms"]
+    for name, seconds in imports.items():
+        lines.append(f"{'import ' + name:<36}{seconds * 1000:>9.0f} ms")
+    for name, seconds in sorted(milestones.items(), key=lambda item: item[1]):
+        lines.append(f"{name:<36}{seconds * 1000:>9.0f} ms after start")
+    return '\n'.join(lines)
+
+def print_report():
+    print("Startup:\n" + report())
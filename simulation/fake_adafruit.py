@@ -0,0 +1,52 @@
+"""
+Stand-in for the adafruit_ssd1306 and adafruit_dht drivers.
+
+The display keeps the last image and takes as long as a full 400 kHz I2C frame write; the DHT11
+reads the scenario's climate and fails now and then like the real sensor.
+"""
+import time
+
+I2C_FRAME_TIME = 128 * 64 / 8 * 9 / 400000  # 1 KiB framebuffer, 9 bits per byte at 400 kHz
+
+scenario = None  # DoorScenario providing DHT11 readings; set by simulation.hardware.install
+
+class SSD1306_I2C:
+    def __init__(self, width, height, i2c, addr=0x3C):
+        self.width = width
+        self.height = height
+        self.i2c = i2c
+        self.buffer = None
+        self.frames_written = 0
+
+    def fill(self, color):
+        self.buffer = None
+
+    def image(self, image):
+        self.buffer = image.tobytes()
+
+    def show(self):
+        time.sleep(I2C_FRAME_TIME)
+        self.frames_written += 1
+
+class DHT11:
+    def __init__(self, pin, use_pulseio=True):
+        self.pin = pin
+        self.last_read = None
+
+    def measure(self):
+        if scenario is None:
+            return 21, 45
+        return scenario.read_dht11()
+
+    @property
+    def temperature(self):
+        self.last_read = self.measure()
+        return self.last_read[0]
+
+    @property
+    def humidity(self):
+        # The real driver measures once for both properties within two seconds
+        return self.last_read[1] if self.last_read is not None else self.measure()[1]
+
+    def exit(self):
+        pass
@@ -0,0 +1,15 @@
+"""
+Stand-in for the Blinka board and busio modules: pin names and an I2C bus that accepts everything.
+"""
+SCL = 'SCL'
+SDA = 'SDA'
+D14 = 'D14'
+
+class I2C:
+    def __init__(self, scl, sda, frequency=400000):
+        self.scl = scl
+        self.sda = sda
+        self.frequency = frequency
+
+    def deinit(self):
+        pass
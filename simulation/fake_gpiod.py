@@ -0,0 +1,99 @@
+"""
+Stand-in for the libgpiod v1 Python bindings with a simulated HC-SR04 on the chip.
+
+A falling edge on any output line is taken as the end of a trigger pulse and schedules an echo
+pulse on the input lines whose width matches the scenario's distance. Both the polling
+(get_value) and edge event (event_wait / event_read) APIs see the same pulse.
+"""
+import time
+from collections import namedtuple
+
+LINE_REQ_DIR_AS_IS = 1
+LINE_REQ_DIR_IN = 2
+LINE_REQ_DIR_OUT = 3
+LINE_REQ_EV_FALLING_EDGE = 4
+LINE_REQ_EV_RISING_EDGE = 5
+LINE_REQ_EV_BOTH_EDGES = 6
+
+ECHO_DELAY = 0.0005  # Seconds between the end of the trigger and the echo rising edge
+SPEED_OF_SOUND_HALF = 17150  # cm/s
+
+scenario = None  # DoorScenario driving the echo; set by simulation.hardware.install
+
+Event = namedtuple('Event', ['type', 'sec', 'nsec'])
+
+class LineEvent:
+    RISING_EDGE = 1
+    FALLING_EDGE = 2
+
+class Chip:
+    def __init__(self, name):
+        self.name = name
+        self.lines = {}
+        self.echo_edges = []  # (monotonic time, edge type) of the pending echo pulse
+
+    def get_line(self, offset):
+        if offset not in self.lines:
+            self.lines[offset] = Line(self, offset)
+        return self.lines[offset]
+
+    def trigger(self, now):
+        distance = scenario.distance(now) if scenario is not None else 30.0
+        if distance is None:
+            self.echo_edges = []  # No echo; the reader times out as on a failed measurement
+            for line in self.lines.values():
+                line.pending = []
+            return
+        rise = now + ECHO_DELAY
+        self.echo_edges = [(rise, LineEvent.RISING_EDGE), (rise + distance / SPEED_OF_SOUND_HALF, LineEvent.FALLING_EDGE)]
+        for line in self.lines.values():
+            if line.request_type in (LINE_REQ_EV_BOTH_EDGES, LINE_REQ_EV_RISING_EDGE, LINE_REQ_EV_FALLING_EDGE):
+                line.pending = list(self.echo_edges)
+
+    def close(self):
+        pass
+
+class Line:
+    def __init__(self, chip, offset):
+        self.chip = chip
+        self.offset = offset
+        self.request_type = None
+        self.value = 0
+        self.pending = []  # Edge events not read yet
+
+    def request(self, consumer=None, type=LINE_REQ_DIR_IN, default_val=0):
+        self.request_type = type
+        self.value = default_val
+
+    def release(self):
+        self.request_type = None
+        self.pending = []
+
+    def set_value(self, value):
+        if self.value == 1 and value == 0:
+            self.chip.trigger(time.monotonic())
+        self.value = value
+
+    def get_value(self):
+        if self.request_type == LINE_REQ_DIR_OUT:
+            return self.value
+        now = time.monotonic()
+        edges = self.chip.echo_edges
+        return int(len(edges) == 2 and edges[0][0] <= now < edges[1][0])
+
+    def event_wait(self, sec=0, nsec=0):
+        """Wait up to the timeout for an edge; True if one is ready to read."""
+        if not self.pending:
+            return False
+        delay = self.pending[0][0] - time.monotonic()
+        if delay > sec + nsec / 1e9:
+            time.sleep(sec + nsec / 1e9)
+            return False
+        if delay > 0:
+            time.sleep(delay)
+        return True
+
+    def event_read(self):
+        event_time, edge = self.pending.pop(0)
+        sec = int(event_time)
+        return Event(edge, sec, int((event_time - sec) * 1e9))
@@ -0,0 +1,109 @@
+"""
+Stand-in for the mpu6050-raspberrypi package with a simulated register file.
+
+Register reads return the scenario's gyro trace with the sensor level (gravity on z). The FIFO is
+filled at the configured sample rate from the same trace, so both the polling and FIFO samplers
+of DoorMotionMPU6050 can be exercised.
+"""
+import time
+import struct
+
+# Registers as in components.door_mpu6050, which cannot be imported before this module is installed
+SMPLRT_DIV = 0x19
+CONFIG = 0x1A
+FIFO_EN = 0x23
+INT_STATUS = 0x3A
+ACCEL_XOUT_H = 0x3B
+USER_CTRL = 0x6A
+FIFO_COUNT_H = 0x72
+FIFO_R_W = 0x74
+
+FIFO_SIZE = 1024
+FIFO_OFLOW_INT = 0x10
+USER_CTRL_FIFO_EN = 0x40
+USER_CTRL_FIFO_RESET = 0x04
+
+ACCEL_LSB = 16384  # +-2 g
+GYRO_LSB = 131.0  # +-250 degrees/s
+
+scenario = None  # DoorScenario driving the gyro; set by simulation.hardware.install
+
+def clamp(value):
+    return max(-32768, min(32767, int(round(value))))
+
+class SMBus:
+    def __init__(self):
+        self.registers = {SMPLRT_DIV: 0, CONFIG: 0, FIFO_EN: 0, USER_CTRL: 0}
+        self.fifo = bytearray()
+        self.next_sample_time = None
+        self.overflow = False
+
+    def angular_velocity(self, now):
+        return scenario.angular_velocity(now) if scenario is not None else 0.0
+
+    def sample(self, now):
+        """accel x/y/z, temperature, gyro x/y/z as raw int16 values."""
+        block = scenario.mpu6050_block(now) if scenario is not None else None
+        if block is not None:
+            return struct.unpack('>7h', block)  # Replayed register burst
+        return (0, 0, ACCEL_LSB, 0, clamp(self.angular_velocity(now) * GYRO_LSB), 0, 0)
+
+    def sample_rate(self):
+        output_rate = 1000 if self.registers[CONFIG] & 0x07 else 8000
+        return output_rate / (1 + self.registers[SMPLRT_DIV])
+
+    def fill_fifo(self):
+        if not self.registers[USER_CTRL] & USER_CTRL_FIFO_EN or self.next_sample_time is None:
+            return
+        now = time.monotonic()
+        period = 1.0 / self.sample_rate()
+        enabled = self.registers[FIFO_EN]
+        while self.next_sample_time <= now:
+            accel_x, accel_y, accel_z, _, gyro_x, _, _ = self.sample(self.next_sample_time)
+            values = ((accel_x, accel_y, accel_z) if enabled & 0x08 else ()) + ((gyro_x,) if enabled & 0x40 else ())
+            record = struct.pack(f'>{len(values)}h', *values)
+            if len(self.fifo) + len(record) > FIFO_SIZE:
+                self.overflow = True
+            else:
+                self.fifo += record
+            self.next_sample_time += period
+
+    def write_byte_data(self, address, register, value):
+        if register == USER_CTRL and value & USER_CTRL_FIFO_RESET:
+            self.fifo = bytearray()
+            self.overflow = False
+            self.next_sample_time = time.monotonic()
+            return
+        self.registers[register] = value
+
+    def read_byte_data(self, address, register):
+        if register == INT_STATUS:
+            self.fill_fifo()
+            status = FIFO_OFLOW_INT if self.overflow else 0
+            self.overflow = False
+            return status
+        return self.registers.get(register, 0)
+
+    def read_i2c_block_data(self, address, register, length):
+        if register == ACCEL_XOUT_H:
+            return list(struct.pack('>7h', *self.sample(time.monotonic())))[:length]
+        if register == FIFO_COUNT_H:
+            self.fill_fifo()
+            return [len(self.fifo) >> 8, len(self.fifo) & 0xFF][:length]
+        if register == FIFO_R_W:
+            data, self.fifo = self.fifo[:length], self.fifo[length:]
+            return list(data)
+        return [0] * length
+
+class mpu6050:
+    GRAVITIY_MS2 = 9.80665  # Spelling as in the mpu6050 package
+
+    def __init__(self, address, bus=1):
+        self.address = address
+        self.bus = SMBus()
+
+    def read_accel_range(self):
+        return 2
+
+    def read_gyro_range(self):
+        return 250
@@ -0,0 +1,36 @@
+"""
+Install the simulated hardware backends in place of the Pi-only driver modules.
+
+    from simulation.hardware import install
+    from simulation.scenario import DoorScenario
+    scenario = install(DoorScenario(period=4.0))
+    from main import SmartDoorSystem  # Now imports the stand-ins
+
+install() must run before anything imports components.*, main or dht11.
+"""
+import sys
+from simulation import fake_gpiod, fake_mpu6050, fake_board, fake_adafruit
+from simulation.scenario import DoorScenario
+
+FAKE_MODULES = {
+    'gpiod': fake_gpiod,
+    'mpu6050': fake_mpu6050,
+    'board': fake_board,
+    'busio': fake_board,
+    'adafruit_ssd1306': fake_adafruit,
+    'adafruit_dht': fake_adafruit,
+}
+
+def install(scenario=None):
+    """Register the stand-ins in sys.modules and point them at scenario. Returns the scenario."""
+    scenario = scenario or DoorScenario()
+    already_imported = [name for name in ('components.door_hcsr04', 'components.door_mpu6050',
+                                          'components.oled_display', 'components.dht11_sensor')
+                        if name in sys.modules]
+    if already_imported:
+        raise RuntimeError(f"Install the simulated hardware before importing {', '.join(already_imported)}")
+
+    for module in (fake_gpiod, fake_mpu6050, fake_adafruit):
+        module.scenario = scenario
+    sys.modules.update(FAKE_MODULES)
+    return scenario
@@ -0,0 +1,190 @@
+"""
+Minimal in-process MQTT 3.1.1 broker for running the door system and benchmarks off the Pi.
+
+Supports CONNECT, PUBLISH (QoS 0-2 in, QoS 0 out), SUBSCRIBE, UNSUBSCRIBE, PINGREQ, DISCONNECT and
+retained messages. Any username and password are accepted. Listeners see every published message
+with its arrival time, which is what the end-to-end benchmark measures against.
+"""
+import time
+import struct
+import socket
+import threading
+import socketserver
+from paho.mqtt.client import topic_matches_sub
+
+CONNECT, CONNACK, PUBLISH, PUBACK, PUBREC, PUBREL, PUBCOMP = 1, 2, 3, 4, 5, 6, 7
+SUBSCRIBE, SUBACK, UNSUBSCRIBE, UNSUBACK, PINGREQ, PINGRESP, DISCONNECT = 8, 9, 10, 11, 12, 13, 14
+
+def encode_length(length):
+    encoded = bytearray()
+    while True:
+        byte = length % 128
+        length //= 128
+        encoded.append(byte | 0x80 if length else byte)
+        if not length:
+            return bytes(encoded)
+
+def packet(packet_type, body=b'', flags=0):
+    return bytes([packet_type << 4 | flags]) + encode_length(len(body)) + body
+
+def encode_string(text):
+    data = text.encode()
+    return struct.pack('>H', len(data)) + data
+
+def read_string(body, offset):
+    (length,) = struct.unpack_from('>H', body, offset)
+    offset += 2
+    return body[offset:offset + length].decode(), offset + length
+
+class Session(socketserver.BaseRequestHandler):
+    def setup(self):
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.file = self.request.makefile('rb')
+        self.send_lock = threading.Lock()
+        self.subscriptions = set()
+
+    def send(self, data):
+        with self.send_lock:
+            self.request.sendall(data)
+
+    def read_packet(self):
+        header = self.file.read(1)
+        if not header:
+            return None, None, None
+        length, multiplier = 0, 1
+        while True:
+            byte = self.file.read(1)
+            if not byte:
+                return None, None, None
+            length += (byte[0] & 0x7F) * multiplier
+            multiplier *= 128
+            if not byte[0] & 0x80:
+                break
+        return header[0] >> 4, header[0] & 0x0F, self.file.read(length)
+
+    def handle(self):
+        broker = self.server.broker
+        broker.add_session(self)
+        try:
+            while True:
+                packet_type, flags, body = self.read_packet()
+                if packet_type is None or packet_type == DISCONNECT:
+                    return
+                if packet_type == CONNECT:
+                    self.send(packet(CONNACK, b'\x00\x00'))
+                elif packet_type == PUBLISH:
+                    self.handle_publish(flags, body)
+                elif packet_type == PUBREL:
+                    self.send(packet(PUBCOMP, body[:2]))
+                elif packet_type == SUBSCRIBE:
+                    self.handle_subscribe(body)
+                elif packet_type == UNSUBSCRIBE:
+                    offset = 2
+                    while offset < len(body):
+                        topic, offset = read_string(body, offset)
+                        self.subscriptions.discard(topic)
+                    self.send(packet(UNSUBACK, body[:2]))
+                elif packet_type == PINGREQ:
+                    self.send(packet(PINGRESP))
+        except (OSError, ValueError):
+            return
+        finally:
+            broker.remove_session(self)
+
+    def handle_publish(self, flags, body):
+        qos = (flags >> 1) & 0x03
+        retain = bool(flags & 0x01)
+        topic, offset = read_string(body, 0)
+        if qos:
+            packet_id = body[offset:offset + 2]
+            offset += 2
+        self.server.broker.route(topic, bytes(body[offset:]), retain)
+        if qos == 1:
+            self.send(packet(PUBACK, packet_id))
+        elif qos == 2:
+            self.send(packet(PUBREC, packet_id))
+
+    def handle_subscribe(self, body):
+        packet_id, offset = body[:2], 2
+        topics = []
+        while offset < len(body):
+            topic, offset = read_string(body, offset)
+            offset += 1  # Requested QoS; everything is delivered at QoS 0
+            topics.append(topic)
+        self.subscriptions.update(topics)
+        self.send(packet(SUBACK, packet_id + bytes(len(topics))))
+        for retained_topic, payload in self.server.broker.retained_messages(topics):
+            self.deliver(retained_topic, payload, retain=True)
+
+    def deliver(self, topic, payload, retain=False):
+        try:
+            self.send(packet(PUBLISH, encode_string(topic) + payload, flags=int(retain)))
+        except OSError:
+            pass  # Session is closing
+
+class BrokerServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True  # Restart on the same port, e.g. to test reconnects
+    daemon_threads = True
+
+class LocalMQTTBroker:
+    def __init__(self, host='127.0.0.1', port=0):
+        """
+        :param port: TCP port to listen on; 0 picks a free one, see self.port after start().
+        """
+        self.host = host
+        self.port = port
+        self.server = None
+        self.thread = None
+        self.sessions = set()
+        self.retained = {}
+        self.listeners = []  # callback(topic, payload, arrival monotonic time)
+        self.lock = threading.Lock()
+        self.messages = 0
+
+    def start(self):
+        self.server = BrokerServer((self.host, self.port), Session)
+        self.server.broker = self
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            for session in list(self.sessions):
+                try:
+                    session.request.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+            self.server = None
+
+    def add_session(self, session):
+        with self.lock:
+            self.sessions.add(session)
+
+    def remove_session(self, session):
+        with self.lock:
+            self.sessions.discard(session)
+
+    def route(self, topic, payload, retain=False):
+        arrival = time.monotonic()
+        with self.lock:
+            self.messages += 1
+            if retain:
+                if payload:
+                    self.retained[topic] = payload
+                else:
+                    self.retained.pop(topic, None)
+            targets = [session for session in self.sessions
+                       if any(topic_matches_sub(sub, topic) for sub in session.subscriptions)]
+        for listener in self.listeners:
+            listener(topic, payload, arrival)
+        for session in targets:
+            session.deliver(topic, payload)
+
+    def retained_messages(self, subscriptions):
+        with self.lock:
+            return [(topic, payload) for topic, payload in self.retained.items()
+                    if any(topic_matches_sub(sub, topic) for sub in subscriptions)]
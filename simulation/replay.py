@@ -0,0 +1,180 @@
+"""
+Replay a record file (storage.recording) into SmartDoorSystem and HandGestureRecognition.
+
+--speed scales the replay clock shared by all streams. --fast returns the next record of a stream on
+every read, which measures throughput but not cross-stream timing.
+
+Usage (from the repository root):
+    python -m simulation.replay recording.rec --model gesture/hand_gesture_model.task [--speed 2 | --fast]
+    python -m simulation.replay recording.rec --model gesture/hand_gesture_model.task --gesture-only --fast
+"""
+import time
+import struct
+import argparse
+import threading
+from storage.recording import Recording, STREAM_HCSR04, STREAM_MPU6050, STREAM_FRAME
+from simulation.scenario import DoorScenario
+
+class ReplayClock:
+    def __init__(self, recording, speed=1.0, loop=True):
+        """
+        :param speed: Replay speed relative to real time, or None to advance one record per read.
+        :param loop: Start again at the end of the recording instead of holding the last record.
+        """
+        self.recording = recording
+        self.speed = speed
+        self.loop = loop
+        self.start_time = time.monotonic()
+        self.cursors = {}  # stream -> next position, when speed is None
+        self.lock = threading.Lock()
+
+    def start(self):
+        self.start_time = time.monotonic()
+        self.cursors.clear()
+
+    def position(self, stream, now=None):
+        """Index of the record of stream that is current, or None if the stream is empty."""
+        timestamps = self.recording.timestamps(stream)
+        if not len(timestamps):
+            return None
+        if self.speed is None:
+            with self.lock:
+                position = self.cursors.get(stream, 0)
+                self.cursors[stream] = position + 1
+            return position % len(timestamps) if self.loop else min(position, len(timestamps) - 1)
+
+        elapsed = ((time.monotonic() if now is None else now) - self.start_time) * self.speed
+        if self.loop and self.recording.duration() > 0:
+            elapsed %= self.recording.duration()
+        position = int(timestamps.searchsorted(elapsed, side='right')) - 1
+        return max(position, 0)
+
+class ReplayScenario(DoorScenario):
+    def __init__(self, recording, speed=1.0, loop=True, **scenario_options):
+        """
+        Scenario for simulation.hardware.install() that plays recorded HC-SR04 distances and
+        MPU6050 register bursts instead of a scripted door. The DHT11 stays scripted.
+        """
+        super().__init__(**scenario_options)
+        self.recording = recording
+        self.clock = ReplayClock(recording, speed, loop)
+
+    def start(self):
+        super().start()
+        self.clock.start()
+
+    def distance(self, now=None):
+        position = self.clock.position(STREAM_HCSR04, now)
+        if position is None:
+            return self.closed_distance
+        distance = float(self.recording.distances[position])
+        return None if distance != distance else distance  # NaN was a failed read
+
+    def mpu6050_block(self, now=None):
+        position = self.clock.position(STREAM_MPU6050, now)
+        if position is None:
+            return None
+        return bytes(self.recording.mpu6050_blocks[position])
+
+    def angular_velocity(self, now=None):
+        block = self.mpu6050_block(now)
+        if block is None:
+            return 0.0
+        from components.door_mpu6050 import GYRO_SCALES  # Imports mpu6050, which install() has replaced by now
+        return struct.unpack('>7h', block)[4] / GYRO_SCALES[250]  # Recorded at the default +-250 degrees/s range
+
+    def transitions(self, until=None):
+        return []  # Not scripted; the recording decides when the door moves
+
+class ReplayCamera:
+    def __init__(self, recording, clock):
+        """
+        cv2.VideoCapture look-alike returning recorded frames at the replay clock, or every frame
+        back to back when the clock runs as fast as possible.
+        """
+        self.recording = recording
+        self.clock = clock
+        self.timestamps = recording.timestamps(STREAM_FRAME)
+        self.last_position = None
+        self.opened = len(self.timestamps) > 0
+
+    def isOpened(self):
+        return self.opened
+
+    def read(self):
+        if not self.opened:
+            return False, None
+        # Wait until the replay clock reaches the next recorded frame
+        while True:
+            position = self.clock.position(STREAM_FRAME)
+            if position != self.last_position:
+                break
+            if self.clock.speed is None or (not self.clock.loop and position == len(self.timestamps) - 1):
+                return False, None  # End of the recording
+            time.sleep(0.002)
+        self.last_position = position
+        return True, self.recording.frame(position)
+
+    def set(self, prop, value):
+        return False
+
+    def get(self, prop):
+        return 0.0
+
+    def release(self):
+        self.opened = False
+
+def run_gesture_only(recording, model, speed):
+    """Run HandGestureRecognition over the recorded frames and report its throughput."""
+    from gesture.gesture_recognition import HandGestureRecognition
+    clock = ReplayClock(recording, speed, loop=False)
+    recognizer = HandGestureRecognition(model=model, headless=True, stop_on_gesture=False,
+                                        camera_id=lambda: ReplayCamera(recording, clock))
+    frames = len(recording.timestamps(STREAM_FRAME))
+    recognizer.open_camera()
+    recognizer.warm_up()
+
+    clock.start()
+    start = time.perf_counter()
+    recognizer.run(keep_alive=True)  # Ends with "camera_error" when the camera runs out of frames
+    elapsed = time.perf_counter() - start
+    print(f"{frames} recorded frames, {recognizer.counter} results in {elapsed:.1f}s: "
+          f"{recognizer.counter / elapsed:.1f} results/s, frames {recognizer.frame_grabber.stats()}")
+    recognizer.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('recording')
+    parser.add_argument('--model', default='gesture/hand_gesture_model.task')
+    parser.add_argument('--speed', default=1.0, type=float)
+    parser.add_argument('--fast', action='store_true', help='Replay as fast as possible')
+    parser.add_argument('--gesture-only', action='store_true', help='Only run the recognizer over the frames')
+    parser.add_argument('--duration', default=None, type=float, help='Seconds to run; the recording length if omitted')
+    args = parser.parse_args()
+
+    recording = Recording(args.recording)
+    speed = None if args.fast else args.speed
+    if args.gesture_only:
+        run_gesture_only(recording, args.model, speed)
+        return
+
+    from simulation.hardware import install
+    from simulation.mqtt_broker import LocalMQTTBroker
+    scenario = install(ReplayScenario(recording, speed))
+    broker = LocalMQTTBroker().start()
+
+    from main import SmartDoorSystem
+    from gesture.gesture_service import GestureRecognitionService
+    gesture_service = GestureRecognitionService(model=args.model, headless=True,
+                                                camera_id=lambda: ReplayCamera(recording, scenario.clock))
+    system = SmartDoorSystem(mqtt_server='127.0.0.1', mqtt_port=broker.port, history_dir=None,
+                             gesture_service=gesture_service)
+    scenario.start()
+
+    duration = args.duration or recording.duration() / (speed or 1.0)
+    threading.Timer(duration, system.scheduler.stop).start()
+    system.run(paced=speed is not None)
+    broker.stop()
+
+if __name__ == '__main__':
+    main()
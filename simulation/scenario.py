@@ -0,0 +1,84 @@
+import time
+import random
+
+class DoorScenario:
+    def __init__(self, period=4.0, swing_time=0.8, open_angle=90.0, start_delay=2.0,
+                 open_distance=2.0, closed_distance=30.0, distance_noise=0.0,
+                 temperature=21.0, humidity=45.0, dht11_error_rate=0.1):
+        """
+        Scripted door shared by the simulated sensors: it swings for swing_time seconds every period
+        seconds, and the HC-SR04 distance switches half way through each swing.
+
+        :param start_delay: Seconds after start() before the first swing.
+        :param dht11_error_rate: Fraction of DHT11 reads that fail with a checksum error.
+        """
+        self.period = period
+        self.swing_time = swing_time
+        self.open_angle = open_angle
+        self.start_delay = start_delay
+        self.open_distance = open_distance
+        self.closed_distance = closed_distance
+        self.distance_noise = distance_noise
+        self.temperature = temperature
+        self.humidity = humidity
+        self.dht11_error_rate = dht11_error_rate
+        self.start_time = time.monotonic()
+
+    def start(self):
+        """Restart the script, e.g. once the system under test has finished starting up."""
+        self.start_time = time.monotonic()
+
+    def swing(self, now=None):
+        """Return (swing index, seconds into the swing); the index is -1 before the first swing."""
+        elapsed = (time.monotonic() if now is None else now) - self.start_time - self.start_delay
+        if elapsed < 0:
+            return -1, elapsed
+        index = int(elapsed // self.period)
+        return index, elapsed - index * self.period
+
+    def door_state(self, now=None):
+        """'open' or 'closed' as the HC-SR04 sees it; even swings open the door."""
+        index, into_swing = self.swing(now)
+        if index < 0:
+            return 'closed'
+        opened = index % 2 == 0
+        if into_swing < self.swing_time / 2:
+            opened = not opened
+        return 'open' if opened else 'closed'
+
+    def distance(self, now=None):
+        """HC-SR04 distance in cm."""
+        distance = self.open_distance if self.door_state(now) == 'open' else self.closed_distance
+        if self.distance_noise:
+            distance = max(0.5, random.gauss(distance, self.distance_noise))
+        return distance
+
+    def angular_velocity(self, now=None):
+        """Gyro x in degrees/s."""
+        index, into_swing = self.swing(now)
+        if index < 0 or into_swing >= self.swing_time:
+            return 0.0
+        rate = self.open_angle / self.swing_time
+        return rate if index % 2 == 0 else -rate
+
+    def mpu6050_block(self, now=None):
+        """Raw 14-byte MPU6050 register burst, or None to synthesise one from angular_velocity."""
+        return None
+
+    def transitions(self, until=None):
+        """Return (monotonic time, door state) of every scripted transition up to until (default now)."""
+        until = time.monotonic() if until is None else until
+        transitions = []
+        index = 0
+        while True:
+            at = self.start_time + self.start_delay + index * self.period + self.swing_time / 2
+            if at > until:
+                return transitions
+            transitions.append((at, 'open' if index % 2 == 0 else 'closed'))
+            index += 1
+
+    def read_dht11(self):
+        """Return (temperature, humidity), raising RuntimeError like the real sensor sometimes does."""
+        if random.random() < self.dht11_error_rate:
+            raise RuntimeError("Checksum did not validate. Try again.")
+        return round(random.gauss(self.temperature, 0.3)), round(random.gauss(self.humidity, 1.0))
@@ -0,0 +1,53 @@
+import time
+import threading
+from gesture.gesture_recognition import GestureResult
+
+class ScriptedGestureService:
+    def __init__(self, gesture='thumbs_up', score=0.9, latency=0.4):
+        """
+        Drop-in for GestureRecognitionService that answers every session with a fixed gesture.
+
+        Lets the door, MQTT and display path be benchmarked without a model or camera.
+
+        :param latency: Seconds each session takes before it returns.
+        """
+        self.gesture = gesture
+        self.score = score
+        self.latency = latency
+        self.session_thread = None
+        self.session_result = None
+        self.cold_timings = {}
+        self.warm_timings = {}
+
+    def start(self):
+        pass
+
+    def start_session(self):
+        if self.session_thread is not None and self.session_thread.is_alive():
+            return
+        self.session_result = None
+        self.session_thread = threading.Thread(target=self._run_session, daemon=True)
+        self.session_thread.start()
+
+    def _run_session(self):
+        cpu0 = time.thread_time()
+        time.sleep(self.latency)
+        self.warm_timings = {'first_result': None, 'session': self.latency, 'session_cpu': time.thread_time() - cpu0}
+        self.session_result = GestureResult(self.gesture, self.score, decision_frames=0,
+                                            decision_latency_ms=self.latency * 1000)
+
+    def get_result(self, timeout=None):
+        thread = self.session_thread
+        if thread is not None:
+            thread.join(timeout)
+            if thread.is_alive():
+                return None
+        return self.session_result
+
+    def recognize(self):
+        self.start_session()
+        return self.get_result()
+
+    def stop(self):
+        if self.session_thread is not None:
+            self.session_thread.join()
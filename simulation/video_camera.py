@@ -0,0 +1,51 @@
+import time
+import cv2
+
+class VideoFileCamera:
+    def __init__(self, path, fps=None, loop=True):
+        """
+        cv2.VideoCapture look-alike that plays a video file at its own frame rate, like a webcam.
+
+        Pass a factory such as lambda: VideoFileCamera(path) as camera_id to HandGestureRecognition.
+
+        :param fps: Playback rate; the file's rate if None.
+        :param loop: Start again at the end of the file instead of failing reads.
+        """
+        self.path = path
+        self.loop = loop
+        self.capture = cv2.VideoCapture(path)
+        if not self.capture.isOpened():
+            raise FileNotFoundError(f"Cannot open video file {path}")
+        self.fps = fps or self.capture.get(cv2.CAP_PROP_FPS) or 30.0
+        self.next_frame_time = None
+
+    def isOpened(self):
+        return self.capture is not None and self.capture.isOpened()
+
+    def read(self):
+        """Block until the next frame is due, then return (ok, frame) like VideoCapture.read."""
+        now = time.monotonic()
+        if self.next_frame_time is None or now - self.next_frame_time > 1.0:
+            self.next_frame_time = now  # First read, or the reader stalled; do not burst to catch up
+        elif self.next_frame_time > now:
+            time.sleep(self.next_frame_time - now)
+        self.next_frame_time += 1.0 / self.fps
+
+        ok, frame = self.capture.read()
+        if not ok and self.loop:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self.capture.read()
+        return ok, frame
+
+    def set(self, prop, value):
+        return False  # Resolution and buffering are fixed by the file
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        return self.capture.get(prop)
+
+    def release(self):
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
@@ -0,0 +1,218 @@
+"""
+Record file for the door sensors and camera, for tuning and replaying incidents off the door.
+
+Layout, big-endian:
+    header  8s magic, f64 wall-clock start time
+    record  u8 stream, f64 seconds since start (monotonic), u32 payload length, payload
+            hcsr04   f32 distance in cm (NaN = failed read)
+            mpu6050  the raw 14-byte accel/temp/gyro register burst
+            frame    JPEG bytes
+    index   one INDEX_DTYPE entry per record, then u64 index offset, u64 entry count, 8s magic
+
+The index is written by close(); a file cut short by a crash is indexed by scanning it instead.
+
+Usage (from the repository root):
+    python -m storage.recording info recording.rec
+"""
+import sys
+import math
+import mmap
+import time
+import queue
+import struct
+import threading
+import numpy as np
+import cv2
+
+MAGIC = b'SDREC001'
+INDEX_MAGIC = b'SDRECIDX'
+HEADER = struct.Struct('>8sd')
+RECORD = struct.Struct('>BdI')
+FOOTER = struct.Struct('>QQ8s')
+DISTANCE = struct.Struct('>f')
+INDEX_DTYPE = np.dtype([('stream', 'u1'), ('timestamp', '>f8'), ('offset', '>u8'), ('length', '>u4')])
+
+STREAM_HCSR04 = 1
+STREAM_MPU6050 = 2
+STREAM_FRAME = 3
+STREAM_NAMES = {STREAM_HCSR04: 'hcsr04', STREAM_MPU6050: 'mpu6050', STREAM_FRAME: 'frame'}
+
+MPU6050_BURST_REGISTER = 0x3B  # ACCEL_XOUT_H, start of the 14-byte block read by DoorMotionMPU6050
+MPU6050_BURST_LENGTH = 14
+
+class Recorder:
+    def __init__(self, path, jpeg_quality=80, frame_queue_size=8):
+        """
+        Append timestamped sensor samples and camera frames to a record file. Safe to call from the
+        sampling threads concurrently. Frames are JPEG-encoded on a writer thread, so recording does
+        not slow the camera loop down.
+
+        :param jpeg_quality: cv2 JPEG quality of recorded frames (0-100).
+        :param frame_queue_size: Frames waiting for the writer thread; more are dropped and counted.
+        """
+        self.path = path
+        self.jpeg_quality = jpeg_quality
+        self.file = open(path, 'wb')
+        self.start_time = time.monotonic()
+        self.file.write(HEADER.pack(MAGIC, time.time()))
+        self.offset = HEADER.size
+        self.index = []
+        self.lock = threading.Lock()
+        self.closed = False
+
+        self.frames = queue.Queue(maxsize=frame_queue_size)  # (frame, timestamp), None to stop
+        self.dropped_frames = 0
+        self.writer_thread = threading.Thread(target=self._write_frames, daemon=True)
+        self.writer_thread.start()
+
+    def write(self, stream, payload, timestamp=None):
+        timestamp = (time.monotonic() if timestamp is None else timestamp) - self.start_time
+        with self.lock:
+            if self.closed:
+                return
+            self.file.write(RECORD.pack(stream, timestamp, len(payload)))
+            self.file.write(payload)
+            self.index.append((stream, timestamp, self.offset + RECORD.size, len(payload)))
+            self.offset += RECORD.size + len(payload)
+
+    def record_distance(self, distance, timestamp=None):
+        self.write(STREAM_HCSR04, DISTANCE.pack(math.nan if distance is None else distance), timestamp)
+
+    def record_mpu6050(self, block, timestamp=None):
+        self.write(STREAM_MPU6050, bytes(block), timestamp)
+
+    def record_frame(self, frame, timestamp=None):
+        """Queue a frame for the writer thread; dropped if the queue is full."""
+        try:
+            self.frames.put_nowait((frame, time.monotonic() if timestamp is None else timestamp))
+        except queue.Full:
+            self.dropped_frames += 1
+
+    def _write_frames(self):
+        while True:
+            item = self.frames.get()
+            if item is None:
+                return
+            frame, timestamp = item
+            ok, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if ok:
+                self.write(STREAM_FRAME, jpeg.tobytes(), timestamp)
+
+    def wrap_bus(self, bus):
+        """Return an SMBus proxy recording every MPU6050 register burst read through it."""
+        return RecordingBus(bus, self)
+
+    def camera(self, camera_id=0):
+        """Return a camera_id factory for HandGestureRecognition that records every frame read."""
+        def open_camera():
+            return RecordingCamera(cv2.VideoCapture(camera_id), self)
+        return open_camera
+
+    def close(self):
+        if self.writer_thread is not None:
+            self.frames.put(None)  # Queued frames are written first
+            self.writer_thread.join()
+            self.writer_thread = None
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            index = np.array(self.index, dtype=INDEX_DTYPE)
+            self.file.write(index.tobytes())
+            self.file.write(FOOTER.pack(self.offset, len(index), INDEX_MAGIC))
+            self.file.close()
+        print(f"Recorder: {len(index)} records written to {self.path}, {self.dropped_frames} frames dropped")
+
+class RecordingBus:
+    def __init__(self, bus, recorder):
+        self.bus = bus
+        self.recorder = recorder
+
+    def read_i2c_block_data(self, address, register, length):
+        data = self.bus.read_i2c_block_data(address, register, length)
+        if register == MPU6050_BURST_REGISTER and length == MPU6050_BURST_LENGTH:
+            self.recorder.record_mpu6050(data)
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self.bus, name)
+
+class RecordingCamera:
+    def __init__(self, capture, recorder):
+        self.capture = capture
+        self.recorder = recorder
+
+    def read(self):
+        ok, frame = self.capture.read()
+        if ok:
+            self.recorder.record_frame(frame)
+        return ok, frame
+
+    def __getattr__(self, name):
+        return getattr(self.capture, name)
+
+class Recording:
+    def __init__(self, path):
+        """Read-only, memory-mapped view of a record file."""
+        self.path = path
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.wall_start_time = HEADER.unpack_from(self.data)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a recording")
+        self.index = self.read_index()
+
+        self.streams = {stream: self.index[self.index['stream'] == stream] for stream in STREAM_NAMES}
+        self.distances = np.array([DISTANCE.unpack_from(self.data, offset)[0]
+                                   for offset in self.streams[STREAM_HCSR04]['offset']], dtype=np.float32)
+        self.mpu6050_blocks = np.array([np.frombuffer(self.data, np.uint8, MPU6050_BURST_LENGTH, offset)
+                                        for offset in self.streams[STREAM_MPU6050]['offset']],
+                                       dtype=np.uint8).reshape(-1, MPU6050_BURST_LENGTH)
+
+    def read_index(self):
+        if len(self.data) >= HEADER.size + FOOTER.size:
+            index_offset, count, magic = FOOTER.unpack_from(self.data, len(self.data) - FOOTER.size)
+            if magic == INDEX_MAGIC:
+                return np.frombuffer(self.data, INDEX_DTYPE, count, index_offset).copy()
+
+        # No index: the recorder did not close. Scan the records and drop a truncated last one.
+        entries = []
+        offset = HEADER.size
+        while offset + RECORD.size <= len(self.data):
+            stream, timestamp, length = RECORD.unpack_from(self.data, offset)
+            if stream not in STREAM_NAMES or offset + RECORD.size + length > len(self.data):
+                break
+            entries.append((stream, timestamp, offset + RECORD.size, length))
+            offset += RECORD.size + length
+        return np.array(entries, dtype=INDEX_DTYPE)
+
+    def timestamps(self, stream):
+        return self.streams[stream]['timestamp']
+
+    def duration(self):
+        return float(self.index['timestamp'].max()) if len(self.index) else 0.0
+
+    def frame(self, position):
+        """Decode the frame at position in the frame stream."""
+        entry = self.streams[STREAM_FRAME][position]
+        jpeg = np.frombuffer(self.data, np.uint8, int(entry['length']), int(entry['offset']))
+        return cv2.imdecode(jpeg, cv2.IMREAD_COLOR)
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+def main():
+    if len(sys.argv) != 3 or sys.argv[1] != 'info':
+        sys.exit(__doc__)
+    recording = Recording(sys.argv[2])
+    print(f"{recording.path}: {recording.duration():.1f}s, started "
+          f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(recording.wall_start_time))}")
+    for stream, name in STREAM_NAMES.items():
+        entries = recording.streams[stream]
+        rate = len(entries) / recording.duration() if recording.duration() else 0.0
+        print(f"  {name:<8}{len(entries):>8} records{int(entries['length'].sum()):>12} bytes{rate:>8.1f}/s")
+    recording.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+import os
+import json
+import time
+import numpy as np
+
+MAGIC = b'RINGSTR1'
+HEADER_SIZE = 4096
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'),
+    ('capacity', '<u8'),
+    ('count', '<u8'),  # Total records ever appended; the write position is count % capacity
+    ('columns', 'S4000'),  # JSON list of [name, dtype] pairs
+])
+
+class RingStore:
+    def __init__(self, path, columns, capacity):
+        """
+        Fixed-size, memory-mapped ring of typed records, oldest overwritten first. Single writer;
+        timestamps older than the newest record (e.g. after an NTP step) are clamped to it.
+
+        :param path: File backing the ring; reopened if its layout matches, recreated otherwise.
+        :param columns: List of (name, numpy dtype) pairs. A float64 'timestamp' column is added first.
+        :param capacity: Number of records kept.
+        """
+        self.path = path
+        self.dtype = np.dtype([('timestamp', '<f8')] + [(name, dtype) for name, dtype in columns])
+        self.capacity = capacity
+        columns_json = json.dumps([[name, self.dtype[name].str] for name in self.dtype.names]).encode()
+
+        size = HEADER_SIZE + capacity * self.dtype.itemsize
+        if not self.matches(path, capacity, columns_json, size):
+            with open(path, 'wb') as store_file:
+                store_file.truncate(size)
+            header = np.memmap(path, dtype=HEADER_DTYPE, mode='r+', shape=())
+            header['magic'] = MAGIC
+            header['capacity'] = capacity
+            header['count'] = 0
+            header['columns'] = columns_json
+            header.flush()
+            del header
+
+        self.header = np.memmap(path, dtype=HEADER_DTYPE, mode='r+', shape=())
+        self.records = np.memmap(path, dtype=self.dtype, mode='r+', offset=HEADER_SIZE, shape=(capacity,))
+
+    @staticmethod
+    def matches(path, capacity, columns_json, size):
+        if not os.path.exists(path) or os.path.getsize(path) != size:
+            return False
+        header = np.memmap(path, dtype=HEADER_DTYPE, mode='r', shape=())
+        # [()] reads the fields as numpy bytes scalars, which drop the NUL padding
+        return (header['magic'][()] == MAGIC and int(header['capacity']) == capacity
+                and header['columns'][()] == columns_json)
+
+    @property
+    def count(self):
+        return int(self.header['count'])
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def last_timestamp(self):
+        count = self.count
+        return float(self.records[(count - 1) % self.capacity]['timestamp']) if count else -np.inf
+
+    def append(self, timestamp=None, **values):
+        """Append one record and return its stored timestamp; missing columns are written as zero and None as NaN."""
+        count = self.count
+        timestamp = max(time.time() if timestamp is None else timestamp, self.last_timestamp())
+        record = np.zeros((), dtype=self.dtype)
+        record['timestamp'] = timestamp
+        for name, value in values.items():
+            record[name] = np.nan if value is None else value
+        self.records[count % self.capacity] = record
+        self.header['count'] = count + 1  # Publish the record only after it is written
+        return timestamp
+
+    def replace_latest(self, **values):
+        """Overwrite columns of the newest record, keeping its timestamp."""
+        record = self.records[(self.count - 1) % self.capacity]
+        for name, value in values.items():
+            record[name] = np.nan if value is None else value
+
+    def append_many(self, records):
+        """Append a structured array (or anything convertible to self.dtype) in one copy per wrap."""
+        records = np.array(records, dtype=self.dtype)
+        records['timestamp'] = np.maximum.accumulate(np.maximum(records['timestamp'], self.last_timestamp()))
+        count = self.count
+        if len(records) > self.capacity:
+            count += len(records) - self.capacity
+            records = records[-self.capacity:]
+        start = count % self.capacity
+        first = min(len(records), self.capacity - start)
+        self.records[start:start + first] = records[:first]
+        self.records[:len(records) - first] = records[first:]
+        self.header['count'] = count + len(records)
+
+    def segments(self):
+        """Return the stored records as up to two views, oldest first."""
+        count = self.count
+        if count <= self.capacity:
+            return [self.records[:count]]
+        start = count % self.capacity
+        return [self.records[start:], self.records[:start]]
+
+    def query(self, start=None, end=None):
+        """Return a copy of the records with start <= timestamp < end, oldest first."""
+        parts = []
+        for segment in self.segments():
+            timestamps = segment['timestamp']
+            low = 0 if start is None else np.searchsorted(timestamps, start, side='left')
+            high = len(segment) if end is None else np.searchsorted(timestamps, end, side='left')
+            if high > low:
+                parts.append(segment[low:high])
+        if not parts:
+            return np.empty(0, dtype=self.dtype)
+        return np.concatenate(parts)
+
+    def latest(self, n=1):
+        """Return the newest n records, oldest first."""
+        return np.concatenate(self.segments())[-n:] if len(self) else np.empty(0, dtype=self.dtype)
+
+    def flush(self):
+        self.records.flush()
+        self.header.flush()
+
+class Rollup:
+    def __init__(self, store, value_columns, resolution):
+        """
+        Aggregate raw samples into fixed time buckets (mean, min, max, count) written to store.
+        A bucket written before it closed is updated in place, also after a restart.
+
+        :param resolution: Bucket length in seconds.
+        """
+        self.store = store
+        self.value_columns = value_columns
+        self.resolution = resolution
+        self.bucket = None  # Start time of the open bucket
+        self.written = False  # The open bucket is already the newest record in store
+        self.reset()
+
+    @staticmethod
+    def columns(value_columns):
+        rollup_columns = [('count', '<u4')]
+        for name in value_columns:
+            rollup_columns += [(f'{name}_mean', '<f4'), (f'{name}_min', '<f4'), (f'{name}_max', '<f4')]
+        return rollup_columns
+
+    def reset(self):
+        self.count = 0
+        self.valid = dict.fromkeys(self.value_columns, 0)
+        self.sums = dict.fromkeys(self.value_columns, 0.0)
+        self.minimums = dict.fromkeys(self.value_columns, np.inf)
+        self.maximums = dict.fromkeys(self.value_columns, -np.inf)
+
+    def add(self, timestamp, values):
+        bucket = timestamp - timestamp % self.resolution
+        if self.bucket is not None and bucket != self.bucket:
+            self.close()
+        if self.count == 0 and not self.written and len(self.store) and self.store.last_timestamp() == bucket:
+            self.resume(self.store.latest()[0])
+        self.bucket = bucket
+        self.count += 1
+        for name in self.value_columns:
+            value = values.get(name, 0.0)
+            if value is None or value != value:  # A failed read
+                continue
+            self.valid[name] += 1
+            self.sums[name] += value
+            self.minimums[name] = min(self.minimums[name], value)
+            self.maximums[name] = max(self.maximums[name], value)
+
+    def resume(self, record):
+        """Continue the bucket of a record written earlier."""
+        self.count = int(record['count'])
+        self.written = True
+        for name in self.value_columns:
+            mean = float(record[f'{name}_mean'])
+            if mean == mean:
+                # Per-column valid counts are not stored; weight the mean by the sample count
+                self.valid[name] = self.count
+                self.sums[name] = mean * self.count
+                self.minimums[name] = float(record[f'{name}_min'])
+                self.maximums[name] = float(record[f'{name}_max'])
+
+    def write(self):
+        """Write the open bucket, replacing the record of an earlier write of the same bucket."""
+        if self.bucket is None or self.count == 0:
+            return
+        record = {'count': self.count}
+        for name in self.value_columns:
+            if self.valid[name]:
+                record[f'{name}_mean'] = self.sums[name] / self.valid[name]
+                record[f'{name}_min'] = self.minimums[name]
+                record[f'{name}_max'] = self.maximums[name]
+            else:
+                record[f'{name}_mean'] = record[f'{name}_min'] = record[f'{name}_max'] = None
+        if self.written:
+            self.store.replace_latest(**record)
+        else:
+            self.store.append(self.bucket, **record)
+            self.written = True
+
+    def close(self):
+        """Write the open bucket and start a new one."""
+        self.write()
+        self.written = False
+        self.reset()
+
+class SensorStream:
+    ROLLUPS = {'1s': 1.0, '1min': 60.0}
+
+    def __init__(self, directory, name, columns, capacity, rollups=True, rollup_capacity=100_000):
+        """
+        A raw RingStore for one sensor plus, for numeric streams, 1 s and 1 min rollups.
+
+        :param columns: List of (name, numpy dtype) pairs, without the timestamp.
+        """
+        self.name = name
+        self.raw = RingStore(os.path.join(directory, f'{name}.ring'), columns, capacity)
+        self.rollups = {}
+        if rollups:
+            value_columns = [column for column, _ in columns]
+            for label, resolution in self.ROLLUPS.items():
+                store = RingStore(os.path.join(directory, f'{name}.{label}.ring'),
+                                  Rollup.columns(value_columns), rollup_capacity)
+                self.rollups[label] = Rollup(store, value_columns, resolution)
+
+    def append(self, timestamp=None, **values):
+        timestamp = self.raw.append(timestamp, **values)
+        for rollup in self.rollups.values():
+            rollup.add(timestamp, values)
+
+    def query(self, start=None, end=None, resolution='raw'):
+        """Return records between start and end at 'raw', '1s' or '1min' resolution."""
+        if resolution == 'raw':
+            return self.raw.query(start, end)
+        return self.rollups[resolution].store.query(start, end)
+
+    def flush(self):
+        for rollup in self.rollups.values():
+            rollup.write()  # Stays open; later samples in the same bucket update the record
+            rollup.store.flush()
+        self.raw.flush()
+
+class SensorHistory:
+    def __init__(self, directory='history', capacity=1_000_000):
+        """On-device history of the door, motion, climate and gesture streams."""
+        os.makedirs(directory, exist_ok=True)
+        self.hcsr04 = SensorStream(directory, 'hcsr04', [('distance', '<f4')], capacity)
+        self.mpu6050 = SensorStream(directory, 'mpu6050', [('angle', '<f4'), ('angular_velocity', '<f4')], capacity)
+        self.dht11 = SensorStream(directory, 'dht11', [('temperature', '<f4'), ('humidity', '<f4')], capacity // 10)
+        # Gesture names are stored as payload_codec.GESTURE_NAMES codes
+        self.gesture = SensorStream(directory, 'gesture', [('gesture', '<u1'), ('score', '<f4'),
+                                                           ('decision_latency_ms', '<f4')],
+                                    capacity // 100, rollups=False)
+
+    def streams(self):
+        return [self.hcsr04, self.mpu6050, self.dht11, self.gesture]
+
+    def flush(self):
+        for stream in self.streams():
+            stream.flush()
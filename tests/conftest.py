@@ -0,0 +1,8 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Simulated board, adafruit_dht, gpiod and mpu6050 modules, so components.* import off the Pi
+from simulation.hardware import install
+install()
@@ -0,0 +1,70 @@
+import pytest
+from components.dht11_sensor import DHT11Pipeline
+
+class ScriptedSensor:
+    """DHT11Sensor stand-in returning (temperature, humidity) pairs; an exception entry is raised."""
+    def __init__(self, readings):
+        self.readings = list(readings)
+
+    def read(self):
+        reading = self.readings.pop(0)
+        if isinstance(reading, Exception):
+            raise reading
+        return reading
+
+def checksum_error():
+    return RuntimeError("Checksum did not validate. Try again.")
+
+def test_median_filter_drops_a_spike():
+    pipeline = DHT11Pipeline(ScriptedSensor([(21, 40), (21, 40), (60, 40)]), window=3)
+    assert pipeline.sample().temperature == 21
+    pipeline.sample()
+    pipeline.sample()
+    reading, age = pipeline.latest()
+    assert reading.temperature == 21 and reading.humidity == 40
+    assert age >= 0
+
+def test_publishes_only_outside_the_deadband():
+    readings = [(21, 40), (21, 41), (22, 40), (22, 40), (22, 44), (22, 44)]
+    pipeline = DHT11Pipeline(ScriptedSensor(readings), window=1, temperature_deadband=0.5, humidity_deadband=2.0)
+    published = [pipeline.sample() is not None for _ in readings]
+    assert published == [True, False, True, False, True, False]
+    assert pipeline.stats() == {'reads': 6, 'errors': 0, 'published': 3, 'suppressed': 3}
+
+def test_publishes_unchanged_reading_after_max_interval():
+    pipeline = DHT11Pipeline(ScriptedSensor([(21, 40), (21, 40), (21, 40)]), max_interval=60.0)
+    assert pipeline.sample() is not None
+    assert pipeline.sample() is None
+    pipeline.last_publish_time -= 61.0
+    assert pipeline.sample() is not None
+
+def test_missing_data_counts_as_a_read_error():
+    pipeline = DHT11Pipeline(ScriptedSensor([(None, 40)]))
+    assert pipeline.sample() is None
+    assert pipeline.errors == 1
+    assert pipeline.latest() == (None, None)
+
+def test_checksum_errors_retry_at_the_normal_interval():
+    pipeline = DHT11Pipeline(ScriptedSensor([checksum_error()] * 3 + [(21, 40)]), interval=2.0, retries=3)
+    for _ in range(3):
+        assert pipeline.sample() is None
+        assert pipeline.next_delay == 2.0
+    assert pipeline.sample() is not None
+    assert pipeline.next_delay == 2.0 and pipeline.consecutive_errors == 0
+
+def test_backs_off_on_a_run_of_failures_and_recovers():
+    pipeline = DHT11Pipeline(ScriptedSensor([checksum_error()] * 8 + [(21, 40)]),
+                             interval=2.0, max_backoff=30.0, retries=3)
+    delays = []
+    for _ in range(8):
+        pipeline.sample()
+        delays.append(pipeline.next_delay)
+    assert delays == [2.0, 2.0, 2.0, 4.0, 8.0, 16.0, 30.0, 30.0]
+    pipeline.sample()
+    assert pipeline.next_delay == 2.0
+
+@pytest.mark.parametrize('retries', [0, 1])
+def test_retries_sets_when_backoff_starts(retries):
+    pipeline = DHT11Pipeline(ScriptedSensor([checksum_error()] * 2), interval=1.0, retries=retries)
+    pipeline.sample()
+    assert pipeline.next_delay == (2.0 if retries == 0 else 1.0)
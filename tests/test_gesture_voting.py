@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+from gesture.gesture_voting import GestureVoter, frame_scores
+
+GESTURES = ['thumbs_up', 'thumbs_down', 'five']
+
+def test_decides_once_evidence_reaches_threshold():
+    voter = GestureVoter(GESTURES, window_size=8, threshold=2.0)
+    assert voter.update({'thumbs_up': 0.8}, 100) is None
+    assert voter.update({}, 133) is None
+    assert voter.update({'thumbs_up': 0.6}, 166) is None
+    decision = voter.update({'thumbs_up': 0.9}, 200)
+    assert decision.hand_gesture_name == 'thumbs_up'
+    assert decision.evidence == 2.3
+    assert decision.score == round(2.3 / 3, 2)
+    assert decision.decision_frames == 4
+    assert decision.decision_latency_ms == 100
+
+def test_ignores_low_scores_and_unknown_gestures():
+    voter = GestureVoter(GESTURES, threshold=1.0, min_score=0.5)
+    for timestamp_ms in range(0, 500, 50):
+        assert voter.update({'thumbs_up': 0.4, 'pointing_up': 0.99}, timestamp_ms) is None
+    assert voter.evidence == {}
+
+def test_votes_expire_with_the_window():
+    voter = GestureVoter(GESTURES, window_size=3, threshold=2.0)
+    voter.update({'five': 0.9}, 0)
+    voter.update({}, 10)
+    voter.update({}, 20)
+    assert voter.update({'five': 0.9}, 30) is None  # The first vote has left the window
+    assert abs(voter.evidence['five'] - 0.9) < 1e-9
+    assert voter.update({'five': 0.9}, 40) is None
+    decision = voter.update({'five': 0.9}, 50)
+    assert decision.hand_gesture_name == 'five'
+    assert decision.decision_frames == 3
+
+def test_strongest_gesture_wins():
+    voter = GestureVoter(GESTURES, window_size=4, threshold=1.5)
+    voter.update({'thumbs_up': 0.6, 'thumbs_down': 0.9}, 0)
+    decision = voter.update({'thumbs_up': 0.6, 'thumbs_down': 0.7}, 10)
+    assert decision.hand_gesture_name == 'thumbs_down'
+
+def test_reset_forgets_votes():
+    voter = GestureVoter(GESTURES, threshold=1.5)
+    voter.update({'five': 0.9}, 0)
+    voter.reset()
+    assert voter.update({'five': 0.9}, 10) is None
+    assert voter.frame_index == 1
+
+def test_frame_scores_takes_best_score_per_gesture_across_hands():
+    def category(name, score):
+        return SimpleNamespace(category_name=name, score=score)
+    result = SimpleNamespace(gestures=[[category('five', 0.6), category('thumbs_up', 0.2)],
+                                       [category('five', 0.8)]])
+    assert frame_scores(result) == {'five': 0.8, 'thumbs_up': 0.2}
+    assert frame_scores(SimpleNamespace(gestures=[])) == {}
@@ -0,0 +1,68 @@
+import numpy as np
+from gesture.motion_gate import MotionGate
+
+def empty_doorway():
+    frame = np.full((480, 640, 3), 80, dtype=np.uint8)
+    frame[:, 300:340] = 160  # Door frame
+    return frame
+
+def with_hand(x=200):
+    frame = empty_doorway()
+    frame[150:330, x:x + 120] = 220
+    return frame
+
+def test_first_frame_is_submitted():
+    gate = MotionGate()
+    assert gate.should_process(empty_doorway(), now=0.0)
+
+def test_static_scene_is_skipped_until_keep_alive():
+    gate = MotionGate(keep_alive=1.0)
+    gate.should_process(empty_doorway(), now=0.0)
+    assert not any(gate.should_process(empty_doorway(), now=0.1 * step) for step in range(1, 10))
+    assert gate.should_process(empty_doorway(), now=1.0)
+    assert gate.skipped == 9 and gate.submitted == 2
+
+def test_motion_is_submitted():
+    gate = MotionGate(keep_alive=10.0)
+    gate.should_process(empty_doorway(), now=0.0)
+    gate.should_process(empty_doorway(), now=0.1)
+    assert gate.should_process(with_hand(), now=0.2)
+
+def test_sensor_noise_is_below_the_pixel_threshold():
+    gate = MotionGate(keep_alive=10.0, pixel_threshold=12)
+    rng = np.random.default_rng(0)
+    gate.should_process(empty_doorway(), now=0.0)
+    for step in range(1, 10):
+        noise = rng.integers(-4, 5, size=(480, 640, 3))
+        noisy = np.clip(empty_doorway().astype(int) + noise, 0, 255).astype(np.uint8)
+        assert not gate.should_process(noisy, now=0.1 * step)
+
+def test_still_hand_is_submitted_for_hold_seconds():
+    gate = MotionGate(keep_alive=10.0, hold=1.5, learning_rate=0.5)
+    gate.should_process(with_hand(), now=0.0)
+    for step in range(1, 5):
+        gate.should_process(with_hand(), now=0.1 * step)  # The hand becomes background
+    assert not gate.should_process(with_hand(), now=0.5)
+
+    gate.hand_seen(now=0.5)
+    assert gate.should_process(with_hand(), now=1.0)
+    assert gate.should_process(with_hand(), now=1.9)
+    assert not gate.should_process(with_hand(), now=2.1)
+
+def test_resolution_change_restarts_the_background():
+    gate = MotionGate(keep_alive=10.0)
+    gate.should_process(empty_doorway(), now=0.0)
+    half = empty_doorway()[::2, ::2]  # Low capture resolution, same thumbnail size
+    assert not gate.should_process(half, now=0.1)
+    assert gate.should_process(np.full((200, 200, 3), 80, dtype=np.uint8), now=0.2)
+
+def test_reset_and_stats():
+    gate = MotionGate(keep_alive=10.0)
+    gate.should_process(empty_doorway(), now=0.0)
+    gate.should_process(empty_doorway(), now=0.1)
+    stats = gate.stats(session_cpu_seconds=1.0)
+    assert stats['submitted'] == 1 and stats['skipped'] == 1 and stats['skipped_percent'] == 50.0
+    assert 'cpu_saved_seconds' in stats
+
+    gate.reset()
+    assert gate.should_process(empty_doorway(), now=0.2)
@@ -0,0 +1,88 @@
+import time
+import pytest
+from messaging import mqtt_hub
+from messaging.mqtt_hub import MQTTHub, get_hub
+from simulation.mqtt_broker import LocalMQTTBroker
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+@pytest.fixture
+def broker():
+    broker = LocalMQTTBroker().start()
+    broker.received = []
+    broker.listeners.append(lambda topic, payload, arrival: broker.received.append((topic, payload)))
+    yield broker
+    broker.stop()
+
+@pytest.fixture
+def make_hub(broker, tmp_path):
+    hubs = []
+
+    def make(client_id):
+        hub = MQTTHub('127.0.0.1', broker.port, None, None, spool_dir=str(tmp_path), client_id=client_id)
+        hub.client.reconnect_delay_set(min_delay=1, max_delay=1)
+        hub.start()
+        hubs.append(hub)
+        return hub
+    yield make
+    for hub in hubs:
+        hub.stop()
+
+def test_subscription_made_before_connecting_is_dispatched(make_hub):
+    received = []
+    listener = make_hub('listener')
+    listener.subscribe('door/state', lambda msg: received.append(msg.payload))
+    assert wait_until(listener.client.is_connected)
+    publisher = make_hub('publisher')
+    assert wait_until(publisher.client.is_connected)
+    time.sleep(0.1)  # Let the broker register the subscription
+
+    publisher.publish('door/state', 'open')
+    assert wait_until(lambda: received == [b'open'])
+
+def test_failing_callback_does_not_block_the_others(make_hub):
+    received = []
+    listener = make_hub('listener')
+    listener.subscribe('door/state', lambda msg: 1 / 0)
+    listener.subscribe('door/state', lambda msg: received.append(msg.payload))
+    assert len(listener.subscriptions) == 1
+    assert wait_until(listener.client.is_connected)
+    publisher = make_hub('publisher')
+    assert wait_until(publisher.client.is_connected)
+    time.sleep(0.1)
+
+    publisher.publish('door/state', 'closed')
+    assert wait_until(lambda: received == [b'closed'])
+
+def test_reconnect_renews_the_subscriptions(broker, make_hub):
+    received = []
+    listener = make_hub('listener')
+    listener.subscribe('door/state', lambda msg: received.append(msg.payload))
+    publisher = make_hub('publisher')
+    assert wait_until(lambda: listener.client.is_connected() and publisher.client.is_connected())
+
+    broker.stop()  # The broker forgets every subscription
+    assert wait_until(lambda: not listener.client.is_connected())
+    broker.start()  # Same port
+
+    assert wait_until(lambda: listener.client.is_connected() and publisher.client.is_connected(), timeout=10.0)
+    time.sleep(0.1)
+    publisher.publish('door/state', 'after reconnect')
+    assert wait_until(lambda: received == [b'after reconnect'])
+
+def test_get_hub_shares_one_connection_until_the_last_release(broker, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # Spool file
+    first = get_hub('127.0.0.1', broker.port, client_id='shared')
+    second = get_hub('127.0.0.1', broker.port)
+    assert first is second and first.users == 2
+
+    first.release()
+    assert mqtt_hub.hubs.get(first.key) is first
+    second.release()
+    assert first.key not in mqtt_hub.hubs
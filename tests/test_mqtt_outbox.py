@@ -0,0 +1,93 @@
+import time
+import pytest
+import paho.mqtt.client as mqtt
+from messaging.mqtt_outbox import MQTTOutbox, OutboxMessage, read_spool
+from simulation.mqtt_broker import LocalMQTTBroker
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+@pytest.fixture
+def broker():
+    broker = LocalMQTTBroker().start()
+    broker.received = []
+    broker.listeners.append(lambda topic, payload, arrival: broker.received.append(topic))
+    yield broker
+    broker.stop()
+
+def connected_client(port):
+    client = mqtt.Client()
+    client.reconnect_delay_set(min_delay=1, max_delay=1)
+    client.connect_async('127.0.0.1', port)
+    client.loop_start()
+    assert wait_until(client.is_connected)
+    return client
+
+def test_spool_replays_before_new_messages(broker, tmp_path):
+    spool_path = str(tmp_path / 'outbox.spool')
+    offline = MQTTOutbox(mqtt.Client(), spool_path=spool_path)
+    for index in range(3):
+        offline.publish(f'spooled/{index}', str(index))
+    offline.flush_once()  # Not connected, so everything is spilled
+    assert [message.topic for message in read_spool(spool_path)] == ['spooled/0', 'spooled/1', 'spooled/2']
+
+    client = connected_client(broker.port)
+    try:
+        outbox = MQTTOutbox(client, spool_path=spool_path)
+        assert outbox.spool_count == 3
+        outbox.publish('fresh/0', '3')
+        outbox.flush()
+        assert wait_until(lambda: len(broker.received) == 4)
+        assert broker.received == ['spooled/0', 'spooled/1', 'spooled/2', 'fresh/0']
+        assert outbox.spool_count == 0
+        assert read_spool(spool_path) == []
+        assert outbox.stats()['published'] == 4
+    finally:
+        client.loop_stop()
+        client.disconnect()
+
+def test_truncated_last_record_is_ignored(tmp_path):
+    spool_path = tmp_path / 'outbox.spool'
+    records = [OutboxMessage(f'topic/{index}', b'payload', 1, False, 1.0).encode() for index in range(3)]
+    spool_path.write_bytes(records[0] + records[1] + records[2][:-3])
+
+    messages = read_spool(str(spool_path))
+    assert [message.topic for message in messages] == ['topic/0', 'topic/1']
+    assert messages[1].payload == b'payload' and messages[1].qos == 1
+    assert MQTTOutbox(mqtt.Client(), spool_path=str(spool_path)).spool_count == 2
+
+def test_reconnect_delivers_each_message_once(broker, tmp_path):
+    client = connected_client(broker.port)
+    outbox = MQTTOutbox(client, spool_path=str(tmp_path / 'outbox.spool'), publish_timeout=0.5)
+    try:
+        broker.stop()
+        assert wait_until(lambda: not client.is_connected())
+
+        # paho keeps a QoS 1 message published while disconnected and resends it itself
+        held = OutboxMessage('held/qos1', b'1', 1, False, time.time())
+        lost = OutboxMessage('lost/qos0', b'0', 0, False, time.time())
+        assert outbox.publish_batches([held]) == 1
+        assert outbox.publish_batches([lost]) == 0
+        assert outbox.stats()['published'] == 0
+
+        for index in range(3):
+            outbox.publish(f'offline/{index}', str(index))
+        outbox.flush_once()
+        assert outbox.spool_count == 3
+
+        broker.start()  # Same port
+        assert wait_until(client.is_connected)
+        outbox.flush()
+        assert wait_until(lambda: len(broker.received) >= 4)
+        time.sleep(0.2)  # Room for a duplicate to show up
+        assert sorted(broker.received) == ['held/qos1', 'offline/0', 'offline/1', 'offline/2']
+        assert [topic for topic in broker.received if topic.startswith('offline/')] == ['offline/0', 'offline/1', 'offline/2']
+        assert outbox.spool_count == 0
+    finally:
+        client.loop_stop()
+        client.disconnect()
@@ -0,0 +1,55 @@
+import json
+import math
+import struct
+import pytest
+from messaging import payload_codec
+from messaging.payload_codec import CONTENT_TYPE_BINARY, CONTENT_TYPE_JSON, decode, encode_gesture, encode_reading
+
+@pytest.mark.parametrize('content_type', [CONTENT_TYPE_JSON, CONTENT_TYPE_BINARY])
+@pytest.mark.parametrize('event_type, hand_gesture, score', [
+    ('open', 'thumbs_up', 0.9123),
+    ('closed', 'timeout', None),
+    ('ajar', 'wave', 0.5),  # Not in the tables, sent as strings
+])
+def test_gesture_round_trip(content_type, event_type, hand_gesture, score):
+    payload = encode_gesture(event_type, hand_gesture, score, 1700000000.25, content_type)
+    assert decode(payload, content_type) == {
+        'event_type': event_type, 'hand_gesture': hand_gesture, 'score': score, 'timestamp': 1700000000.25}
+
+@pytest.mark.parametrize('content_type', [CONTENT_TYPE_JSON, CONTENT_TYPE_BINARY])
+def test_reading_round_trip(content_type):
+    assert decode(encode_reading(21.5, content_type), content_type) == 21.5
+    assert decode(encode_reading(None, content_type), content_type) is None
+
+def test_missing_json_reading_is_an_empty_payload():
+    assert encode_reading(None) == ''
+    assert json.loads(encode_reading(21)) == 21
+
+def test_topics():
+    assert payload_codec.topic_for('rpi/dht11/temperature', CONTENT_TYPE_BINARY) == 'rpi/dht11/temperature/bin'
+    assert payload_codec.parse_topic('rpi/dht11/temperature/bin') == ('rpi/dht11/temperature', CONTENT_TYPE_BINARY)
+    assert payload_codec.parse_topic('rpi/door_hand_gesture') == ('rpi/door_hand_gesture', CONTENT_TYPE_JSON)
+
+def gesture_payload(event_code=1, gesture_code=2, tail=b''):
+    header = payload_codec.header(payload_codec.KIND_GESTURE)
+    return payload_codec.GESTURE_STRUCT.pack(header, event_code, gesture_code, 9000, 1.0) + tail
+
+@pytest.mark.parametrize('payload', [
+    b'',
+    gesture_payload()[:-2],  # Truncated fixed fields
+    gesture_payload(event_code=50),  # Unknown event code
+    gesture_payload(gesture_code=200),  # Unknown gesture code
+    gesture_payload(gesture_code=payload_codec.STRING_CODE, tail=b'\x04wa'),  # String cut short
+    gesture_payload(gesture_code=payload_codec.STRING_CODE),  # String length missing
+    gesture_payload(tail=b'\x00'),  # Trailing byte
+    encode_reading(21.0, CONTENT_TYPE_BINARY) + b'\x00',
+    bytes([0x21]) + struct.pack('>f', 1.0),  # Schema version 2
+    bytes([0x1F]),  # Unknown kind
+])
+def test_malformed_binary_payloads_raise_value_error(payload):
+    with pytest.raises(ValueError):
+        decode(payload, CONTENT_TYPE_BINARY)
+
+def test_nan_reading_decodes_to_none():
+    payload = payload_codec.READING_STRUCT.pack(payload_codec.header(payload_codec.KIND_READING), math.nan)
+    assert decode(payload, CONTENT_TYPE_BINARY) is None
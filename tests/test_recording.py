@@ -0,0 +1,60 @@
+import math
+import numpy as np
+import pytest
+from storage.recording import (Recorder, Recording, MPU6050_BURST_REGISTER, MPU6050_BURST_LENGTH, STREAM_HCSR04,
+                               STREAM_MPU6050, STREAM_FRAME)
+
+class FakeBus:
+    def read_i2c_block_data(self, address, register, length):
+        return list(range(register, register + length))
+
+    def write_byte_data(self, address, register, value):
+        return None
+
+def test_round_trip_through_the_index(tmp_path):
+    path = str(tmp_path / 'door.rec')
+    recorder = Recorder(path)
+    start = recorder.start_time
+    recorder.record_distance(12.5, timestamp=start + 0.1)
+    recorder.record_distance(None, timestamp=start + 0.2)  # Failed read
+    bus = recorder.wrap_bus(FakeBus())
+    bus.read_i2c_block_data(0x68, MPU6050_BURST_REGISTER, MPU6050_BURST_LENGTH)
+    bus.read_i2c_block_data(0x68, 0x75, 1)  # Not the burst, so not recorded
+    assert bus.write_byte_data(0x68, 0x6B, 0) is None
+    frame = np.full((48, 64, 3), 120, dtype=np.uint8)
+    recorder.record_frame(frame, timestamp=start + 0.3)
+    recorder.close()
+
+    recording = Recording(path)
+    assert list(recording.timestamps(STREAM_HCSR04)) == pytest.approx([0.1, 0.2])
+    assert recording.distances[0] == 12.5 and math.isnan(recording.distances[1])
+    assert recording.mpu6050_blocks.shape == (1, MPU6050_BURST_LENGTH)
+    assert list(recording.mpu6050_blocks[0]) == list(range(MPU6050_BURST_REGISTER, MPU6050_BURST_REGISTER + 14))
+    decoded = recording.frame(0)
+    assert decoded.shape == frame.shape and abs(int(decoded.mean()) - 120) <= 2  # JPEG is lossy
+    assert recording.duration() == pytest.approx(0.3)
+    recording.close()
+
+def test_crashed_recording_is_scanned_and_the_torn_record_dropped(tmp_path):
+    path = str(tmp_path / 'door.rec')
+    recorder = Recorder(path)
+    for index in range(3):
+        recorder.record_distance(float(index), timestamp=recorder.start_time + index)
+    recorder.file.flush()
+    with open(path, 'rb') as recorded:
+        data = recorded.read()
+    recorder.close()
+
+    crashed = str(tmp_path / 'crashed.rec')
+    with open(crashed, 'wb') as crashed_file:
+        crashed_file.write(data[:-2])  # Power cut in the middle of the last record
+    recording = Recording(crashed)
+    assert list(recording.distances) == [0.0, 1.0]
+    assert len(recording.streams[STREAM_MPU6050]) == 0 and len(recording.streams[STREAM_FRAME]) == 0
+    recording.close()
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / 'not.rec'
+    path.write_bytes(b'\0' * 64)
+    with pytest.raises(ValueError):
+        Recording(str(path))
@@ -0,0 +1,83 @@
+import threading
+from gesture.result_mailbox import ResultMailbox
+
+def test_take_returns_the_result_with_its_frame():
+    mailbox = ResultMailbox(max_age_ms=500)
+    mailbox.submit(1000, frame='frame-1000')
+    mailbox.post('result', 1000, now=1.05)
+    assert mailbox.pending()
+    assert mailbox.take(now=1.06) == ('result', 1000, 'frame-1000')
+    assert not mailbox.pending()
+    assert mailbox.take(now=1.07) is None
+
+def test_newer_result_replaces_one_not_taken():
+    mailbox = ResultMailbox()
+    for timestamp_ms in (1000, 1033, 1066):
+        mailbox.submit(timestamp_ms)
+        mailbox.post(f'result {timestamp_ms}', timestamp_ms, now=1.1)
+    assert mailbox.take(now=1.1) == ('result 1066', 1066, None)
+    stats = mailbox.stats()
+    assert stats['results'] == 3 and stats['taken'] == 1 and stats['dropped'] == 2
+
+def test_old_and_out_of_order_results_are_late():
+    mailbox = ResultMailbox(max_age_ms=500)
+    mailbox.post('stale', 1000, now=1.6)
+    assert mailbox.take(now=1.6) is None
+
+    mailbox.post('fresh', 2000, now=2.05)
+    assert mailbox.take(now=2.05) is not None
+    mailbox.post('older', 1990, now=2.06)
+    assert mailbox.take(now=2.06) is None
+    assert mailbox.stats()['late'] == 2
+
+def test_only_the_newest_frames_are_kept():
+    mailbox = ResultMailbox(keep_frames=2)
+    for timestamp_ms in (1000, 1033, 1066):
+        mailbox.submit(timestamp_ms, frame=timestamp_ms)
+    mailbox.post('result', 1000, now=1.1)
+    assert mailbox.take(now=1.1) == ('result', 1000, None)
+    mailbox.post('result', 1066, now=1.1)
+    assert mailbox.take(now=1.1) == ('result', 1066, 1066)
+
+def test_stats_count_unanswered_frames_and_latency():
+    mailbox = ResultMailbox()
+    for timestamp_ms in (1000, 1033, 1066, 1100):
+        mailbox.submit(timestamp_ms)
+    mailbox.post('a', 1000, now=1.04)
+    mailbox.post('b', 1066, now=1.126)
+    stats = mailbox.stats()
+    assert stats['unanswered'] == 2
+    assert stats['inference_ms_p50'] == 50.0
+    assert ResultMailbox().stats()['inference_ms_p50'] is None
+
+def test_reset_starts_a_new_session():
+    mailbox = ResultMailbox()
+    mailbox.submit(5000, frame='old')
+    mailbox.post('old', 5000, now=5.0)
+    mailbox.take(now=5.0)
+    mailbox.reset()
+    assert mailbox.stats()['submitted'] == 0 and not mailbox.pending()
+    mailbox.post('new', 1000, now=1.0)  # Earlier than the last result of the previous session
+    assert mailbox.take(now=1.0) == ('new', 1000, None)
+
+def test_concurrent_post_and_take_keep_counts_consistent():
+    mailbox = ResultMailbox(max_age_ms=1e12)
+    posts = 2000
+    taken = []
+
+    def callback():
+        for timestamp_ms in range(1, posts + 1):
+            mailbox.post(timestamp_ms, timestamp_ms, now=0.0)
+
+    thread = threading.Thread(target=callback)
+    thread.start()
+    while thread.is_alive() or mailbox.pending():
+        delivery = mailbox.take(now=0.0)
+        if delivery is not None:
+            taken.append(delivery[1])
+    thread.join()
+
+    assert taken == sorted(taken) and len(set(taken)) == len(taken)
+    stats = mailbox.stats()
+    assert stats['results'] == posts
+    assert stats['taken'] + stats['dropped'] + stats['late'] == posts
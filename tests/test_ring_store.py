@@ -0,0 +1,102 @@
+import math
+import numpy as np
+from storage.ring_store import RingStore, SensorStream, SensorHistory
+
+COLUMNS = [('value', '<f4')]
+
+def test_append_and_query_in_time_order(tmp_path):
+    store = RingStore(str(tmp_path / 'values.ring'), COLUMNS, capacity=10)
+    for index in range(5):
+        store.append(100.0 + index, value=index)
+    store.append(105.0, value=None)
+
+    assert len(store) == 6
+    assert list(store.query(101.0, 103.0)['value']) == [1.0, 2.0]
+    assert math.isnan(store.latest()['value'][0])
+    assert list(store.latest(3)['timestamp']) == [103.0, 104.0, 105.0]
+
+def test_wraps_around_keeping_the_newest_records(tmp_path):
+    store = RingStore(str(tmp_path / 'values.ring'), COLUMNS, capacity=4)
+    for index in range(10):
+        store.append(float(index), value=index)
+
+    assert len(store) == 4 and store.count == 10
+    assert list(store.query()['value']) == [6.0, 7.0, 8.0, 9.0]
+    assert list(store.query(7.0, 9.0)['value']) == [7.0, 8.0]
+
+def test_append_many_wraps(tmp_path):
+    store = RingStore(str(tmp_path / 'values.ring'), COLUMNS, capacity=4)
+    store.append(0.0, value=0)
+    records = np.zeros(5, dtype=store.dtype)
+    records['timestamp'] = np.arange(1.0, 6.0)
+    records['value'] = np.arange(1.0, 6.0)
+    store.append_many(records)
+
+    assert list(store.query()['value']) == [2.0, 3.0, 4.0, 5.0]
+
+def test_clamps_timestamps_that_go_backwards(tmp_path):
+    store = RingStore(str(tmp_path / 'values.ring'), COLUMNS, capacity=10)
+    store.append(100.0, value=1)
+    assert store.append(90.0, value=2) == 100.0  # Clock stepped back
+    store.append(101.0, value=3)
+
+    assert list(store.query()['timestamp']) == [100.0, 100.0, 101.0]
+    assert list(store.query(100.0, 101.0)['value']) == [1.0, 2.0]
+
+def test_reopens_an_existing_file(tmp_path):
+    path = str(tmp_path / 'values.ring')
+    store = RingStore(path, COLUMNS, capacity=10)
+    store.append(1.0, value=7)
+    store.flush()
+    del store
+
+    reopened = RingStore(path, COLUMNS, capacity=10)
+    assert list(reopened.query()['value']) == [7.0]
+    recreated = RingStore(path, COLUMNS, capacity=20)  # Different layout
+    assert len(recreated) == 0
+
+def test_rollups_aggregate_buckets_and_skip_failed_reads(tmp_path):
+    stream = SensorStream(str(tmp_path), 'sensor', COLUMNS, capacity=100)
+    for timestamp, value in [(60.0, 1.0), (60.5, 3.0), (61.2, None), (125.0, 5.0)]:
+        stream.append(timestamp, value=value)
+    stream.flush()
+
+    seconds = stream.query(resolution='1s')
+    assert list(seconds['timestamp']) == [60.0, 61.0, 125.0]
+    assert list(seconds['count']) == [2, 1, 1]
+    assert seconds['value_mean'][0] == 2.0 and seconds['value_min'][0] == 1.0 and seconds['value_max'][0] == 3.0
+    assert math.isnan(seconds['value_mean'][1])
+
+    minutes = stream.query(resolution='1min')
+    assert list(minutes['timestamp']) == [60.0, 120.0]
+    assert list(minutes['count']) == [3, 1]
+    assert minutes['value_mean'][0] == 2.0
+
+def test_partial_bucket_is_merged_after_a_restart(tmp_path):
+    stream = SensorStream(str(tmp_path), 'sensor', COLUMNS, capacity=100)
+    stream.append(60.0, value=1.0)
+    stream.append(70.0, value=3.0)
+    stream.flush()  # Shutdown in the middle of the 60 s bucket
+    del stream
+
+    stream = SensorStream(str(tmp_path), 'sensor', COLUMNS, capacity=100)
+    stream.append(80.0, value=5.0)
+    stream.append(130.0, value=7.0)
+    stream.flush()
+
+    minutes = stream.query(resolution='1min')
+    assert list(minutes['timestamp']) == [60.0, 120.0]
+    assert list(minutes['count']) == [3, 1]
+    assert minutes['value_mean'][0] == 3.0
+    assert minutes['value_min'][0] == 1.0 and minutes['value_max'][0] == 5.0
+    assert list(stream.query()['value']) == [1.0, 3.0, 5.0, 7.0]
+
+def test_sensor_history_streams(tmp_path):
+    history = SensorHistory(str(tmp_path), capacity=1000)
+    history.hcsr04.append(1.0, distance=12.5)
+    history.gesture.append(1.0, gesture=2, score=0.9, decision_latency_ms=120.0)
+    history.flush()
+
+    assert list(history.hcsr04.query()['distance']) == [12.5]
+    assert history.gesture.rollups == {}
+    assert len(history.streams()) == 4
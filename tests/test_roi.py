@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+from gesture.roi import AdaptiveROI
+
+WIDTH, HEIGHT = 640, 480
+
+def hand(x_min, y_min, x_max, y_max):
+    """(1, 21, 3) landmarks spread over a box, in normalised coordinates."""
+    landmarks = np.zeros((1, 21, 3), dtype=np.float32)
+    landmarks[0, :, 0] = np.linspace(x_min, x_max, 21)
+    landmarks[0, :, 1] = np.linspace(y_min, y_max, 21)
+    return landmarks
+
+NO_HAND = np.zeros((0, 21, 3), dtype=np.float32)
+
+def frame():
+    return np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+
+def test_searches_on_the_downscaled_full_frame():
+    roi = AdaptiveROI(search_width=320)
+    image = roi.prepare(frame(), 1)
+    assert image.shape == (240, 320, 3)
+    landmarks = hand(0.4, 0.4, 0.6, 0.6)
+    assert roi.to_frame(landmarks, 1) is landmarks  # Full-frame coordinates already
+
+def test_crops_a_square_around_the_hand():
+    roi = AdaptiveROI(input_size=256, margin=0.6)
+    roi.update(hand(0.45, 0.4, 0.55, 0.6), WIDTH, HEIGHT)
+
+    x0, y0, x1, y1 = roi.rect
+    assert (x1 - x0) * WIDTH == pytest.approx((y1 - y0) * HEIGHT)  # Square in pixels
+    assert (x0 + x1) / 2 == pytest.approx(0.5) and (y0 + y1) / 2 == pytest.approx(0.5)
+    assert (y1 - y0) * HEIGHT == pytest.approx(96 * 2.2)  # Hand height plus margin on both sides
+
+    image = roi.prepare(frame(), 2)
+    assert image.shape[0] == image.shape[1] and image.shape[0] <= 256
+
+def test_downscales_large_crops_to_input_size():
+    roi = AdaptiveROI(input_size=128)
+    roi.update(hand(0.3, 0.2, 0.7, 0.8), WIDTH, HEIGHT)
+    image = roi.prepare(frame(), 1)
+    assert max(image.shape[:2]) == 128
+
+def test_maps_crop_landmarks_back_with_the_rect_of_their_frame():
+    roi = AdaptiveROI()
+    roi.update(hand(0.45, 0.4, 0.55, 0.6), WIDTH, HEIGHT)
+    rect = roi.rect
+    roi.prepare(frame(), 10)
+    roi.update(hand(0.05, 0.05, 0.15, 0.25), WIDTH, HEIGHT)  # Moves before the result for 10 arrives
+
+    centre = np.array([[[0.5, 0.5, 0.1]]], dtype=np.float32)
+    mapped = roi.to_frame(centre, 10)
+    assert mapped[0, 0, 0] == pytest.approx((rect[0] + rect[2]) / 2)
+    assert mapped[0, 0, 1] == pytest.approx((rect[1] + rect[3]) / 2)
+    assert mapped[0, 0, 2] == pytest.approx(0.1 * (rect[2] - rect[0]))
+    assert roi.to_frame(centre, 10) is centre  # Each rect is used once
+
+def test_crop_stays_put_while_the_hand_is_well_inside():
+    roi = AdaptiveROI()
+    roi.update(hand(0.45, 0.4, 0.55, 0.6), WIDTH, HEIGHT)
+    rect = roi.rect
+    roi.update(hand(0.46, 0.41, 0.56, 0.61), WIDTH, HEIGHT)
+    assert roi.rect == rect
+    roi.update(hand(0.55, 0.4, 0.65, 0.6), WIDTH, HEIGHT)  # Near the edge
+    assert roi.rect != rect
+
+def test_crop_is_clamped_to_the_frame():
+    roi = AdaptiveROI()
+    roi.update(hand(0.0, 0.0, 0.1, 0.15), WIDTH, HEIGHT)
+    x0, y0, x1, y1 = roi.rect
+    assert x0 == 0.0 and y0 == 0.0
+    assert x1 <= 1.0 and y1 <= 1.0
+
+def test_goes_back_to_searching_once_the_hand_is_lost():
+    roi = AdaptiveROI(lost_after=3, idle_after=5)
+    roi.update(hand(0.45, 0.4, 0.55, 0.6), WIDTH, HEIGHT)
+    for _ in range(2):
+        roi.update(NO_HAND, WIDTH, HEIGHT)
+    assert roi.rect is not None
+    roi.update(NO_HAND, WIDTH, HEIGHT)
+    assert roi.rect is None
+    assert not roi.low_resolution()
+    for _ in range(2):
+        roi.update(NO_HAND, WIDTH, HEIGHT)
+    assert roi.low_resolution()
+    roi.update(hand(0.45, 0.4, 0.55, 0.6), WIDTH, HEIGHT)
+    assert not roi.low_resolution()
+
+def test_stats_and_reset():
+    roi = AdaptiveROI(search_width=320)
+    roi.prepare(frame(), 1)
+    roi.update(hand(0.45, 0.4, 0.55, 0.6), WIDTH, HEIGHT)
+    roi.prepare(frame(), 2)
+    stats = roi.stats()
+    assert stats['search_frames'] == 1 and stats['cropped_frames'] == 1
+    roi.reset()
+    assert roi.rect is None and not roi.rects
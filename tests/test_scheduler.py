@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+import pytest
+from runtime import scheduler
+from runtime.scheduler import RateScheduler
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(scheduler, 'time', SimpleNamespace(monotonic=clock.monotonic, sleep=clock.sleep))
+    return clock
+
+def run_for(rate_scheduler, clock, seconds, step=0.001):
+    end = clock.now + seconds
+    while clock.now < end:
+        rate_scheduler.run_pending()
+        clock.now += step
+
+def test_each_task_runs_at_its_own_rate(clock):
+    rate_scheduler = RateScheduler()
+    runs = {'fast': 0, 'slow': 0}
+    rate_scheduler.add_task('fast', lambda: runs.__setitem__('fast', runs['fast'] + 1), active_rate_hz=20)
+    rate_scheduler.add_task('slow', lambda: runs.__setitem__('slow', runs['slow'] + 1), active_rate_hz=2)
+    run_for(rate_scheduler, clock, 1.0)
+    assert runs == {'fast': 20, 'slow': 2}
+
+def test_idle_tasks_back_off_to_the_idle_rate(clock):
+    rate_scheduler = RateScheduler()
+    task = rate_scheduler.add_task('door', lambda: None, active_rate_hz=20, idle_rate_hz=4, idle_after=1.0)
+    run_for(rate_scheduler, clock, 0.9)
+    assert task.interval == task.active_interval
+
+    clock.now += 0.2  # Past idle_after
+    intervals = []
+    for _ in range(4):
+        rate_scheduler.run_pending()
+        intervals.append(task.interval)
+        clock.now = task.next_run
+    assert intervals == [0.1, 0.2, 0.25, 0.25]  # Doubles up to the idle interval
+
+def test_activity_restores_the_active_rate(clock):
+    rate_scheduler = RateScheduler()
+    task = rate_scheduler.add_task('door', lambda: None, active_rate_hz=20, idle_rate_hz=4, idle_after=1.0)
+    run_for(rate_scheduler, clock, 2.0)
+    assert task.interval == task.idle_interval
+
+    rate_scheduler.notify_activity()
+    assert task.interval == task.active_interval
+    assert task.next_run <= clock.now + task.active_interval  # The pending slow run is pulled in
+
+def test_overrunning_task_does_not_catch_up_in_a_burst(clock):
+    rate_scheduler = RateScheduler()
+    task = rate_scheduler.add_task('slow_read', lambda: clock.sleep(0.35), active_rate_hz=10)
+    rate_scheduler.run_pending()
+    assert task.next_run == clock.now
+    assert rate_scheduler.run_pending() == 0.0
+    assert task.runs == 2 and task.jitter_max == 0.0
+
+def test_unpaced_run_ignores_rates_and_reports_stats(clock):
+    rate_scheduler = RateScheduler()
+    runs = []
+
+    def callback():
+        runs.append(clock.now)
+        clock.now += 0.001
+        if len(runs) == 5:
+            rate_scheduler.stop()
+    rate_scheduler.add_task('replay', callback, active_rate_hz=1)
+    rate_scheduler.run(paced=False)
+    assert len(runs) == 5
+
+    stats = rate_scheduler.stats()
+    assert stats['tasks']['replay']['runs'] == 5
+    assert stats['duty_cycle'] == 1.0
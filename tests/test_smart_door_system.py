@@ -0,0 +1,66 @@
+import threading
+import pytest
+from simulation.mqtt_broker import LocalMQTTBroker
+
+class SlowLoadingGestureService:
+    """Stands in for GestureRecognitionService with a model load that blocks until released, and can fail."""
+    def __init__(self, error=None):
+        self.error = error
+        self.release_load = threading.Event()
+        self.sessions = 0
+
+    def start(self):
+        self.release_load.wait(timeout=5.0)
+        if self.error is not None:
+            raise self.error
+
+    def start_session(self):
+        self.sessions += 1
+
+    def get_result(self, timeout=None):
+        return None
+
+    def stop(self):
+        pass
+
+@pytest.fixture
+def make_system(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # MQTT spool file
+    broker = LocalMQTTBroker().start()
+    systems = []
+
+    def make(gesture_service):
+        from main import SmartDoorSystem
+        system = SmartDoorSystem(mqtt_server='127.0.0.1', mqtt_port=broker.port, history_dir=None,
+                                 gesture_service=gesture_service)
+        systems.append(system)
+        return system
+    yield make
+    for system in systems:
+        system.gesture_service.release_load.set()
+        system.system_shutdown()
+    broker.stop()
+
+def test_door_event_during_preload_is_skipped(make_system):
+    service = SlowLoadingGestureService()
+    system = make_system(service)
+    system.door_motion = 'moving'
+    system.handle_door_event('open')  # Returns straight away instead of loading the model
+    assert service.sessions == 0 and system.pending_event is None
+
+    service.release_load.set()
+    assert system.model_ready.wait(timeout=5.0)
+    system.handle_door_event('closed')
+    assert service.sessions == 1 and system.pending_event is not None
+
+def test_failed_preload_disables_gesture_sessions(make_system):
+    service = SlowLoadingGestureService(error=RuntimeError("no camera"))
+    system = make_system(service)
+    system.door_motion = 'moving'
+    system.handle_door_event('open')
+
+    service.release_load.set()
+    assert system.model_ready.wait(timeout=5.0)
+    assert isinstance(system.gesture_error, RuntimeError)
+    system.handle_door_event('closed')
+    assert service.sessions == 0 and system.pending_event is None